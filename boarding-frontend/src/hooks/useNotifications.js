@@ -1,13 +1,14 @@
 import { useEffect, useRef } from 'react'
-import { useDispatch } from 'react-redux'
-import { addMember, updateMember, removeMember } from '../redux/memberSlice'
-import { addSchedule, updateSchedule, removeSchedule } from '../redux/scheduleSlice'
-import { addPayment, updatePayment, removePayment } from '../redux/paymentSlice'
-import { addBill, updateBill, removeBill } from '../redux/billSlice'
-import { addRepair, updateRepair, removeRepair } from '../redux/repairSlice'
+import { useDispatch, useStore } from 'react-redux'
+import { addMember, updateMember, removeMember, fetchMembers } from '../redux/memberSlice'
+import { addSchedule, updateSchedule, removeSchedule, fetchSchedules } from '../redux/scheduleSlice'
+import { addPayment, updatePayment, removePayment, fetchPayments } from '../redux/paymentSlice'
+import { addBill, updateBill, removeBill, fetchBills } from '../redux/billSlice'
+import { addRepair, updateRepair, removeRepair, fetchRepairs } from '../redux/repairSlice'
 
 export function useNotifications() {
   const dispatch = useDispatch()
+  const store = useStore()
   const token = localStorage.getItem('access')
   const wsRef = useRef(null)
   const reconnectTimeoutRef = useRef(null)
@@ -23,7 +24,8 @@ export function useNotifications() {
     const connectWebSocket = () => {
       try {
         console.log('[WS] Attempting to connect to:', `${WS_BASE}/ws/notifications/`)
-        const ws = new WebSocket(`${WS_BASE}/ws/notifications/`)
+        // Browsers can't set headers on a WebSocket handshake; the server reads the JWT from ?token=
+        const ws = new WebSocket(`${WS_BASE}/ws/notifications/?token=${encodeURIComponent(token)}`)
 
         ws.onopen = () => {
           console.log('[WS] Connected successfully')
@@ -34,33 +36,53 @@ export function useNotifications() {
           }
         }
 
+        const refetch = {
+          member: fetchMembers,
+          schedule: fetchSchedules,
+          payment: fetchPayments,
+          bill: fetchBills,
+          repair: fetchRepairs,
+        }
+        const reducers = {
+          member: { slice: 'members', add: addMember, update: updateMember, remove: removeMember },
+          schedule: { slice: 'schedules', add: addSchedule, update: updateSchedule, remove: removeSchedule },
+          payment: { slice: 'payments', add: addPayment, update: updatePayment, remove: removePayment },
+          bill: { slice: 'bills', add: addBill, update: updateBill, remove: removeBill },
+          repair: { slice: 'repairs', add: addRepair, update: updateRepair, remove: removeRepair },
+        }
+
+        const handleEvent = ({ model, action, data, base_version: baseVersion }) => {
+          // Bulk writes send one summary ({ action: 'bulk_created', data: { ids } }); refetch the list
+          if (action && action.startsWith('bulk_')) {
+            if (refetch[model]) dispatch(refetch[model]())
+            return
+          }
+          const r = reducers[model]
+          if (!r) return
+          if (action === 'created') dispatch(r.add(data))
+          else if (action === 'updated') dispatch(r.update(data))
+          else if (action === 'deleted' || action === 'missing') dispatch(r.remove(data.id))
+          else if (action === 'patched') {
+            // Only the changed fields; apply if we hold the version it was made against
+            const row = store.getState()[r.slice].list.find(item => item.id === data.id)
+            if (!row) return
+            if (row.version === baseVersion) dispatch(r.update({ ...row, ...data }))
+            else ws.send(JSON.stringify({ action: 'fetch', model, id: data.id }))
+          }
+        }
+
         ws.onmessage = (event) => {
           try {
             const payload = JSON.parse(event.data)
-            console.log('[WS] Message received:', payload)
-            const { model, action, data } = payload
-
-            if (model === 'member') {
-              if (action === 'created') dispatch(addMember(data))
-              else if (action === 'updated') dispatch(updateMember(data))
-              else if (action === 'deleted') dispatch(removeMember(data.id))
-            } else if (model === 'schedule') {
-              if (action === 'created') dispatch(addSchedule(data))
-              else if (action === 'updated') dispatch(updateSchedule(data))
-              else if (action === 'deleted') dispatch(removeSchedule(data.id))
-            } else if (model === 'payment') {
-              if (action === 'created') dispatch(addPayment(data))
-              else if (action === 'updated') dispatch(updatePayment(data))
-              else if (action === 'deleted') dispatch(removePayment(data.id))
-            } else if (model === 'bill') {
-              if (action === 'created') dispatch(addBill(data))
-              else if (action === 'updated') dispatch(updateBill(data))
-              else if (action === 'deleted') dispatch(removeBill(data.id))
-            } else if (model === 'repair') {
-              if (action === 'created') dispatch(addRepair(data))
-              else if (action === 'updated') dispatch(updateRepair(data))
-              else if (action === 'deleted') dispatch(removeRepair(data.id))
+            // Server heartbeat; sockets that stay silent are closed as idle
+            if (payload.type === 'ping') {
+              ws.send(JSON.stringify({ action: 'pong' }))
+              return
             }
+            console.log('[WS] Message received:', payload)
+            // A committed transaction's changes arrive as one { batch: [...] } frame
+            if (Array.isArray(payload.batch)) payload.batch.forEach(handleEvent)
+            else handleEvent(payload)
           } catch (err) {
             console.error('[WS] Error parsing message:', err)
           }
@@ -96,6 +118,6 @@ export function useNotifications() {
         wsRef.current.close()
       }
     }
-  }, [token, dispatch])
+  }, [token, dispatch, store])
 }
 
@@ -197,9 +197,9 @@ export default function Bills() {
           <div>
             <label className="block text-sm font-medium text-gray-700 mb-1">Month *</label>
             <input
-              type="text"
+              type="month"
               required
-              placeholder="e.g., Nov-2025"
+              placeholder="YYYY-MM, e.g. 2025-11"
               className="w-full border border-gray-300 rounded-lg px-4 py-2 focus:outline-none focus:ring-2 focus:ring-blue-500"
               value={form.month}
               onChange={(e) => setForm({ ...form, month: e.target.value })}
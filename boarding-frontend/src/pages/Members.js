@@ -24,9 +24,16 @@ export default function Members() {
   const [submitError, setSubmitError] = useState(null)
   const [submitting, setSubmitting] = useState(false)
 
+  // Filter and search on the server; the search box is debounced
   useEffect(() => {
-    dispatch(fetchMembers())
-  }, [dispatch])
+    const timer = setTimeout(() => {
+      dispatch(fetchMembers({
+        status: statusFilter === 'All' ? undefined : statusFilter,
+        search: searchTerm || undefined,
+      }))
+    }, searchTerm ? 300 : 0)
+    return () => clearTimeout(timer)
+  }, [dispatch, statusFilter, searchTerm])
 
   const filteredMembers = members.filter(m => {
     const matchesSearch = m.name.toLowerCase().includes(searchTerm.toLowerCase()) ||
@@ -26,10 +26,13 @@ export default function Repairs() {
   const [submitting, setSubmitting] = useState(false)
 
   useEffect(() => {
-    dispatch(fetchRepairs())
     dispatch(fetchMembers())
   }, [dispatch])
 
+  useEffect(() => {
+    dispatch(fetchRepairs(statusFilter === 'All' ? undefined : { status: statusFilter }))
+  }, [dispatch, statusFilter])
+
   const filteredRepairs = statusFilter === 'All'
     ? repairs
     : repairs.filter(r => r.status === statusFilter)
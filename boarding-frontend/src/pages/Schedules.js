@@ -25,10 +25,13 @@ export default function Schedules() {
   const [submitting, setSubmitting] = useState(false)
 
   useEffect(() => {
-    dispatch(fetchSchedules())
     dispatch(fetchMembers())
   }, [dispatch])
 
+  useEffect(() => {
+    dispatch(fetchSchedules(taskFilter === 'All' ? undefined : { task_type: taskFilter }))
+  }, [dispatch, taskFilter])
+
   const filteredSchedules = taskFilter === 'All'
     ? schedules
     : schedules.filter(s => s.task_type === taskFilter)
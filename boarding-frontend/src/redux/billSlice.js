@@ -1,10 +1,10 @@
 import { createSlice, createAsyncThunk } from '@reduxjs/toolkit'
 import api from '../services/api'
 
-export const fetchBills = createAsyncThunk('bills/fetch', async (_, { rejectWithValue }) => {
+export const fetchBills = createAsyncThunk('bills/fetch', async (params, { rejectWithValue }) => {
   try {
     console.log('[REDUX-BILLS] Fetching bills from API')
-    const res = await api.get('/bills/')
+    const res = await api.get('/bills/', { params })
     console.log('[REDUX-BILLS] Received:', res.data)
     return res.data
   } catch (err) {
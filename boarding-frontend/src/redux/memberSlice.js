@@ -1,10 +1,10 @@
 import { createSlice, createAsyncThunk } from '@reduxjs/toolkit'
 import api from '../services/api'
 
-export const fetchMembers = createAsyncThunk('members/fetch', async (_, { rejectWithValue }) => {
+export const fetchMembers = createAsyncThunk('members/fetch', async (params, { rejectWithValue }) => {
   try {
     console.log('[REDUX-MEMBERS] Fetching members from API')
-    const res = await api.get('/members/')
+    const res = await api.get('/members/', { params })
     console.log('[REDUX-MEMBERS] Received:', res.data)
     return res.data
   } catch (err) {
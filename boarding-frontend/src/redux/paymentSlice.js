@@ -1,10 +1,10 @@
 import { createSlice, createAsyncThunk } from '@reduxjs/toolkit'
 import api from '../services/api'
 
-export const fetchPayments = createAsyncThunk('payments/fetch', async (_, { rejectWithValue }) => {
+export const fetchPayments = createAsyncThunk('payments/fetch', async (params, { rejectWithValue }) => {
   try {
     console.log('[REDUX-PAYMENTS] Fetching payments from API')
-    const res = await api.get('/payments/')
+    const res = await api.get('/payments/', { params })
     console.log('[REDUX-PAYMENTS] Received:', res.data)
     return res.data
   } catch (err) {
@@ -1,10 +1,10 @@
 import { createSlice, createAsyncThunk } from '@reduxjs/toolkit'
 import api from '../services/api'
 
-export const fetchRepairs = createAsyncThunk('repairs/fetch', async (_, { rejectWithValue }) => {
+export const fetchRepairs = createAsyncThunk('repairs/fetch', async (params, { rejectWithValue }) => {
   try {
     console.log('[REDUX-REPAIRS] Fetching repairs from API')
-    const res = await api.get('/repairs/')
+    const res = await api.get('/repairs/', { params })
     console.log('[REDUX-REPAIRS] Received:', res.data)
     return res.data
   } catch (err) {
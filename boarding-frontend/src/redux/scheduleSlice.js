@@ -1,10 +1,10 @@
 import { createSlice, createAsyncThunk } from '@reduxjs/toolkit'
 import api from '../services/api'
 
-export const fetchSchedules = createAsyncThunk('schedules/fetch', async (_, { rejectWithValue }) => {
+export const fetchSchedules = createAsyncThunk('schedules/fetch', async (params, { rejectWithValue }) => {
   try {
     console.log('[REDUX-SCHEDULES] Fetching schedules from API')
-    const res = await api.get('/schedules/')
+    const res = await api.get('/schedules/', { params })
     console.log('[REDUX-SCHEDULES] Received:', res.data)
     return res.data
   } catch (err) {
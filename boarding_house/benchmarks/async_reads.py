@@ -0,0 +1,190 @@
+"""
+Sync vs async read path benchmark (core/async_views.py).
+
+Seeds a throwaway SQLite database, then for each mode starts a fresh process
+that serves the API in-process through Django's ASGI handler, with
+``ASYNC_READ_VIEWS`` off (sync DRF views) and on (async views), and fires
+``--requests`` GETs per endpoint at each ``--concurrency`` level. Reports
+throughput and p50/p95/p99 latency per mode, endpoint and concurrency.
+
+Run: python benchmarks/async_reads.py --members 2000 --concurrency 1 16 64 --requests 400
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'boarding_house.settings')
+
+
+def setup_django(db_path, async_reads=False):
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.ASYNC_READ_VIEWS = async_reads
+    settings.ALLOWED_HOSTS = ['*']
+    settings.DEBUG = False
+    import django
+    django.setup()
+
+
+def seed(db_path, members):
+    """Create the schema and data; returns the request plan for the children."""
+    setup_django(db_path)
+    import datetime
+    from django.core.management import call_command
+    from rest_framework_simplejwt.tokens import AccessToken
+    from core import summary
+    from core.models import Member, Payment, Bill, Repair, UserProfile
+    from core.signals import suppress_row_handlers
+    from django.contrib.auth.models import User
+
+    call_command('migrate', verbosity=0)
+    today = datetime.date.today()
+    with suppress_row_handlers():
+        Member.objects.bulk_create([
+            Member(name=f'Member {i}', email=f'member{i}@example.com', room_number=str(100 + i % 80))
+            for i in range(members)
+        ], batch_size=500)
+        ids = list(Member.objects.values_list('id', flat=True))
+        Payment.objects.bulk_create([Payment(member_id=pk, amount=100, status='Unpaid') for pk in ids], batch_size=500)
+        Bill.objects.bulk_create([Bill(member_id=pk, month='2025-01', balance=50) for pk in ids], batch_size=500)
+        Repair.objects.bulk_create([
+            Repair(member_id=pk, item_name='Tap', repair_date=today, cost=10) for pk in ids[::10]
+        ], batch_size=500)
+    summary.rebuild()
+
+    staff = User.objects.create_user('bench-staff', password='x')
+    UserProfile.objects.update_or_create(user=staff, defaults={'role': 'staff'})
+    member_user = User.objects.create_user('bench-member', password='x')
+    UserProfile.objects.update_or_create(user=member_user, defaults={'role': 'member'})
+    Member.objects.filter(pk=ids[0]).update(user=member_user)
+    payment_id = Payment.objects.filter(member_id=ids[0]).values_list('id', flat=True).first()
+
+    staff_token, member_token = str(AccessToken.for_user(staff)), str(AccessToken.for_user(member_user))
+    return [
+        ('staff: payments page', '/api/payments/?page_size=50', staff_token),
+        ('staff: members page', '/api/members/?page_size=50', staff_token),
+        ('staff: payment detail', f'/api/payments/{payment_id}/', staff_token),
+        ('staff: dashboard', '/api/dashboard/stats/', staff_token),
+        ('member: own payments', '/api/payments/?page_size=50', member_token),
+    ]
+
+
+async def asgi_get(app, path, token):
+    """One GET through the ASGI app; returns (status, seconds)."""
+    route, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': route, 'raw_path': route.encode(),
+        'query_string': query.encode(), 'root_path': '',
+        'headers': [(b'host', b'localhost'), (b'authorization', f'Bearer {token}'.encode())],
+        'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+    }
+    sent_body = False
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Never disconnect; Django stops listening once the response is sent
+        await asyncio.Event().wait()
+
+    status = None
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    return status, time.perf_counter() - start
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def load(app, plan, concurrency_levels, requests):
+    results = []
+    for name, path, token in plan:
+        await asgi_get(app, path, token)  # warm caches (roles, query plans)
+        for concurrency in concurrency_levels:
+            latencies, errors = [], 0
+            queue = iter(range(requests))
+
+            async def client():
+                nonlocal errors
+                for _ in queue:
+                    status, seconds = await asgi_get(app, path, token)
+                    latencies.append(seconds)
+                    errors += status != 200
+
+            start = time.perf_counter()
+            await asyncio.gather(*(client() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+            results.append({
+                'endpoint': name,
+                'concurrency': concurrency,
+                'requests': requests,
+                'errors': errors,
+                'requests_per_sec': round(requests / elapsed, 1),
+                'latency_ms': {
+                    'p50': round(percentile(latencies, 50) * 1000, 2),
+                    'p95': round(percentile(latencies, 95) * 1000, 2),
+                    'p99': round(percentile(latencies, 99) * 1000, 2),
+                },
+            })
+    return results
+
+
+def child(args):
+    setup_django(args.db, async_reads=args.child == 'async')
+    from django.core.asgi import get_asgi_application
+    plan = json.loads(args.plan)
+    results = asyncio.run(load(get_asgi_application(), plan, args.concurrency, args.requests))
+    print(json.dumps(results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--members', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 16, 64])
+    parser.add_argument('--requests', type=int, default=400, help='requests per endpoint and concurrency level')
+    parser.add_argument('--output', help='also write the results as JSON to this file')
+    parser.add_argument('--child', choices=['sync', 'async'], help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    parser.add_argument('--plan', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.sqlite3')
+        plan = seed(db_path, args.members)
+        report = {'members': args.members, 'modes': {}}
+        for mode in ('sync', 'async'):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', mode, '--db', db_path,
+                 '--plan', json.dumps(plan), '--requests', str(args.requests),
+                 '--concurrency', *map(str, args.concurrency)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            report['modes'][mode] = json.loads(output.strip().splitlines()[-1])
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Cross-worker broadcast benchmark for core.channel_layer.UnixSocketChannelLayer.
+
+Starts ``--workers`` processes, each holding ``--channels`` channels joined to
+one group (standing in for ASGI workers with connected sockets), then a
+separate sender process does ``--messages`` group_sends. Reports send
+throughput and send-to-receive latency across all receivers.
+
+Run: python benchmarks/channel_layer.py --workers 4 --channels 50 --messages 1000
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'boarding_house.settings')
+
+GROUP = 'bench'
+
+
+def _layer(path, capacity):
+    from core.channel_layer import UnixSocketChannelLayer
+    return UnixSocketChannelLayer(path=path, capacity=capacity)
+
+
+def worker(path, channels, messages, ready, results):
+    async def run():
+        layer = _layer(path, capacity=messages)
+        names = [await layer.new_channel() for _ in range(channels)]
+        for name in names:
+            await layer.group_add(GROUP, name)
+        ready.put(os.getpid())
+
+        latencies = []
+
+        async def drain(name):
+            for _ in range(messages):
+                message = await layer.receive(name)
+                latencies.append(time.time() - message['sent'])
+
+        await asyncio.gather(*(drain(name) for name in names))
+        results.put(latencies)
+        await layer.close()
+
+    asyncio.run(run())
+
+
+def sender(path, messages, results):
+    async def run():
+        layer = _layer(path, capacity=messages)
+        start = time.perf_counter()
+        for i in range(messages):
+            await layer.group_send(GROUP, {'type': 'bench.message', 'n': i, 'sent': time.time()})
+        results.put(time.perf_counter() - start)
+        await layer.close()
+
+    asyncio.run(run())
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--channels', type=int, default=50, help='receiving channels per worker')
+    parser.add_argument('--messages', type=int, default=1000)
+    parser.add_argument('--output', help='also write the results as JSON to this file')
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as path:
+        ready, results, sent = ctx.Queue(), ctx.Queue(), ctx.Queue()
+        procs = [
+            ctx.Process(target=worker, args=(path, args.channels, args.messages, ready, results))
+            for _ in range(args.workers)
+        ]
+        for proc in procs:
+            proc.start()
+        for _ in procs:
+            ready.get(timeout=60)
+
+        start = time.perf_counter()
+        send_proc = ctx.Process(target=sender, args=(path, args.messages, sent))
+        send_proc.start()
+        send_seconds = sent.get(timeout=600)
+        latencies = []
+        for _ in procs:
+            latencies.extend(results.get(timeout=600))
+        total_seconds = time.perf_counter() - start
+        for proc in procs + [send_proc]:
+            proc.join()
+
+    delivered = len(latencies)
+    report = {
+        'workers': args.workers,
+        'channels_per_worker': args.channels,
+        'messages': args.messages,
+        'delivered': delivered,
+        'group_sends_per_sec': round(args.messages / send_seconds, 1),
+        'deliveries_per_sec': round(delivered / total_seconds, 1),
+        'latency_ms': {
+            'mean': round(statistics.mean(latencies) * 1000, 3),
+            'p50': round(percentile(latencies, 50) * 1000, 3),
+            'p95': round(percentile(latencies, 95) * 1000, 3),
+            'p99': round(percentile(latencies, 99) * 1000, 3),
+        },
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == '__main__':
+    main()
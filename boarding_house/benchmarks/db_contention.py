@@ -0,0 +1,108 @@
+"""
+SQLite lock-contention benchmark: Django's SQLite defaults vs core/database.py.
+
+Runs the ``benchmarks/http_load.py`` workload (write-heavy by default) at
+each ``--concurrency`` level twice, each in a fresh process and database:
+
+* ``default``: Django's stock SQLite setup (rollback journal, deferred
+  transactions);
+* ``tuned``: the settings as configured (WAL, ``busy_timeout``,
+  ``synchronous=NORMAL``, ``BEGIN IMMEDIATE``).
+
+Every request has its own thread and connection under Django's ASGI handler,
+so concurrent writes contend for the database lock; a request that loses
+fails with "database is locked" (a 500). Reports failed requests, throughput
+and p50/p95/p99 latency per level and mode.
+
+Run: python benchmarks/db_contention.py --members 500 --concurrency 1 8 32 --requests 600
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'boarding_house.settings')
+
+import http_load  # noqa: E402
+
+MODES = ('default', 'tuned')
+
+
+def configure(mode):
+    """Django's stock SQLite setup for ``default``; WAL for ``tuned`` (a throwaway file)."""
+    from django.conf import settings
+    if mode == 'default':
+        settings.DATABASES['default'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': None, 'CONN_MAX_AGE': 0}
+        settings.SQLITE_PRAGMAS = {}
+    else:
+        settings.SQLITE_PRAGMAS = {**settings.SQLITE_PRAGMAS, 'journal_mode': 'WAL'}
+
+
+def run_mode(mode, args):
+    configure(mode)
+    with tempfile.TemporaryDirectory() as tmp:
+        state = http_load.seed(os.path.join(tmp, 'bench.sqlite3'), args.members, args.payments, args.bills, False)
+        from django.core.asgi import get_asgi_application
+        from django.db import connection
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+        connection.close()
+        workload = http_load.Workload(state, args.mix, random.Random(args.seed))
+        levels = asyncio.run(http_load.load(get_asgi_application(), workload, args.concurrency, args.requests))
+    return {'journal_mode': journal_mode, 'levels': [
+        {key: level[key] for key in ('concurrency', 'requests', 'errors', 'requests_per_sec', 'latency_ms')}
+        for level in levels
+    ]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--members', type=int, default=500)
+    parser.add_argument('--payments', type=int, default=3, help='payments per member')
+    parser.add_argument('--bills', type=int, default=2, help='bills per member')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=600, help='requests per concurrency level')
+    parser.add_argument('--mix', choices=sorted(http_load.WRITE_FACTOR), default='write')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the request mix')
+    parser.add_argument('--output', help='also write the results as JSON to this file')
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        # Child process: one mode, report on stdout
+        print(json.dumps(run_mode(args.mode, args)))
+        return
+
+    report = {
+        'config': {
+            'members': args.members, 'requests': args.requests, 'mix': args.mix, 'seed': args.seed,
+        },
+        'modes': {},
+    }
+    for mode in MODES:
+        # A fresh process: settings are read once, and WAL sticks to the database file
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), *sys.argv[1:], '--mode', mode],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        report['modes'][mode] = json.loads(output.splitlines()[-1])
+
+    print(json.dumps(report, indent=2, sort_keys=True))
+    for default, tuned in zip(*(report['modes'][mode]['levels'] for mode in MODES)):
+        print(f'c={default["concurrency"]:<4} errors {default["errors"]:>5} -> {tuned["errors"]:<5} '
+              f'req/s {default["requests_per_sec"]:>8} -> {tuned["requests_per_sec"]:<8} '
+              f'p95 {default["latency_ms"]["p95"]:>9.2f} -> {tuned["latency_ms"]["p95"]:.2f} ms')
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,328 @@
+"""
+HTTP load benchmark for the API.
+
+Seeds a throwaway SQLite database with ``--members`` members (and
+``--payments`` / ``--bills`` per member), then serves the API in-process
+through Django's ASGI handler and drives a weighted mix of requests at each
+``--concurrency`` level: JWT login, member/payment/bill list, detail,
+create, update and delete, dashboard stats and a member's own payments.
+Deletes only remove rows the run itself created. ``--mix read`` drops the
+writes, ``--mix write`` makes them four times as frequent.
+
+Reports throughput and p50/p95/p99 latency per endpoint and concurrency
+level. ``--output`` writes the report as sorted JSON, so two runs (e.g. two
+releases) can be diffed directly or with ``--compare old.json``, which
+prints the p95 change per endpoint. Requests go straight to the ASGI
+application, so the numbers exclude the HTTP server and network.
+
+Run: python benchmarks/http_load.py --members 2000 --concurrency 1 8 32 --requests 1000 --output load.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'boarding_house.settings')
+
+STAFF_PASSWORD = 'bench-password'
+OK_STATUSES = (200, 201, 204)
+
+# endpoint -> (weight, write?)
+ENDPOINTS = {
+    'auth: token': (1, True),
+    'members: list': (8, False),
+    'members: detail': (8, False),
+    'members: create': (2, True),
+    'members: update': (2, True),
+    'members: delete': (1, True),
+    'payments: list': (10, False),
+    'payments: detail': (8, False),
+    'payments: create': (4, True),
+    'payments: update': (3, True),
+    'payments: delete': (1, True),
+    'bills: list': (8, False),
+    'bills: detail': (6, False),
+    'bills: create': (3, True),
+    'bills: update': (2, True),
+    'bills: delete': (1, True),
+    'dashboard: stats': (6, False),
+    'member: own payments': (6, False),
+}
+WRITE_FACTOR = {'read': 0, 'mixed': 1, 'write': 4}
+
+
+def setup_django(db_path, async_reads=False):
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.ASYNC_READ_VIEWS = async_reads
+    settings.ALLOWED_HOSTS = ['*']
+    settings.DEBUG = False
+    import django
+    django.setup()
+
+
+def seed(db_path, members, payments, bills, async_reads):
+    """Create the schema and data; returns the workload state."""
+    setup_django(db_path, async_reads)
+    import datetime
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from rest_framework_simplejwt.tokens import AccessToken
+    from core import summary
+    from core.models import Member, Payment, Bill, UserProfile
+    from core.signals import suppress_row_handlers
+
+    call_command('migrate', verbosity=0)
+    today = datetime.date.today()
+    with suppress_row_handlers():
+        Member.objects.bulk_create([
+            Member(name=f'Member {i}', email=f'member{i}@example.com', room_number=str(100 + i % 80))
+            for i in range(members)
+        ], batch_size=500)
+        member_ids = list(Member.objects.values_list('id', flat=True))
+        Payment.objects.bulk_create([
+            Payment(member_id=pk, amount=100 + n, status='Paid' if n % 3 else 'Unpaid')
+            for pk in member_ids for n in range(payments)
+        ], batch_size=500)
+        Bill.objects.bulk_create([
+            Bill(member_id=pk, month=f'{today.year - 1 - n // 12}-{n % 12 + 1:02d}', balance=50)
+            for pk in member_ids for n in range(bills)
+        ], batch_size=500)
+    summary.rebuild()
+
+    staff = User.objects.create_user('bench-staff', password=STAFF_PASSWORD)
+    UserProfile.objects.update_or_create(user=staff, defaults={'role': 'staff'})
+    member_user = User.objects.create_user('bench-member', password=STAFF_PASSWORD)
+    UserProfile.objects.update_or_create(user=member_user, defaults={'role': 'member'})
+    Member.objects.filter(pk=member_ids[0]).update(user=member_user)
+    return {
+        'staff_token': str(AccessToken.for_user(staff)),
+        'member_token': str(AccessToken.for_user(member_user)),
+        'member': member_ids,
+        # Owners of new payments and bills: seeded members, never deleted
+        'owners': list(member_ids),
+        'payment': list(Payment.objects.values_list('id', flat=True)),
+        'bill': list(Bill.objects.values_list('id', flat=True)),
+        # Rows created by the run, the only ones it deletes
+        'created': {'member': [], 'payment': [], 'bill': []},
+    }
+
+
+async def asgi_request(app, method, path, token=None, body=None):
+    """One request through the ASGI app; returns (status, response body, seconds)."""
+    route, _, query = path.partition('?')
+    headers = [(b'host', b'localhost')]
+    if token:
+        headers.append((b'authorization', f'Bearer {token}'.encode()))
+    payload = b''
+    if body is not None:
+        payload = json.dumps(body).encode()
+        headers += [(b'content-type', b'application/json'), (b'content-length', str(len(payload)).encode())]
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': method, 'scheme': 'http', 'path': route, 'raw_path': route.encode(),
+        'query_string': query.encode(), 'root_path': '', 'headers': headers,
+        'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+    }
+    sent_body = False
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {'type': 'http.request', 'body': payload, 'more_body': False}
+        # Never disconnect; Django stops listening once the response is sent
+        await asyncio.Event().wait()
+
+    status, chunks = None, []
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        elif message['type'] == 'http.response.body':
+            chunks.append(message.get('body', b''))
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    return status, b''.join(chunks), time.perf_counter() - start
+
+
+class Workload:
+    """Picks the next request of the mix and records the rows writes create."""
+    collections = {'members': 'member', 'payments': 'payment', 'bills': 'bill'}
+
+    def __init__(self, state, mix, rng):
+        self.state = state
+        self.rng = rng
+        self.counter = itertools.count()
+        self.names, self.weights = [], []
+        for name, (weight, write) in ENDPOINTS.items():
+            weight *= WRITE_FACTOR[mix] if write else 1
+            if weight:
+                self.names.append(name)
+                self.weights.append(weight)
+
+    def next(self):
+        """``(endpoint, method, path, token, body)`` of the next request."""
+        name = self.rng.choices(self.names, self.weights)[0]
+        if name.endswith('delete') and not self.state['created'][self.collections[name.split(':')[0]]]:
+            name = name.replace('delete', 'create')
+        return (name, *self.request(name))
+
+    def request(self, name):
+        staff = self.state['staff_token']
+        n = next(self.counter)
+        if name == 'auth: token':
+            return 'POST', '/api/auth/token/', None, {'username': 'bench-staff', 'password': STAFF_PASSWORD}
+        if name == 'dashboard: stats':
+            return 'GET', '/api/dashboard/stats/', staff, None
+        if name == 'member: own payments':
+            return 'GET', '/api/payments/?page_size=50', self.state['member_token'], None
+
+        collection, operation = name.split(': ')
+        model = self.collections[collection]
+        if operation == 'list':
+            return 'GET', f'/api/{collection}/?page_size=50', staff, None
+        if operation == 'delete':
+            created = self.state['created'][model]
+            pk = created.pop(self.rng.randrange(len(created)))
+            self.state[model].remove(pk)
+            return 'DELETE', f'/api/{collection}/{pk}/', staff, None
+        if operation == 'create':
+            return 'POST', f'/api/{collection}/', staff, self.new_row(model, n)
+        pk = self.rng.choice(self.state[model])
+        if operation == 'detail':
+            return 'GET', f'/api/{collection}/{pk}/', staff, None
+        changes = {
+            'member': {'contact': f'555-{n:04d}'},
+            'payment': {'collected_by': f'Clerk {n % 7}'},
+            'bill': {'water_amount': f'{n % 90 + 10}.00'},
+        }[model]
+        return 'PATCH', f'/api/{collection}/{pk}/', staff, changes
+
+    def new_row(self, model, n):
+        if model == 'member':
+            return {'name': f'Load member {n}', 'email': f'load{n}-{os.getpid()}@example.com', 'room_number': '900'}
+        member = self.rng.choice(self.state['owners'])
+        if model == 'payment':
+            return {'member': member, 'amount': '120.00', 'status': 'Unpaid'}
+        return {'member': member, 'month': f'2030-{n % 12 + 1:02d}', 'balance': '75.00'}
+
+    def created(self, name, status, body):
+        """Keep ids of created rows for the updates and deletes that follow."""
+        if name.endswith('create') and status == 201:
+            model = self.collections[name.split(':')[0]]
+            pk = json.loads(body)['id']
+            self.state[model].append(pk)
+            self.state['created'][model].append(pk)
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def summarize(latencies, errors, elapsed):
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'requests_per_sec': round(len(latencies) / elapsed, 1),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 2),
+            'p95': round(percentile(latencies, 95) * 1000, 2),
+            'p99': round(percentile(latencies, 99) * 1000, 2),
+        },
+    }
+
+
+async def load(app, workload, concurrency_levels, requests):
+    levels = []
+    for concurrency in concurrency_levels:
+        latencies, errors = {}, {}
+        queue = iter(range(requests))
+
+        async def client():
+            for _ in queue:
+                name, method, path, token, body = workload.next()
+                status, content, seconds = await asgi_request(app, method, path, token, body)
+                latencies.setdefault(name, []).append(seconds)
+                errors[name] = errors.get(name, 0) + (status not in OK_STATUSES)
+                workload.created(name, status, content)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        levels.append({
+            'concurrency': concurrency,
+            **summarize(list(itertools.chain(*latencies.values())), sum(errors.values()), elapsed),
+            'endpoints': {name: summarize(latencies[name], errors[name], elapsed) for name in latencies},
+        })
+    return levels
+
+
+def compare(baseline, report):
+    """Print the p95 change of every endpoint and level present in both reports."""
+    old = {
+        (level['concurrency'], name): stats['latency_ms']['p95']
+        for level in baseline['levels'] for name, stats in level['endpoints'].items()
+    }
+    for level in report['levels']:
+        for name, stats in sorted(level['endpoints'].items()):
+            before = old.get((level['concurrency'], name))
+            if before:
+                after = stats['latency_ms']['p95']
+                print(f'c={level["concurrency"]:<4} {name:<24} p95 {before:>9.2f} -> {after:>9.2f} ms '
+                      f'({(after - before) / before:+.0%})')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--members', type=int, default=2000)
+    parser.add_argument('--payments', type=int, default=5, help='payments per member')
+    parser.add_argument('--bills', type=int, default=3, help='bills per member')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=1000, help='requests per concurrency level')
+    parser.add_argument('--mix', choices=sorted(WRITE_FACTOR), default='mixed')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the request mix')
+    parser.add_argument('--async-reads', action='store_true', help='serve reads with ASYNC_READ_VIEWS')
+    parser.add_argument('--output', help='also write the results as JSON to this file')
+    parser.add_argument('--compare', help='earlier --output file to compare p95 latencies with')
+    args = parser.parse_args()
+    if args.members < 1:
+        parser.error('--members must be at least 1')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        state = seed(os.path.join(tmp, 'bench.sqlite3'), args.members, args.payments, args.bills, args.async_reads)
+        import django
+        from django.core.asgi import get_asgi_application
+        workload = Workload(state, args.mix, random.Random(args.seed))
+        levels = asyncio.run(load(get_asgi_application(), workload, args.concurrency, args.requests))
+
+    report = {
+        'config': {
+            'members': args.members, 'payments_per_member': args.payments, 'bills_per_member': args.bills,
+            'requests': args.requests, 'mix': args.mix, 'seed': args.seed, 'async_reads': args.async_reads,
+            'python': platform.python_version(), 'django': django.get_version(), 'database': 'sqlite',
+        },
+        'levels': levels,
+    }
+    print(json.dumps(report, indent=2, sort_keys=True))
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as fh:
+            compare(json.load(fh), report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+List serialization benchmark: DRF serializers vs core/fastpath.py.
+
+Seeds a throwaway SQLite database with ``--rows`` payments, bills and
+repairs, then for each model times building the JSON body of a
+``--page-size`` row list response both ways: the serializer path
+(``plan_queryset`` instances + ``serializer_class(many=True).data``) and
+the fast path (``.values()`` rows + ``ValuesRepresentation``). Each mode
+is measured for the full fetch + serialize + render and for serialization
+alone, as rows per second (best of ``--repeat``). The two bodies are
+checked to be byte-identical.
+
+Run: python benchmarks/serialization.py --rows 20000 --page-size 500
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'boarding_house.settings')
+
+
+def setup_django(db_path):
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.DEBUG = False
+    import django
+    django.setup()
+
+
+def seed(rows):
+    import datetime
+    from django.core.management import call_command
+    from core.models import Member, Payment, Bill, Repair
+    from core.signals import suppress_row_handlers
+
+    call_command('migrate', verbosity=0)
+    members = max(1, rows // 10)
+    today = datetime.date.today()
+    with suppress_row_handlers():
+        Member.objects.bulk_create([
+            Member(name=f'Member {i}', email=f'member{i}@example.com', room_number=str(100 + i % 80))
+            for i in range(members)
+        ], batch_size=1000)
+        ids = list(Member.objects.values_list('id', flat=True))
+        Payment.objects.bulk_create([
+            Payment(member_id=ids[i % members], amount=100 + i % 50, collected_by='Office',
+                    status='Paid' if i % 3 else 'Unpaid')
+            for i in range(rows)
+        ], batch_size=1000)
+        Bill.objects.bulk_create([
+            Bill(member_id=ids[i % members], month=f'{2020 + i // 12 % 6}-{i % 12 + 1:02d}',
+                 water_amount=12, electricity_amount=30, balance=42)
+            for i in range(rows)
+        ], batch_size=1000)
+        Repair.objects.bulk_create([
+            Repair(member_id=ids[i % members], item_name='Tap', cost=10 + i % 20,
+                   repair_date=today - datetime.timedelta(days=i % 365), description='Leaking')
+            for i in range(rows)
+        ], batch_size=1000)
+
+
+def best(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def measure(serializer_class, page_size, repeat):
+    from rest_framework.renderers import JSONRenderer
+    from core.fastpath import representation_for
+
+    render = JSONRenderer().render
+    queryset = serializer_class.Meta.model.objects.order_by('-id')
+    planned = serializer_class.plan_queryset(queryset)[:page_size]
+    representation = representation_for(serializer_class)
+    rows = representation.values(queryset)[:page_size]
+
+    serializer_total, serializer_body = best(
+        repeat, lambda: render(serializer_class(list(planned), many=True).data))
+    fast_total, fast_body = best(repeat, lambda: render(representation.data(list(rows))))
+    if serializer_body != fast_body:
+        raise SystemExit(f'{serializer_class.__name__}: fast path output differs from the serializer')
+
+    instances, dicts = list(planned), list(rows)
+    serializer_only, _ = best(repeat, lambda: serializer_class(instances, many=True).data)
+    fast_only, _ = best(repeat, lambda: representation.data(dicts))
+    count = len(instances)
+    return {
+        'rows': count,
+        'identical': True,
+        'rows_per_sec': {
+            'serializer': round(count / serializer_total),
+            'fast_path': round(count / fast_total),
+            'serializer_only': round(count / serializer_only),
+            'fast_path_only': round(count / fast_only),
+        },
+        'speedup': round(serializer_total / fast_total, 2),
+        'speedup_serialization_only': round(serializer_only / fast_only, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=20000, help='rows seeded per model')
+    parser.add_argument('--page-size', type=int, default=500, help='rows per response')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='also write the results as JSON to this file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(os.path.join(tmp, 'bench.sqlite3'))
+        from core.serializers import PaymentSerializer, BillSerializer, RepairSerializer
+        seed(args.rows)
+        report = {
+            'rows': args.rows,
+            'page_size': args.page_size,
+            'models': {
+                serializer_class.Meta.model.__name__.lower(): measure(serializer_class, args.page_size, args.repeat)
+                for serializer_class in (PaymentSerializer, BillSerializer, RepairSerializer)
+            },
+        }
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -8,12 +8,15 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'boarding_house.settings')
 django.setup()
 
 import core.routing
+from core.auth import JWTAuthMiddleware
 
 application = ProtocolTypeRouter({
     'http': get_asgi_application(),
     'websocket': AuthMiddlewareStack(
-        URLRouter(
-            core.routing.websocket_urlpatterns
+        JWTAuthMiddleware(
+            URLRouter(
+                core.routing.websocket_urlpatterns
+            )
         )
     ),
 })
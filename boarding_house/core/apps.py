@@ -12,3 +12,10 @@ class CoreConfig(AppConfig):
         except Exception:
             # Fail silently during static analysis or if dependencies aren't installed
             pass
+
+        from . import database, metrics
+        # WAL, busy_timeout etc. on new SQLite connections (core/database.py)
+        database.connect_signals()
+        if metrics.enabled():
+            # Count SQL per request (core/metrics.py)
+            metrics.connect_signals()
@@ -0,0 +1,149 @@
+"""
+Async read path for the core API.
+
+Under an ASGI server every sync DRF view runs on Django's single
+thread-sensitive executor thread, so one slow request holds up all the
+others in the worker. With ``ASYNC_READ_VIEWS`` enabled, ``GET`` / ``HEAD``
+on the list, detail and dashboard routes are served by ``AsyncReadView``
+instead, on the event loop:
+
+* the JWT is checked and the user loaded with the async ORM
+  (``core.auth.authenticate_request``), the role with
+  ``roles.aget_role_info``;
+* the viewset's own permissions, ``get_queryset`` (member scoping) and
+  filter backends then run unchanged, since with the role memoised on the
+  request none of them queries the database;
+* the page (``KeysetPagination.apaginate_queryset``), the object and the
+  change counters are read with the async ORM, and the response is
+  serialized and rendered in the event loop.
+
+Only the queries themselves go through the thread pool (that is how
+Django's async ORM runs them), so concurrent requests interleave between
+queries rather than queueing for whole views. Writes and every other method
+on those routes are passed to the regular DRF view unchanged.
+
+Viewsets opt in with ``AsyncReadMixin`` (``alist`` / ``aretrieve``) or by
+defining ``a<action>`` for a custom ``GET`` action (``DashboardViewSet.astats``);
+``core/urls.py`` swaps their routes in with ``async_urlpatterns``.
+Benchmark: ``python benchmarks/async_reads.py``.
+"""
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404, HttpResponse
+from django.urls import URLPattern
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from . import changes, roles
+from .auth import authenticate_request
+
+
+class AsyncReadMixin:
+    """Async ``list`` / ``retrieve`` for ``AsyncReadView``, with conditional GET."""
+
+    async def alist(self, request, *args, **kwargs):
+        return await self._conditional(request, self._alist, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self._conditional(request, self._aretrieve, *args, **kwargs)
+
+    async def _conditional(self, request, handler, *args, **kwargs):
+        scope = getattr(self, 'change_scope', None)
+        if scope is None:
+            return await handler(request, *args, **kwargs)
+        return await changes.aconditional_get(request, [scope], handler, *args, **kwargs)
+
+    async def _alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        paginator = self.paginator
+        if paginator is not None:
+            if hasattr(paginator, 'apaginate_queryset'):
+                page = await paginator.apaginate_queryset(queryset, request, view=self)
+            else:
+                page = await sync_to_async(paginator.paginate_queryset)(queryset, request, view=self)
+            if page is not None:
+                return self.get_paginated_response(self.represent_many(page))
+        rows = [obj async for obj in queryset]
+        return Response(self.represent_many(rows))
+
+    async def _aretrieve(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, DjangoValidationError):
+            raise Http404
+        self.check_object_permissions(request, obj)
+        return Response(self.represent_object(obj))
+
+    # Overridden by RepresentationCacheMixin (core/representations.py)
+    def represent_object(self, obj):
+        return self.get_serializer(obj).data
+
+    def represent_many(self, objs):
+        return self.get_serializer(objs, many=True).data
+
+
+def _rendered(response):
+    """Render in the event loop rather than in Django's thread-pool render step."""
+    response.render()
+    plain = HttpResponse(response.content, status=response.status_code)
+    for header, value in response.items():
+        plain[header] = value
+    # As on DRF responses (read by the test client)
+    plain.data = response.data
+    return plain
+
+
+class AsyncReadView(View):
+    """
+    Serves ``GET`` / ``HEAD`` of one router route with the viewset's async
+    action; ``sync_view`` (the router's view for the route) handles the rest.
+    """
+    sync_view = None
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+        return await self.get(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        view = self.sync_view.cls(**self.sync_view.initkwargs)
+        view.action_map = self.sync_view.actions
+        view.args, view.kwargs = args, kwargs
+        view.headers = view.default_response_headers
+        drf_request = view.initialize_request(request, *args, **kwargs)
+        view.request = drf_request
+        try:
+            if all(isinstance(a, JWTAuthentication) for a in drf_request.authenticators):
+                await authenticate_request(drf_request)
+            else:
+                # Other authenticators (e.g. the test client's forced auth) as usual
+                await sync_to_async(getattr)(drf_request, 'user')
+            await roles.aget_role_info(drf_request)
+            # Content negotiation, permissions and throttles, as in APIView.dispatch
+            view.initial(drf_request, *args, **kwargs)
+            response = await getattr(view, f'a{view.action}')(drf_request, *args, **kwargs)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        response = view.finalize_response(drf_request, response, *args, **kwargs)
+        return _rendered(response)
+
+
+def async_urlpatterns(patterns):
+    """
+    Router ``patterns`` with ``AsyncReadView`` in place of each route whose
+    viewset has an async version of the route's ``GET`` action. The order is
+    kept, so e.g. ``bulk/`` still matches before the detail route.
+    """
+    result = []
+    for pattern in patterns:
+        callback = pattern.callback
+        action = getattr(callback, 'actions', {}).get('get')
+        if action is not None and hasattr(callback.cls, f'a{action}'):
+            view = csrf_exempt(AsyncReadView.as_view(sync_view=callback))
+            pattern = URLPattern(pattern.pattern, view, pattern.default_args, pattern.name)
+        result.append(pattern)
+    return result
@@ -0,0 +1,84 @@
+"""
+JWT authentication for WebSocket connections.
+
+Browsers cannot set an ``Authorization`` header on a WebSocket handshake, so
+the frontend passes the SimpleJWT access token it already holds as a query
+parameter: ``ws://host/ws/notifications/?token=<access>``. A valid token
+replaces ``scope['user']`` (otherwise left to the session-based
+``AuthMiddlewareStack``) and its claims are kept in ``scope['jwt']``.
+
+``authenticate_request`` is the same SimpleJWT check for the async HTTP read
+views (``core/async_views.py``), with the user loaded by the async ORM.
+"""
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+@database_sync_to_async
+def _get_user(validated_token):
+    try:
+        return JWTAuthentication().get_user(validated_token)
+    except Exception:
+        return AnonymousUser()
+
+
+async def authenticate_request(request):
+    """
+    Set ``request.user`` / ``request.auth`` on a DRF request from its
+    ``Authorization: Bearer`` header, as ``JWTAuthentication`` would, without
+    leaving the event loop except for the user query. Raises
+    ``AuthenticationFailed`` (``InvalidToken``) like the sync authenticator.
+    """
+    authenticator = JWTAuthentication()
+    header = authenticator.get_header(request)
+    raw_token = authenticator.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        request._authenticator = None
+        request.user, request.auth = AnonymousUser(), None
+        return
+
+    validated_token = authenticator.get_validated_token(raw_token)
+    try:
+        user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken('Token contained no recognizable user identification')
+    user = await authenticator.user_model.objects.filter(
+        **{jwt_settings.USER_ID_FIELD: user_id}
+    ).afirst()
+    if user is None:
+        raise AuthenticationFailed('User not found', code='user_not_found')
+    if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed('User is inactive', code='user_inactive')
+    if jwt_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+        jwt_settings.REVOKE_TOKEN_CLAIM
+    ) != get_md5_hash_password(user.password):
+        raise AuthenticationFailed("The user's password has been changed.", code='password_changed')
+    # What DRF's Request records after running its authenticators
+    request._authenticator = authenticator
+    request.user, request.auth = user, validated_token
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    token_query_param = 'token'
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        query = parse_qs(scope.get('query_string', b'').decode())
+        raw_token = (query.get(self.token_query_param) or [None])[0]
+        if raw_token:
+            try:
+                validated_token = JWTAuthentication().get_validated_token(raw_token)
+            except (InvalidToken, TokenError):
+                scope['user'] = AnonymousUser()
+            else:
+                scope['user'] = await _get_user(validated_token)
+                scope['jwt'] = validated_token
+        return await super().__call__(scope, receive, send)
@@ -0,0 +1,268 @@
+"""
+Bulk create / update / delete for the core viewsets.
+
+``BulkWriteMixin`` adds ``/api/<resource>/bulk/``:
+
+* ``POST``   a JSON list of objects          -> 201 with the created rows
+* ``PATCH``  a JSON list of ``{"id", ...}``  -> 200 with the updated rows
+* ``DELETE`` ``{"ids": [...]}``              -> 204
+
+The whole list is validated before anything is written (errors come back as
+a list aligned with the input), related-object lookups and unique checks
+are done with one query per field for the batch rather than per row, and
+the write is a single ``bulk_create`` / ``bulk_update`` / ``delete`` inside
+one transaction. The per-row signal handlers are suppressed; the dashboard
+summary gets one combined delta and clients get one ``bulk_<action>``
+notification.
+"""
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import DictField, JSONField, ListField
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
+from rest_framework.validators import UniqueValidator
+
+from . import changes, notifications, representations, roles, summary
+from .models import Member
+from .permissions import IsStaff
+from .signals import suppress_row_handlers
+
+
+BATCH_SIZE = 500
+MAX_BULK_ITEMS = 5000
+
+# Fields whose input may be a list or an object; every other field takes a scalar
+_COMPOUND_FIELDS = (BaseSerializer, DictField, JSONField, ListField, ManyRelatedField)
+
+
+class _PrefetchedQueryset:
+    """Stands in for a related field's queryset, answering ``get(pk=...)`` from memory."""
+
+    def __init__(self, model, objects):
+        self.model = model
+        self.objects = objects
+
+    def get(self, pk):
+        try:
+            return self.objects[self.model._meta.pk.to_python(pk)]
+        except (KeyError, ObjectDoesNotExist):
+            raise self.model.DoesNotExist
+        except Exception:
+            raise ValueError
+
+    def all(self):
+        return self
+
+
+def _check_scalar_fields(serializer, items):
+    """
+    Per-item errors for a list or object where a field takes a single value.
+    The batch lookups below key sets and dicts on the field values, so such
+    items are rejected before they get there.
+    """
+    errors = [{} for _ in items]
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors[i]['non_field_errors'] = [f'Expected an object, got {type(item).__name__}.']
+            continue
+        for name, value in item.items():
+            field = serializer.fields.get(name)
+            if field is None or field.read_only or isinstance(field, _COMPOUND_FIELDS):
+                continue
+            if isinstance(value, (list, dict)):
+                errors[i][name] = [f'Expected a single value, got {type(value).__name__}.']
+    return errors
+
+
+def _prefetch_related_fields(serializer, items):
+    """
+    Swap each PrimaryKeyRelatedField's queryset for the referenced rows,
+    fetched with a single ``in_bulk`` per field.
+    """
+    for name, field in serializer.fields.items():
+        if not isinstance(field, PrimaryKeyRelatedField) or field.read_only:
+            continue
+        pks = {item[name] for item in items if isinstance(item, dict) and item.get(name) is not None}
+        queryset = field.get_queryset()
+        try:
+            objects = queryset.in_bulk(list(pks)) if pks else {}
+        except (TypeError, ValueError):
+            continue
+        field.queryset = _PrefetchedQueryset(queryset.model, objects)
+
+
+def _check_unique_fields(serializer, items, exclude_pks=()):
+    """
+    Replace per-row UniqueValidator queries with one ``__in`` query per unique
+    field; returns per-item error dicts.
+    """
+    errors = [{} for _ in items]
+    model = serializer.Meta.model
+    for name, field in serializer.fields.items():
+        validators = [v for v in field.validators if isinstance(v, UniqueValidator)]
+        if not validators:
+            continue
+        field.validators = [v for v in field.validators if not isinstance(v, UniqueValidator)]
+        values = [item.get(name) for item in items if isinstance(item, dict)]
+        taken = set(
+            model.objects.filter(**{f'{name}__in': [v for v in values if v is not None]})
+            .exclude(pk__in=list(exclude_pks))
+            .values_list(name, flat=True)
+        )
+        seen = set()
+        for i, item in enumerate(items):
+            value = item.get(name) if isinstance(item, dict) else None
+            if value is None:
+                continue
+            if value in taken or value in seen:
+                errors[i][name] = [str(validators[0].message)]
+            seen.add(value)
+    return errors
+
+
+class BulkWriteMixin:
+    """``/bulk/`` create/update/delete; see the module docstring."""
+    bulk_model_name = None  # notification 'model' value, e.g. 'bill'
+
+    def _bulk_items(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({'non_field_errors': ['Expected a list of items.']})
+        if len(items) > MAX_BULK_ITEMS:
+            raise ValidationError({'non_field_errors': [f'At most {MAX_BULK_ITEMS} items per request.']})
+        return items
+
+    def _bulk_validate(self, items, instances=None):
+        """Validate every item; raise one ValidationError listing all failures."""
+        # One serializer validates every item, so the batch lookups are shared
+        child = self.get_serializer(partial=instances is not None)
+        errors = _check_scalar_fields(child, items)
+        checked = [None if errors[i] else item for i, item in enumerate(items)]
+        _prefetch_related_fields(child, checked)
+        exclude_pks = [obj.pk for obj in instances] if instances else ()
+        for i, unique_errors in enumerate(_check_unique_fields(child, checked, exclude_pks)):
+            errors[i].update(unique_errors)
+
+        validated = []
+        for i, item in enumerate(items):
+            if checked[i] is None:
+                validated.append(None)
+                continue
+            child.instance = instances[i] if instances else None
+            child.initial_data = item
+            try:
+                validated.append(child.run_validation(item))
+            except ValidationError as exc:
+                detail = exc.detail if isinstance(exc.detail, dict) else {'non_field_errors': exc.detail}
+                errors[i].update(detail)
+                validated.append(None)
+        if any(errors):
+            raise ValidationError(errors)
+        return validated
+
+    def _bulk_response(self, ids, status_code):
+        queryset = self.get_serializer_class().plan_queryset(
+            self.get_queryset().model.objects.filter(pk__in=ids)
+        ).order_by('pk')
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data, status=status_code)
+
+    def _after_bulk_write(self, action_name, objs):
+        model = self.get_queryset().model
+        owners = {notifications.owner_id(obj) for obj in objs}
+        changes.bump(self.bulk_model_name, owners)
+        if model is Member:
+            # Member.user links may have changed
+            roles.invalidate_all()
+            if action_name != 'created':
+                for dependent in changes.MEMBER_DEPENDENTS:
+                    changes.bump(dependent, owners)
+        if action_name == 'deleted':
+            representations.cache.evict(self.bulk_model_name, [obj.pk for obj in objs])
+        notifications.queue_bulk(
+            self.bulk_model_name, action_name, [obj.pk for obj in objs],
+            owners={obj.pk: notifications.owner_id(obj) for obj in objs},
+        )
+
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk',
+            permission_classes=[IsStaff])
+    def bulk(self, request, *args, **kwargs):
+        if request.method == 'POST':
+            return self.bulk_create(request)
+        if request.method == 'PATCH':
+            return self.bulk_update(request)
+        return self.bulk_destroy(request)
+
+    def bulk_create(self, request):
+        items = self._bulk_items(request)
+        model = self.get_queryset().model
+        validated = self._bulk_validate(items)
+        objs = [model(**attrs) for attrs in validated]
+
+        with transaction.atomic(), suppress_row_handlers():
+            model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+            ids = [obj.pk for obj in objs]
+            summary.record_rows(model, new_rows=[summary.row_of(obj) for obj in objs])
+            self._after_bulk_write('created', objs)
+        return self._bulk_response(ids, status.HTTP_201_CREATED)
+
+    def bulk_update(self, request):
+        items = self._bulk_items(request)
+        model = self.get_queryset().model
+        try:
+            pks = [model._meta.pk.to_python(item['id']) for item in items]
+        except Exception:
+            raise ValidationError({'non_field_errors': ['Every item needs a valid "id".']})
+        if len(set(pks)) != len(pks):
+            raise ValidationError({'non_field_errors': ['Duplicate ids.']})
+
+        with transaction.atomic(), suppress_row_handlers():
+            found = self.get_queryset().select_for_update(of=('self',)).in_bulk(pks)
+            missing = [pk for pk in pks if pk not in found]
+            if missing:
+                raise ValidationError({'non_field_errors': [f'Unknown ids: {missing}']})
+            instances = [found[pk] for pk in pks]
+            old_rows = [summary.row_of(obj) for obj in instances]
+
+            validated = self._bulk_validate(items, instances)
+            fields = set()
+            for obj, attrs in zip(instances, validated):
+                for attr, value in attrs.items():
+                    setattr(obj, attr, value)
+                    fields.add(attr)
+                obj.version += 1
+            if fields:
+                fields.add('version')
+                model.objects.bulk_update(instances, sorted(fields), batch_size=BATCH_SIZE)
+            summary.record_rows(
+                model, old_rows=old_rows, new_rows=[summary.row_of(obj) for obj in instances],
+            )
+            self._after_bulk_write('updated', instances)
+        return self._bulk_response(pks, status.HTTP_200_OK)
+
+    def bulk_destroy(self, request):
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if not isinstance(ids, list):
+            raise ValidationError({'ids': ['Expected a list of ids.']})
+        model = self.get_queryset().model
+        try:
+            ids = [model._meta.pk.to_python(pk) for pk in ids]
+        except Exception:
+            raise ValidationError({'ids': ['Expected a list of ids.']})
+
+        with transaction.atomic(), suppress_row_handlers():
+            rows = list(self.get_queryset().filter(pk__in=ids))
+            queryset = model.objects.filter(pk__in=[row.pk for row in rows])
+            if model is Member:
+                # Cascades into payments, bills and repairs
+                queryset.delete()
+                summary.rebuild()
+            else:
+                queryset.delete()
+                summary.record_rows(model, old_rows=[summary.row_of(row) for row in rows])
+            self._after_bulk_write('deleted', rows)
+        return Response(status=status.HTTP_204_NO_CONTENT)
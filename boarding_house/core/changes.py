@@ -0,0 +1,196 @@
+"""
+Change counters and conditional GET for the core API.
+
+``ChangeCounter`` keeps one row per model (``payment``) and one per member
+for member-scoped lists (``payment:12``). The signal handlers in
+``core/signals.py`` (and the bulk writes in ``core/bulk.py``) ``bump`` them in
+the same transaction as the write. A change to a member's name, email or
+room also bumps the models that embed those fields (``member_name`` etc.),
+and deleting a member bumps those whose link to it is set to null.
+
+``ConditionalGetMixin`` derives a weak ETag and ``Last-Modified`` for
+``list`` / ``retrieve`` from the counters the requester can see, plus the
+request path, query string and role. A matching ``If-None-Match`` (or an
+``If-Modified-Since`` no older than the last change) is answered with
+``304 Not Modified`` after a single counter lookup, without querying the
+main tables or running serializers. Responses are ``Cache-Control:
+private, no-cache``, so browsers revalidate with the ETag on their own.
+"""
+import functools
+import hashlib
+
+from django.apps import apps
+from django.db.models import F, SET_NULL
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import notifications, roles, versioning
+from .models import ChangeCounter, Member
+
+
+# Models whose representation embeds member fields, and those fields
+MEMBER_DEPENDENTS = ('schedule', 'payment', 'bill', 'repair')
+EMBEDDED_MEMBER_FIELDS = {'name', 'email', 'room_number'}
+
+
+def scope_key(model, member_id=None):
+    return model if member_id is None else f'{model}:{member_id}'
+
+
+def bump(model, member_ids=()):
+    """Advance the ``model`` counter and those of ``member_ids``' views of it."""
+    keys = [scope_key(model)] + sorted({scope_key(model, m) for m in member_ids if m is not None})
+    now = timezone.now()
+    counters = ChangeCounter.objects.filter(scope__in=keys)
+    if counters.update(version=F('version') + 1, changed_at=now) == len(keys):
+        return
+    existing = set(counters.values_list('scope', flat=True))
+    ChangeCounter.objects.bulk_create(
+        [ChangeCounter(scope=key, version=1, changed_at=now) for key in keys if key not in existing],
+        ignore_conflicts=True,
+    )
+
+
+def _owner_ids(instance):
+    """The row's member, and its previous member if the row was re-assigned."""
+    owners = {notifications.owner_id(instance)}
+    previous = getattr(instance, '_previous_row', None)
+    if previous:
+        owners.add(previous.get('member_id', previous.get('assigned_to_id')))
+    return owners
+
+
+def record_save(model, instance, created):
+    """post_save: bump the counters a save of ``instance`` affects."""
+    changed = None if created else versioning.changed_fields(instance)
+    if changed is not None and not changed:
+        return
+    bump(model, _owner_ids(instance))
+    if model == 'member' and not created and (changed is None or changed & EMBEDDED_MEMBER_FIELDS):
+        for dependent in MEMBER_DEPENDENTS:
+            bump(dependent, [instance.pk])
+
+
+@functools.cache
+def _nulled_on_member_delete():
+    """
+    ``MEMBER_DEPENDENTS`` whose member foreign key is ``SET_NULL``: Django
+    clears it with one UPDATE that sends no row signals.
+    """
+    nulled = []
+    for dependent in MEMBER_DEPENDENTS:
+        for field in apps.get_model('core', dependent)._meta.concrete_fields:
+            if field.is_relation and field.related_model is Member and field.remote_field.on_delete is SET_NULL:
+                nulled.append(dependent)
+                break
+    return tuple(nulled)
+
+
+def record_delete(model, instance):
+    bump(model, [notifications.owner_id(instance)])
+    if model == 'member':
+        # Cascaded rows send their own post_delete; nulled ones do not
+        for dependent in _nulled_on_member_delete():
+            bump(dependent, [instance.pk])
+
+
+def record_unlinked(member_ids):
+    """Deleting a User clears ``Member.user`` (SET_NULL) without row signals."""
+    bump('member', member_ids)
+
+
+def _counter_rows(keys):
+    return ChangeCounter.objects.filter(scope__in=keys).values_list('scope', 'version', 'changed_at')
+
+
+def counters(keys):
+    """{scope: (version, changed_at)} for ``keys``; missing counters are (0, None)."""
+    found = {scope: (version, changed_at) for scope, version, changed_at in _counter_rows(keys)}
+    return {key: found.get(key, (0, None)) for key in keys}
+
+
+async def acounters(keys):
+    found = {scope: (version, changed_at) async for scope, version, changed_at in _counter_rows(keys)}
+    return {key: found.get(key, (0, None)) for key in keys}
+
+
+def _scope_keys(request, models):
+    """Counters behind a request: per member for members, per model otherwise."""
+    if roles.is_member(request):
+        return [scope_key(model, roles.get_member_id(request)) for model in models]
+    return [scope_key(model) for model in models]
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        # Weak comparison, as for GET in RFC 9110
+        tags = [tag.removeprefix('W/') for tag in parse_etags(if_none_match)]
+        return '*' in tags or etag.removeprefix('W/') in tags
+    since = parse_http_date_safe(request.headers.get('If-Modified-Since') or '')
+    return since is not None and last_modified is not None and last_modified <= since
+
+
+def _validators(request, keys, versions, variant):
+    info = roles.get_role_info(request)
+    raw = '|'.join(
+        [request.get_full_path(), info.role, str(info.member_id), variant]
+        + [f'{key}={versions[key][0]}' for key in keys]
+    )
+    etag = 'W/"%s"' % hashlib.sha1(raw.encode()).hexdigest()[:24]
+    changed = [changed_at for _, changed_at in versions.values() if changed_at is not None]
+    last_modified = int(max(changed).timestamp()) if changed else None
+    return etag, last_modified
+
+
+def _add_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def conditional_get(request, models, handler, *args, variant='', **kwargs):
+    """
+    Answer with 304 if the requester's copy is current, else call
+    ``handler(request, *args, **kwargs)``; adds the validators to a 200.
+
+    ``models`` are the counters the response depends on; ``variant`` is
+    anything else it depends on (e.g. the current date).
+    """
+    keys = _scope_keys(request, models)
+    etag, last_modified = _validators(request, keys, counters(keys), variant)
+    if _not_modified(request, etag, last_modified):
+        return _add_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+    response = handler(request, *args, **kwargs)
+    if response.status_code != status.HTTP_200_OK:
+        return response
+    return _add_validators(response, etag, last_modified)
+
+
+async def aconditional_get(request, models, handler, *args, variant='', **kwargs):
+    """``conditional_get`` for async views; ``handler`` is a coroutine function."""
+    keys = _scope_keys(request, models)
+    etag, last_modified = _validators(request, keys, await acounters(keys), variant)
+    if _not_modified(request, etag, last_modified):
+        return _add_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+    response = await handler(request, *args, **kwargs)
+    if response.status_code != status.HTTP_200_OK:
+        return response
+    return _add_validators(response, etag, last_modified)
+
+
+class ConditionalGetMixin:
+    """ETag / Last-Modified / 304 for ``list`` and ``retrieve``; see the module docstring."""
+    change_scope = None  # counter name, e.g. 'payment'
+
+    def list(self, request, *args, **kwargs):
+        return conditional_get(request, [self.change_scope], super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional_get(request, [self.change_scope], super().retrieve, *args, **kwargs)
@@ -0,0 +1,383 @@
+"""
+Cross-process channel layer for a single host, with no external broker.
+
+``InMemoryChannelLayer`` only reaches sockets in the same process, so a
+second ASGI worker silently misses broadcasts. ``UnixSocketChannelLayer``
+connects the worker processes of one host directly over Unix-domain sockets:
+
+* every process that hosts consumers listens on ``<path>/<node>.sock``
+  (``path`` is a private 0700 directory shared by the workers; by default
+  under ``$XDG_RUNTIME_DIR``, else the temp directory). The layer refuses a
+  directory that is a symlink, belongs to another user or is not 0700, so
+  another local user cannot pre-create it and read or inject messages;
+* channel names embed the owning node (``specific.<node>!<random>``), so
+  ``send`` goes straight to the one process that can receive it;
+* group membership is kept by the process that owns the channel, and
+  ``group_send`` sends one frame to each live node, which fans it out to its
+  local members. Fan-out cost is O(workers), not O(clients);
+* messages carry an expiry and are dropped once stale, each channel queue is
+  bounded by ``capacity`` / ``channel_capacity`` (``ChannelFull`` on direct
+  sends, silent drop for groups, as in the other layers) and group
+  memberships lapse after ``group_expiry``.
+
+Processes that only send (management commands, the sync request threads)
+never open a listening socket. Socket files of dead workers are removed the
+first time a connection to them is refused.
+
+Settings::
+
+    CHANNEL_LAYERS = {'default': {
+        'BACKEND': 'core.channel_layer.UnixSocketChannelLayer',
+        'CONFIG': {'path': '/run/boarding-house/channels'},
+    }}
+
+Benchmark: ``python benchmarks/channel_layer.py``.
+"""
+import asyncio
+import atexit
+import base64
+import glob
+import json
+import os
+import random
+import socket
+import stat
+import string
+import struct
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+from django.core.exceptions import ImproperlyConfigured
+
+
+_HEADER = struct.Struct('>I')
+MAX_FRAME = 16 * 1024 * 1024
+
+
+def _default(value):
+    if isinstance(value, bytes):
+        return {'__bytes__': base64.b64encode(value).decode()}
+    raise TypeError(f'{type(value).__name__} is not serializable by the channel layer')
+
+
+def _object_hook(value):
+    if len(value) == 1 and '__bytes__' in value:
+        return base64.b64decode(value['__bytes__'])
+    return value
+
+
+def encode_frame(frame):
+    body = json.dumps(frame, default=_default, separators=(',', ':')).encode()
+    return _HEADER.pack(len(body)) + body
+
+
+async def read_frame(reader):
+    (length,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    if length > MAX_FRAME:
+        raise ValueError('channel layer frame too large')
+    return json.loads(await reader.readexactly(length), object_hook=_object_hook)
+
+
+def default_path():
+    base = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.path.join(base, f'boarding-house-channels-{os.getuid()}')
+
+
+def check_private_directory(path):
+    """Raise ``ImproperlyConfigured`` unless ``path`` is a 0700 directory of this user."""
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode):
+        problem = 'is not a directory (or is a symlink)'
+    elif info.st_uid != os.getuid():
+        problem = f'is owned by uid {info.st_uid}, not {os.getuid()}'
+    elif stat.S_IMODE(info.st_mode) != 0o700:
+        problem = f'has mode {stat.S_IMODE(info.st_mode):#o}, not 0o700'
+    else:
+        return
+    raise ImproperlyConfigured(f'Channel layer directory {path} {problem}')
+
+
+class UnixSocketChannelLayer(BaseChannelLayer):
+    extensions = ['groups', 'flush']
+
+    def __init__(self, path=None, expiry=60, group_expiry=86400, capacity=100,
+                 channel_capacity=None, connect_timeout=1.0, **kwargs):
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity, **kwargs)
+        self.path = path or default_path()
+        self._path_checked = False
+        self.group_expiry = group_expiry
+        self.connect_timeout = connect_timeout
+        self.node = uuid.uuid4().hex[:12]
+        # Local state; only touched from the listening (server) loop
+        self.channels = {}
+        self.groups = {}
+        self._server = None
+        self._server_loop = None
+        self._start_lock = threading.Lock()
+        # Outgoing connections, per event loop (async_to_sync creates loops)
+        self._peers = weakref.WeakKeyDictionary()
+
+    # Addressing
+
+    @property
+    def socket_path(self):
+        return os.path.join(self.path, f'{self.node}.sock')
+
+    @staticmethod
+    def node_of(channel):
+        if '!' not in channel:
+            return None
+        return channel.split('!', 1)[0].rsplit('.', 1)[-1]
+
+    def _private_path(self, create=False):
+        """``self.path`` once checked (created if ``create``), or ``None`` if it does not exist."""
+        if not self._path_checked:
+            if create:
+                os.makedirs(self.path, mode=0o700, exist_ok=True)
+            elif not os.path.lexists(self.path):
+                return None
+            check_private_directory(self.path)
+            self._path_checked = True
+        return self.path
+
+    def live_nodes(self):
+        if self._private_path() is None:
+            return []
+        return [
+            os.path.basename(path)[:-len('.sock')]
+            for path in glob.glob(os.path.join(self.path, '*.sock'))
+        ]
+
+    # Listening side
+
+    async def _ensure_server(self):
+        if self._server_loop is not None and self._server_loop.is_closed():
+            # Started from a short-lived loop (async_to_sync); start over
+            self._reset_server()
+        if self._server_loop is not None:
+            return
+        loop = asyncio.get_running_loop()
+        with self._start_lock:
+            if self._server_loop is not None:
+                return
+            self._private_path(create=True)
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.bind(self.socket_path)
+            # Listen before publishing, so peers never see a refused socket
+            sock.listen(128)
+            self._server_loop = loop
+        self._server = await asyncio.start_unix_server(self._serve_peer, sock=sock)
+        atexit.register(self._unlink_socket)
+
+    def _reset_server(self):
+        self._unlink_socket()
+        self._server = None
+        self._server_loop = None
+        self.channels = {}
+        self.groups = {}
+
+    def _unlink_socket(self):
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+
+    async def _serve_peer(self, reader, writer):
+        try:
+            while True:
+                frame = await read_frame(reader)
+                if frame['op'] == 'send':
+                    self._deliver(frame['channel'], frame['expires'], frame['message'])
+                elif frame['op'] == 'group':
+                    self._deliver_group(frame['group'], frame['expires'], frame['message'])
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # Listening loop shutting down
+            pass
+        finally:
+            writer.close()
+
+    def _queue(self, channel):
+        queue = self.channels.get(channel)
+        if queue is None:
+            queue = self.channels[channel] = asyncio.Queue(maxsize=self.get_capacity(channel))
+        return queue
+
+    def _deliver(self, channel, expires, message):
+        """Put a message on a local channel; False if it is full or stale."""
+        if expires < time.time():
+            return False
+        try:
+            self._queue(channel).put_nowait((expires, message))
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def _deliver_group(self, group, expires, message):
+        self._clean_expired()
+        for channel in list(self.groups.get(group, ())):
+            self._deliver(channel, expires, message)
+
+    def _call_in_server_loop(self, func, *args):
+        """Run ``func`` on the loop owning the local queues, from any thread."""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._server_loop:
+            return func(*args)
+        try:
+            self._server_loop.call_soon_threadsafe(func, *args)
+        except RuntimeError:
+            # Listening loop has been closed
+            return False
+        return True
+
+    # Sending side
+
+    async def _send_frame(self, node, frame):
+        data = encode_frame(frame)
+        loop = asyncio.get_running_loop()
+        connections = self._peers.setdefault(loop, {})
+        for attempt in range(2):
+            writer = connections.get(node)
+            if writer is None or writer.is_closing():
+                if self._private_path() is None:
+                    return False
+                try:
+                    _, writer = await asyncio.wait_for(
+                        asyncio.open_unix_connection(os.path.join(self.path, f'{node}.sock')),
+                        self.connect_timeout,
+                    )
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Worker is gone; forget its socket
+                    try:
+                        os.unlink(os.path.join(self.path, f'{node}.sock'))
+                    except OSError:
+                        pass
+                    return False
+                except (OSError, asyncio.TimeoutError):
+                    return False
+                connections[node] = writer
+            try:
+                writer.write(data)
+                await writer.drain()
+                return True
+            except (ConnectionError, OSError):
+                connections.pop(node, None)
+                writer.close()
+        return False
+
+    # Channel layer API
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), 'message is not a dict'
+        self.require_valid_channel_name(channel)
+        assert '__asgi_channel__' not in message
+
+        expires = time.time() + self.expiry
+        node = self.node_of(channel)
+        if node is None or node == self.node:
+            await self._ensure_server()
+            queue = self._queue(channel)
+            if queue.full():
+                raise ChannelFull(channel)
+            self._call_in_server_loop(self._deliver, channel, expires, message)
+            return
+        await self._send_frame(node, {
+            'op': 'send', 'channel': channel, 'expires': expires, 'message': message,
+        })
+
+    async def receive(self, channel):
+        self.require_valid_channel_name(channel)
+        await self._ensure_server()
+        queue = self._queue(channel)
+        while True:
+            expires, message = await queue.get()
+            if expires >= time.time():
+                break
+            # A stale message means the receiver fell behind; drop it
+            self._remove_from_groups(channel)
+        if queue.empty() and self.channels.get(channel) is queue:
+            self.channels.pop(channel, None)
+        return message
+
+    async def new_channel(self, prefix='specific.'):
+        await self._ensure_server()
+        suffix = ''.join(random.choice(string.ascii_letters) for _ in range(12))
+        return f'{prefix}.{self.node}!{suffix}'
+
+    async def flush(self):
+        self.channels = {}
+        self.groups = {}
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+        if self._server_loop is not None:
+            self._reset_server()
+        for connections in list(self._peers.values()):
+            for writer in connections.values():
+                writer.close()
+        self._peers = weakref.WeakKeyDictionary()
+
+    # Groups extension
+
+    async def group_add(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        node = self.node_of(channel)
+        assert node in (None, self.node), 'group_add is only supported for local channels'
+        await self._ensure_server()
+        self._call_in_server_loop(self._add_to_group, group, channel)
+
+    def _add_to_group(self, group, channel):
+        self.groups.setdefault(group, {})[channel] = time.time()
+
+    async def group_discard(self, group, channel):
+        self.require_valid_channel_name(channel)
+        self.require_valid_group_name(group)
+        if self._server_loop is not None:
+            self._call_in_server_loop(self._discard_from_group, group, channel)
+
+    def _discard_from_group(self, group, channel):
+        members = self.groups.get(group)
+        if members:
+            members.pop(channel, None)
+            if not members:
+                self.groups.pop(group, None)
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), 'Message is not a dict'
+        self.require_valid_group_name(group)
+        expires = time.time() + self.expiry
+        frame = {'op': 'group', 'group': group, 'expires': expires, 'message': message}
+        sends = []
+        for node in self.live_nodes():
+            if node == self.node:
+                self._call_in_server_loop(self._deliver_group, group, expires, message)
+            else:
+                sends.append(self._send_frame(node, frame))
+        if sends:
+            await asyncio.gather(*sends)
+
+    # Expiry
+
+    def _remove_from_groups(self, channel):
+        for members in self.groups.values():
+            members.pop(channel, None)
+
+    def _clean_expired(self):
+        cutoff = time.time() - self.group_expiry
+        for group, members in list(self.groups.items()):
+            for channel, joined in list(members.items()):
+                if joined < cutoff:
+                    members.pop(channel, None)
+            if not members:
+                self.groups.pop(group, None)
@@ -0,0 +1,104 @@
+"""
+Per-transaction buffers flushed by a single ``on_commit`` hook.
+
+Signal handlers run for every saved row, so a bulk write or an import that
+registered an ``on_commit`` hook per row would queue thousands of them.
+Instead a handler adds its work to the ``CommitBuffer`` of the current
+transaction (kept on the connection), and the buffer registers its ``flush``
+once, when it is created.
+
+Work that must not outlive a savepoint rolled back inside the transaction
+goes into the buffer's ``segment()`` for the current savepoint. Each segment
+registers one ``on_commit`` hook of its own, which Django discards with the
+savepoint's other hooks; ``flush`` runs after all of them and skips the
+segments whose hook never ran.
+
+The flush hook is appended under the savepoints all of the segments share,
+so it is dropped only when none of them can commit. Django replaces the
+connection's ``run_on_commit`` list on every commit and rollback, so while
+that list is the one the hook was appended to the buffer is still current;
+only after a rollback is the new list scanned for the hook.
+"""
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+
+class Segment:
+    """Work done inside one savepoint; ``live`` once the transaction committed it."""
+    __slots__ = ('live',)
+
+    def __init__(self):
+        self.live = False
+
+    def confirm(self):
+        self.live = True
+
+
+class CommitBuffer:
+    """Work collected during one transaction; ``flush`` runs once it commits."""
+    attr = None  # connection attribute holding the current buffer
+
+    def __init__(self, using):
+        self.using = using
+        self.hooks = None
+        self._hook = None
+        self._segments = {}
+        self._scope = tuple(transaction.get_connection(using).savepoint_ids)
+
+    @classmethod
+    def current(cls, using=DEFAULT_DB_ALIAS):
+        """The buffer of the transaction open on ``using`` (call inside ``atomic``)."""
+        connection = transaction.get_connection(using)
+        buffer = getattr(connection, cls.attr, None)
+        if buffer is None or not buffer._pending(connection):
+            buffer = cls(using)
+            setattr(connection, cls.attr, buffer)
+            buffer._append_hook(connection)
+        return buffer
+
+    def segment(self):
+        """The ``Segment`` of the savepoint the connection is in now."""
+        connection = transaction.get_connection(self.using)
+        key = tuple(connection.savepoint_ids)
+        segment = self._segments.get(key)
+        if segment is None:
+            segment = self._segments[key] = Segment()
+            hooks = connection.run_on_commit
+            if hooks and hooks[-1][1] is self._hook:
+                # Nothing registered since: move the flush after the segment
+                hooks.pop()
+            transaction.on_commit(segment.confirm, using=self.using)
+            shared = 0
+            while shared < min(len(key), len(self._scope)) and key[shared] == self._scope[shared]:
+                shared += 1
+            self._scope = self._scope[:shared]
+            # Flush after this segment's hook as well
+            self._append_hook(connection)
+        return segment
+
+    def _append_hook(self, connection):
+        def hook():
+            if hook is self._hook:
+                self._commit()
+        self._hook = hook
+        # As on_commit() would register it from the innermost savepoint the
+        # segments share, not the current one; earlier flush hooks become no-ops
+        connection.run_on_commit.append((set(self._scope), hook, False))
+        self.hooks = connection.run_on_commit
+
+    def _pending(self, connection):
+        if connection.run_on_commit is self.hooks:
+            return True
+        if any(hook[1] is self._hook for hook in connection.run_on_commit):
+            # A savepoint rolled back; the transaction is still open
+            self.hooks = connection.run_on_commit
+            return True
+        return False
+
+    def _commit(self):
+        connection = transaction.get_connection(self.using)
+        if getattr(connection, self.attr, None) is self:
+            setattr(connection, self.attr, None)
+        self.flush()
+
+    def flush(self):
+        raise NotImplementedError
@@ -1,20 +1,225 @@
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+
+from . import governance, roles
+from .models import Member, Schedule, Payment, Bill, Repair
+from .notifications import GROUP, STAFF_ONLY_TOPICS, TOPICS, member_group, topic_group
+from .serializers import (
+    MemberSerializer, ScheduleSerializer, PaymentSerializer,
+    BillSerializer, RepairSerializer,
+)
+
+
+# model name -> (model, serializer, field holding the owning member's id)
+FETCHABLE = {
+    'member': (Member, MemberSerializer, 'pk'),
+    'schedule': (Schedule, ScheduleSerializer, 'assigned_to_id'),
+    'payment': (Payment, PaymentSerializer, 'member_id'),
+    'bill': (Bill, BillSerializer, 'member_id'),
+    'repair': (Repair, RepairSerializer, 'member_id'),
+}
 
 
 class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Real-time change feed.
+
+    The socket is authenticated with the JWT access token (see core/auth.py).
+    Staff join the per-model topic groups they ask for, via
+    ``?topics=payment,bill`` or a ``{"action": "subscribe", "topics": [...]}``
+    message (all topics by default; an unknown topic in ``?topics=`` refuses
+    the socket with close code 4400). Members only ever join their own
+    ``member.<id>`` group, so they receive changes to their own rows only.
+
+    Updates arrive as ``patched`` events relative to a row version (see
+    ``core/versioning.py``); a client that missed one sends
+    ``{"action": "fetch", "model": "bill", "id": 7}`` and gets the full row
+    back as an ``updated`` event (or ``missing`` if it is gone or not theirs;
+    members cannot fetch schedules, which are staff-only over REST too).
+
+    Rate limits, frame size caps, heartbeats (answer ``{"type": "ping"}``
+    with ``{"action": "pong"}``) and the connection cap: core/governance.py.
+    """
+    counted = False
+    heartbeat = None
+
     async def connect(self):
-        await self.channel_layer.group_add('notifications', self.channel_name)
+        user = self.scope.get('user')
+        if not user or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        self.role_info = await self._resolve_role(user)
+        self.joined_groups = set()
+        if not self.is_staff and self.role_info.member_id is None:
+            # Member role without a linked Member row: nothing to receive
+            await self.close(code=4403)
+            return
+        topics = self._requested_topics() if self.is_staff else None
+        if topics is not None and not set(topics) <= set(TOPICS):
+            # Accepted, it would silently receive nothing it asked for
+            await self.close(code=4400)
+            return
+        if not governance.stats.try_open(governance.setting('WS_MAX_CONNECTIONS')):
+            # Try again later
+            await self.close(code=1013)
+            return
+        self.counted = True
+        self.bucket = governance.TokenBucket(
+            governance.setting('WS_RATE_LIMIT'), governance.setting('WS_RATE_BURST'),
+        )
         await self.accept()
+        self.last_seen = asyncio.get_running_loop().time()
+        interval = governance.setting('WS_HEARTBEAT_INTERVAL')
+        if interval:
+            self.heartbeat = asyncio.create_task(
+                self._heartbeat(interval, governance.setting('WS_IDLE_TIMEOUT')),
+            )
+
+        if self.is_staff:
+            await self._join(GROUP)
+            await self.subscribe(topics or TOPICS)
+        else:
+            await self._join(member_group(self.role_info.member_id))
 
     async def disconnect(self, code):
-        await self.channel_layer.group_discard('notifications', self.channel_name)
+        if self.heartbeat is not None:
+            self.heartbeat.cancel()
+            self.heartbeat = None
+        if self.counted:
+            governance.stats.closed()
+            self.counted = False
+        for group in getattr(self, 'joined_groups', ()):
+            await self.channel_layer.group_discard(group, self.channel_name)
+        self.joined_groups = set()
+
+    async def receive(self, text_data=None, bytes_data=None, **kwargs):
+        frame = text_data if text_data is not None else bytes_data or b''
+        limit = governance.setting('WS_MAX_FRAME_BYTES')
+        size = len(frame)
+        if isinstance(frame, str) and size <= limit:
+            # Characters undercount UTF-8 bytes
+            size = len(frame.encode())
+        if size > limit:
+            governance.stats.incr('oversized')
+            await self.close(code=governance.CLOSE_TOO_BIG)
+            return
+        self.last_seen = asyncio.get_running_loop().time()
+        if not self.bucket.take():
+            governance.stats.incr('rate_limited')
+            return
+        if text_data is None:
+            # Binary frames carry nothing this feed understands
+            return
+        try:
+            content = await self.decode_json(text_data)
+        except json.JSONDecodeError:
+            return
+        await self.receive_json(content, **kwargs)
 
     async def receive_json(self, content, **kwargs):
-        # Echo or broadcast messages; in real use this would be triggered by signals
-        await self.channel_layer.group_send('notifications', {
+        action = content.get('action') if isinstance(content, dict) else None
+        if action == 'pong':
+            return
+        if action == 'fetch':
+            await self.fetch(content.get('model'), content.get('id'))
+            return
+        if not self.is_staff:
+            return
+
+        if action == 'subscribe':
+            await self.subscribe(content.get('topics') or [])
+            return
+        if action == 'unsubscribe':
+            await self.unsubscribe(content.get('topics') or [])
+            return
+
+        if not governance.setting('WS_CLIENT_BROADCASTS'):
+            governance.stats.incr('broadcasts_blocked')
+            return
+        # Echo or broadcast messages to the other staff sockets
+        await self.channel_layer.group_send(GROUP, {
             'type': 'broadcast.message',
             'message': content,
         })
 
     async def broadcast_message(self, event):
         await self.send_json(event.get('message'))
+
+    async def broadcast_batch(self, event):
+        # One committed transaction's coalesced events (core/notifications.py)
+        await self.send_json({'batch': event.get('messages', [])})
+
+    @property
+    def is_staff(self):
+        info = getattr(self, 'role_info', None)
+        return info is not None and info.role in ('admin', 'staff')
+
+    async def subscribe(self, topics):
+        for topic in topics:
+            if topic in TOPICS:
+                await self._join(topic_group(topic))
+        await self.send_json({'subscribed': sorted(self._topics())})
+
+    async def unsubscribe(self, topics):
+        for topic in topics:
+            group = topic_group(topic)
+            if group in self.joined_groups:
+                await self.channel_layer.group_discard(group, self.channel_name)
+                self.joined_groups.discard(group)
+        await self.send_json({'subscribed': sorted(self._topics())})
+
+    async def fetch(self, model, pk):
+        if model not in FETCHABLE or (model in STAFF_ONLY_TOPICS and not self.is_staff):
+            return
+        data = await database_sync_to_async(self._load_row)(model, pk)
+        if data is None:
+            await self.send_json({'model': model, 'action': 'missing', 'data': {'id': pk}})
+        else:
+            await self.send_json({'model': model, 'action': 'updated', 'data': data})
+
+    def _load_row(self, model, pk):
+        model_class, serializer_class, owner_field = FETCHABLE[model]
+        queryset = model_class.objects.filter(pk=pk)
+        if not self.is_staff:
+            queryset = queryset.filter(**{owner_field: self.role_info.member_id})
+        try:
+            instance = serializer_class.plan_queryset(queryset).first()
+        except (TypeError, ValueError):
+            return None
+        return serializer_class(instance).data if instance is not None else None
+
+    async def _heartbeat(self, interval, idle_timeout):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            if loop.time() - self.last_seen > idle_timeout:
+                governance.stats.incr('evicted_idle')
+                await self.close(code=governance.CLOSE_IDLE)
+                return
+            await self.send_json({'type': 'ping'})
+
+    async def _join(self, group):
+        if group not in self.joined_groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+            self.joined_groups.add(group)
+
+    def _topics(self):
+        return {topic for topic in TOPICS if topic_group(topic) in self.joined_groups}
+
+    def _requested_topics(self):
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        topics = ','.join(query.get('topics', []))
+        return [topic for topic in topics.split(',') if topic] or None
+
+    async def _resolve_role(self, user):
+        if getattr(settings, 'ROLE_CLAIMS_FROM_TOKEN', False):
+            info = roles.role_info_from_token(user, self.scope.get('jwt'))
+            if info is not None:
+                return info
+        return await database_sync_to_async(roles.get_user_role_info)(user)
@@ -0,0 +1,166 @@
+"""
+Read-only fast path for large list responses.
+
+A ``ModelSerializer`` list builds a model instance per row, a serializer
+field lookup (``get_attribute``) per field and goes through DRF's generic
+``to_representation`` loop. For the read-only list endpoints that cost
+dominates a big page. ``ValuesRepresentation`` compiles a serializer class
+once into a plan of ``.values()`` lookups (``member__name`` for
+``source='member.name'``, ``member_id`` for the ``member`` key) and a
+converter per field, and builds each response dict straight from the
+``.values()`` row in the serializer's field order.
+
+The result is identical to ``serializer_class(rows, many=True).data``:
+
+* fields whose representation is the database value itself (char, choice,
+  integer, boolean and primary key fields) are copied as is;
+* decimals and ISO dates are formatted as their DRF fields do, with the
+  quantum and format resolved once; every other field type goes through
+  the field's own ``to_representation``;
+* ``None`` stays ``None``, and a dotted source through a null relation is
+  left out of the row, as DRF does.
+
+Viewsets opt in with ``FastListMixin`` (``FAST_LIST_SERIALIZATION``; on by
+default). Serializers with fields the plan cannot express (method fields,
+``source='*'``) raise ``ImproperlyConfigured`` when first used.
+Benchmark: ``python benchmarks/serialization.py``.
+"""
+import decimal
+import functools
+import operator
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import ISO_8601, fields as drf_fields
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+# Representation == database value
+_AS_IS = (
+    drf_fields.CharField, drf_fields.IntegerField, drf_fields.BooleanField,
+    drf_fields.ReadOnlyField,
+)
+_isoformat = operator.methodcaller('isoformat')
+
+
+def _converter(field):
+    """``None`` when the database value is the representation, else a callable."""
+    if isinstance(field, PrimaryKeyRelatedField) and field.pk_field is None:
+        return None
+    if isinstance(field, drf_fields.ChoiceField):
+        if all(isinstance(key, str) for key in field.choices):
+            return None
+        return field.to_representation
+    if isinstance(field, _AS_IS):
+        return None
+    if type(field) is drf_fields.DecimalField:
+        return _decimal_converter(field)
+    if type(field) is drf_fields.DateField:
+        output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+        if output_format is not None and output_format.lower() == ISO_8601:
+            return _isoformat
+    return field.to_representation
+
+
+def _decimal_converter(field):
+    """``DecimalField.to_representation`` with the quantum and context built once."""
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if (not coerce_to_string or field.localize or field.decimal_places is None
+            or getattr(field, 'normalize_output', False)):
+        return field.to_representation
+    quantum = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            return field.to_representation(value)
+        return '{:f}'.format(value.quantize(quantum, rounding=field.rounding, context=context))
+    return convert
+
+
+class ValuesRepresentation:
+    """``serializer_class`` representations built from ``.values()`` rows."""
+
+    def __init__(self, serializer_class):
+        model = serializer_class.Meta.model
+        opts = model._meta
+        # Cursor pagination reads the ordering columns from the rows
+        lookups = {field.attname: None for field in opts.concrete_fields}
+        self.fields = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            source = field.source
+            if source == '*' or isinstance(field, drf_fields.SerializerMethodField):
+                raise ImproperlyConfigured(
+                    f'{serializer_class.__name__}.{name} cannot be built from .values() rows',
+                )
+            guard = None
+            if '.' in source:
+                relation, _, _ = source.partition('.')
+                key = source.replace('.', '__')
+                guard = opts.get_field(relation).attname
+            else:
+                key = opts.get_field(source).attname
+            lookups[key] = None
+            self.fields.append((name, key, _converter(field), guard))
+        self.lookups = list(lookups)
+
+    def values(self, queryset):
+        """``queryset`` as ``.values()`` rows carrying every field of the plan."""
+        return queryset.values(*self.lookups)
+
+    def represent(self, row):
+        data = {}
+        for name, key, convert, guard in self.fields:
+            if guard is not None and row[guard] is None:
+                # DRF skips a dotted source through a null relation
+                continue
+            value = row[key]
+            data[name] = value if convert is None or value is None else convert(value)
+        return data
+
+    def data(self, rows):
+        return [self.represent(row) for row in rows]
+
+
+@functools.cache
+def representation_for(serializer_class):
+    return ValuesRepresentation(serializer_class)
+
+
+def enabled():
+    return getattr(settings, 'FAST_LIST_SERIALIZATION', True)
+
+
+class FastListMixin:
+    """
+    ``list`` (and the async ``_alist``) from ``.values()`` rows; place it
+    after ``ConditionalGetMixin`` and before ``AsyncReadMixin``.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not enabled():
+            return super().list(request, *args, **kwargs)
+        representation = representation_for(self.get_serializer_class())
+        rows = representation.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(representation.data(page))
+        return Response(representation.data(rows))
+
+    async def _alist(self, request, *args, **kwargs):
+        if not enabled():
+            return await super()._alist(request, *args, **kwargs)
+        representation = representation_for(self.get_serializer_class())
+        rows = representation.values(self.filter_queryset(self.get_queryset()))
+        paginator = self.paginator
+        if paginator is not None:
+            page = await paginator.apaginate_queryset(rows, request, view=self)
+            if page is not None:
+                return self.get_paginated_response(representation.data(page))
+        return Response(representation.data([row async for row in rows]))
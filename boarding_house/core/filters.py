@@ -0,0 +1,64 @@
+"""
+Query-parameter filtering and ordering for the core list endpoints.
+
+Viewsets declare what may be filtered, searched and ordered on::
+
+    filter_fields = {'status': 'status', 'from': 'payment_date__gte'}
+    filter_parsers = {'month': normalize_month}  # instead of the field's to_python
+    search_fields = ['name', 'email']        # rest_framework SearchFilter
+    ordering_fields = ['payment_date']       # ?ordering=-payment_date
+
+so ``/api/payments/?status=Unpaid&from=2025-01-01&ordering=-payment_date``
+is answered by the database, from the indexes declared on the models. The
+filters apply to the queryset returned by ``get_queryset``, so member
+scoping is kept. ``KeysetOrderingFilter`` appends ``id`` to the requested
+ordering, which ``KeysetPagination`` then pages through.
+"""
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+
+def _model_field(model, lookup):
+    return model._meta.get_field(lookup.split('__')[0])
+
+
+class FieldFilterBackend(BaseFilterBackend):
+    """
+    Filters declared as ``filter_fields = {query param: ORM lookup}`` on the
+    view; ``filter_parsers`` maps a param to the function that turns its raw
+    value into the stored form (a Django ``ValidationError`` is a 400).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        filter_fields = getattr(view, 'filter_fields', None) or {}
+        parsers = getattr(view, 'filter_parsers', None) or {}
+        filters, errors = {}, {}
+        for param, lookup in filter_fields.items():
+            raw = request.query_params.get(param)
+            if raw in (None, ''):
+                continue
+            field = _model_field(queryset.model, lookup)
+            try:
+                value = parsers.get(param, field.to_python)(raw)
+            except DjangoValidationError as exc:
+                errors[param] = exc.messages
+                continue
+            choices = [choice for choice, _ in field.flatchoices] if field.choices else None
+            if choices is not None and value not in choices:
+                errors[param] = [f'Must be one of: {", ".join(map(str, choices))}.']
+                continue
+            filters[lookup] = value
+        if errors:
+            raise ValidationError(errors)
+        return queryset.filter(**filters) if filters else queryset
+
+
+class KeysetOrderingFilter(OrderingFilter):
+    """``?ordering=`` over ``ordering_fields``, made unique with a trailing ``id``."""
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering and ordering[-1].lstrip('-') not in ('id', 'pk'):
+            ordering = [*ordering, '-id' if ordering[-1].startswith('-') else 'id']
+        return ordering
@@ -0,0 +1,104 @@
+"""
+Connection governance for ``NotificationConsumer``.
+
+Every socket gets a token bucket (``WS_RATE_LIMIT`` messages per second,
+bursts of ``WS_RATE_BURST``); messages over the limit are dropped. Frames
+larger than ``WS_MAX_FRAME_BYTES`` close the socket (1009). Client
+broadcasts to the staff group can be turned off with
+``WS_CLIENT_BROADCASTS = False``. The server pings every
+``WS_HEARTBEAT_INTERVAL`` seconds (``{"type": "ping"}``; clients answer
+``{"action": "pong"}``) and closes sockets that have sent nothing for
+``WS_IDLE_TIMEOUT`` seconds (4408). A process accepts at most
+``WS_MAX_CONNECTIONS`` sockets; handshakes beyond that are refused.
+
+``stats`` counts what was refused, dropped and evicted in this process
+(``GET /api/dashboard/realtime/``).
+"""
+import threading
+import time
+
+from django.conf import settings
+
+
+DEFAULTS = {
+    'WS_MAX_CONNECTIONS': 1000,
+    'WS_MAX_FRAME_BYTES': 64 * 1024,
+    'WS_RATE_LIMIT': 10.0,
+    'WS_RATE_BURST': 20,
+    'WS_CLIENT_BROADCASTS': True,
+    'WS_HEARTBEAT_INTERVAL': 25.0,
+    'WS_IDLE_TIMEOUT': 60.0,
+}
+
+CLOSE_TOO_BIG = 1009
+CLOSE_IDLE = 4408
+
+
+def setting(name):
+    return getattr(settings, name, DEFAULTS[name])
+
+
+class TokenBucket:
+    """``rate`` tokens per second, holding at most ``burst``."""
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self.updated = clock()
+
+    def take(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class ConnectionStats:
+    """Per-process socket gauge and counters."""
+    COUNTERS = (
+        'accepted',             # sockets accepted
+        'rejected_capacity',    # handshakes refused at WS_MAX_CONNECTIONS
+        'rate_limited',         # messages dropped by the token bucket
+        'oversized',            # sockets closed for a frame over WS_MAX_FRAME_BYTES
+        'evicted_idle',         # sockets closed after WS_IDLE_TIMEOUT of silence
+        'broadcasts_blocked',   # client broadcasts ignored (WS_CLIENT_BROADCASTS off)
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.open = 0
+            self.counts = dict.fromkeys(self.COUNTERS, 0)
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self.counts[name] += amount
+
+    def try_open(self, limit):
+        """Count a new socket unless ``limit`` are open already."""
+        with self._lock:
+            if self.open >= limit:
+                self.counts['rejected_capacity'] += 1
+                return False
+            self.open += 1
+            self.counts['accepted'] += 1
+            return True
+
+    def closed(self):
+        with self._lock:
+            self.open -= 1
+
+    def snapshot(self):
+        with self._lock:
+            return {'open': self.open, **self.counts}
+
+
+stats = ConnectionStats()
@@ -0,0 +1,150 @@
+"""
+Per-member account ledger.
+
+Merges a member's bills, repairs and payments into one statement with a
+running balance (what the member owes):
+
+* a bill adds its ``balance``; it is dated the first of its ``month``
+  (``YYYY-MM``; the API, bulk writes and CSV import normalize other
+  spellings such as ``Nov-2025``);
+* a repair adds its ``cost`` on its ``repair_date``;
+* a ``Paid`` payment subtracts its ``amount`` on its ``payment_date``;
+  ``Unpaid`` payments are listed but do not move the balance.
+
+The statement is one query: a ``UNION ALL`` of the three tables, each read
+through its ``(member, date)`` index, with the running balance computed by
+a ``SUM() OVER`` window in chronological order. Pages are newest first and
+keyset-paginated on ``(date, kind, id)``, so a member with years of history
+costs one pass over their own rows per page and never an OFFSET scan.
+"""
+import base64
+import json
+from decimal import Decimal
+from urllib import parse
+
+from django.db import connection
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from .models import Bill, Payment, Repair
+from .pagination import KeysetPagination
+
+
+KINDS = ('bill', 'payment', 'repair')
+CENT = Decimal('0.01')
+
+# Dates are compared as ISO text, so bills' YYYY-MM months (normalized on input,
+# see core.models.normalize_month) line up with real dates
+LEDGER_SQL = f"""
+WITH entries AS (
+    SELECT 'payment' AS kind, id, CAST(payment_date AS TEXT) AS entry_date,
+           collected_by AS description, status, amount,
+           CASE WHEN status = 'Paid' THEN -amount ELSE 0 END AS change
+      FROM {Payment._meta.db_table} WHERE member_id = %(member)s
+    UNION ALL
+    SELECT 'bill', id, month || '-01', month, paid_status, balance, balance
+      FROM {Bill._meta.db_table} WHERE member_id = %(member)s
+    UNION ALL
+    SELECT 'repair', id, CAST(repair_date AS TEXT), item_name, status, cost, cost
+      FROM {Repair._meta.db_table} WHERE member_id = %(member)s
+), ledger AS (
+    SELECT entries.*,
+           SUM(change) OVER (ORDER BY entry_date, kind, id ROWS UNBOUNDED PRECEDING) AS running,
+           SUM(change) OVER () AS closing
+      FROM entries
+)
+SELECT kind, id, entry_date, description, status, amount, change, running, closing
+  FROM ledger
+"""
+
+_NEWER = """
+ WHERE entry_date >= %(date)s AND (entry_date > %(date)s
+    OR (entry_date = %(date)s AND (kind > %(kind)s OR (kind = %(kind)s AND id > %(id)s))))
+"""
+_OLDER = """
+ WHERE entry_date <= %(date)s AND (entry_date < %(date)s
+    OR (entry_date = %(date)s AND (kind < %(kind)s OR (kind = %(kind)s AND id < %(id)s))))
+"""
+
+
+def _money(value):
+    # SQLite sums decimals as floats
+    return str(Decimal(str(value or 0)).quantize(CENT))
+
+
+def entries(member_id, position=None, older=True, limit=100):
+    """
+    ``(rows, closing_balance)``: up to ``limit`` ledger rows of ``member_id``
+    after ``position`` (``[date, kind, id]``), newest first if ``older``,
+    else oldest first. ``closing_balance`` is None when no row is returned.
+    """
+    sql = LEDGER_SQL
+    params = {'member': member_id, 'limit': limit}
+    if position is not None:
+        sql += _OLDER if older else _NEWER
+        params.update(date=position[0], kind=position[1], id=position[2])
+    direction = 'DESC' if older else 'ASC'
+    sql += f' ORDER BY entry_date {direction}, kind {direction}, id {direction} LIMIT %(limit)s'
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        fetched = cursor.fetchall()
+    rows = [
+        {
+            'kind': kind, 'id': pk, 'date': entry_date, 'description': description,
+            'status': status, 'amount': _money(amount), 'change': _money(change),
+            'balance': _money(running),
+        }
+        for kind, pk, entry_date, description, status, amount, change, running, _ in fetched
+    ]
+    closing = _money(fetched[0][-1]) if fetched else None
+    return rows, closing
+
+
+class LedgerPagination(KeysetPagination):
+    """Keyset pages over ``entries``; cursors carry ``[date, kind, id]``."""
+    ordering = ('-entry_date', '-kind', '-id')
+
+    def paginate_ledger(self, member_id, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        position, reverse = self.decode_cursor(request)
+        rows, self.closing = entries(member_id, position, older=not reverse, limit=self.page_size + 1)
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+        if self.closing is None and position is None:
+            self.closing = _money(0)
+
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = position is not None if not reverse else has_more
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'balance': self.closing,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def _position(self, row):
+        return [row['date'], row['kind'], row['id']]
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            token = parse.unquote(token)
+            payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+            date, kind, pk = payload['p']
+            if not isinstance(date, str) or kind not in KINDS or not isinstance(pk, int):
+                raise ValueError
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        return [date, kind, pk], bool(payload.get('r'))
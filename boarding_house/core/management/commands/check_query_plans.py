@@ -0,0 +1,128 @@
+"""
+Management command to verify the hot list/dashboard queries use indexes
+Run: python manage.py check_query_plans [--verbose]
+
+Runs EXPLAIN QUERY PLAN (SQLite) on every dashboard, list and admin-filter
+query and fails if any of them falls back to a full table scan or a temporary
+sort instead of walking an index.
+"""
+import datetime
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core import summary
+from core.models import Member, Schedule, Payment, Bill, Repair, ScheduleDayStats, DashboardSummary
+from core.pagination import _after
+from core.serializers import (
+    MemberSerializer, ScheduleSerializer, PaymentSerializer, BillSerializer, RepairSerializer,
+)
+from core.views import MemberViewSet, ScheduleViewSet, PaymentViewSet, BillViewSet, RepairViewSet
+
+
+# "SCAN core_payment" without "USING ... INDEX" is a full table scan
+FULL_SCAN = re.compile(r'\bSCAN (core_\w+)\b(?! USING)')
+TEMP_SORT = re.compile(r'USE TEMP B-TREE FOR (ORDER|GROUP) BY')
+
+PAGE = 100
+
+
+def _list(serializer, viewset, queryset=None):
+    queryset = serializer.plan_queryset(queryset if queryset is not None else serializer.Meta.model.objects.all())
+    return queryset.order_by(*viewset.cursor_ordering)
+
+
+def checked_queries():
+    """
+    ``(name, queryset_or_callable, rowid_order)`` for every query to check.
+    ``rowid_order`` marks queries that walk the table in primary-key order,
+    which SQLite reports as a plain SCAN even though it is an index walk.
+    """
+    today = datetime.date.today()
+    member_id = 1
+    return [
+        # Dashboard
+        ('dashboard: summary row', DashboardSummary.objects.filter(pk=summary.SUMMARY_PK), False),
+        ('dashboard: today schedules', ScheduleDayStats.objects.filter(date=today), False),
+        ('dashboard: recent payments', _list(PaymentSerializer, PaymentViewSet)[:5], False),
+        ('dashboard: recent repairs', _list(RepairSerializer, RepairViewSet)[:5], False),
+        ('dashboard: recent schedules', _list(ScheduleSerializer, ScheduleViewSet)[:5], False),
+        # Summary rebuild aggregates
+        ('summary: unpaid payments', Payment.objects.filter(status='Unpaid').values('amount'), False),
+        ('summary: unpaid bills', Bill.objects.filter(paid_status='Unpaid').values('balance'), False),
+        ('summary: pending repairs', Repair.objects.filter(status='Pending').values('id'), False),
+        ('summary: members by status', Member.objects.values('status'), False),
+        ('summary: schedules per day', Schedule.objects.values('date', 'completed').order_by('date'), False),
+        # List endpoints (first page and keyset continuation)
+        ('list: members', _list(MemberSerializer, MemberViewSet)[:PAGE], True),
+        ('list: schedules', _list(ScheduleSerializer, ScheduleViewSet)[:PAGE], False),
+        ('list: payments', _list(PaymentSerializer, PaymentViewSet)[:PAGE], False),
+        ('list: payments (next page)', _list(PaymentSerializer, PaymentViewSet).filter(
+            _after(PaymentViewSet.cursor_ordering, [today, 1000])
+        )[:PAGE], False),
+        ('list: bills', _list(BillSerializer, BillViewSet)[:PAGE], True),
+        ('list: repairs', _list(RepairSerializer, RepairViewSet)[:PAGE], False),
+        # Member-scoped list endpoints
+        ('member: payments', _list(PaymentSerializer, PaymentViewSet).filter(member_id=member_id)[:PAGE], False),
+        ('member: bills', _list(BillSerializer, BillViewSet).filter(member_id=member_id)[:PAGE], False),
+        ('member: repairs', _list(RepairSerializer, RepairViewSet).filter(member_id=member_id)[:PAGE], False),
+        # Query-parameter filters and orderings (core/filters.py)
+        ('filter: members by room', _list(MemberSerializer, MemberViewSet).filter(room_number='101')[:PAGE], False),
+        ('filter: members by name', Member.objects.order_by('name', 'id')[:PAGE], False),
+        ('filter: schedules by date range', _list(ScheduleSerializer, ScheduleViewSet).filter(
+            date__gte=today, date__lte=today + datetime.timedelta(days=7),
+        )[:PAGE], False),
+        ('filter: payments by status/date', _list(PaymentSerializer, PaymentViewSet).filter(
+            status='Unpaid', payment_date__gte=today,
+        )[:PAGE], False),
+        ('filter: bills by month', _list(BillSerializer, BillViewSet).filter(month='2025-01')[:PAGE], False),
+        ('filter: repairs by status', _list(RepairSerializer, RepairViewSet).filter(status='Pending')[:PAGE], False),
+        ('filter: member payments by status', _list(PaymentSerializer, PaymentViewSet).filter(
+            member_id=member_id, status='Unpaid',
+        )[:PAGE], False),
+        # Admin filters
+        ('admin: members by status', Member.objects.filter(status='Active'), False),
+        ('admin: payments by status', Payment.objects.filter(status='Paid'), False),
+        ('admin: bills by status', Bill.objects.filter(paid_status='Unpaid'), False),
+        ('admin: bills by member/month', Bill.objects.filter(member_id=member_id, month='2025-01'), False),
+        ('admin: repairs by status', Repair.objects.filter(status='Pending'), False),
+        ('admin: schedules by day', Schedule.objects.filter(date=today, completed=False), False),
+    ]
+
+
+def plan_problems(plan, rowid_order=False):
+    """Return the offending lines of an EXPLAIN QUERY PLAN output."""
+    problems = []
+    for line in plan.splitlines():
+        if FULL_SCAN.search(line) and not rowid_order:
+            problems.append(line.strip())
+        elif TEMP_SORT.search(line):
+            problems.append(line.strip())
+    return problems
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the dashboard/list/admin queries and fail on full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose', action='store_true', help='Print every query plan')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('check_query_plans parses SQLite EXPLAIN QUERY PLAN output only')
+
+        failures = 0
+        for name, queryset, rowid_order in checked_queries():
+            plan = queryset.explain()
+            problems = plan_problems(plan, rowid_order)
+            if problems:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f'FAIL {name}: ' + '; '.join(problems)))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'ok   {name}'))
+            if options['verbose'] or problems:
+                self.stdout.write('     ' + plan.replace('\n', '\n     '))
+
+        if failures:
+            raise CommandError(f'{failures} query plan(s) do not use an index')
@@ -4,29 +4,38 @@ Run: python manage.py create_user_profiles
 """
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
+from core import roles
 from core.models import UserProfile
 
 
+BATCH_SIZE = 1000
+
+
 class Command(BaseCommand):
     help = 'Create UserProfile for all existing users without profiles'
 
     def handle(self, *args, **options):
-        users_without_profiles = User.objects.filter(profile__isnull=True)
-        count = 0
-        
-        for user in users_without_profiles:
+        users_without_profiles = User.objects.filter(profile__isnull=True).only('id', 'username', 'is_superuser')
+        profiles = []
+
+        for user in users_without_profiles.iterator(chunk_size=BATCH_SIZE):
             # Superusers default to admin, others to member
             role = 'admin' if user.is_superuser else 'member'
-            UserProfile.objects.create(user=user, role=role)
-            count += 1
+            profiles.append(UserProfile(user=user, role=role))
+        # One INSERT per batch instead of one per user
+        UserProfile.objects.bulk_create(profiles, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        # bulk_create sends no post_save: drop the roles cached without a profile
+        for profile in profiles:
+            roles.invalidate_user(profile.user_id)
+        for profile in profiles:
             self.stdout.write(
-                self.style.SUCCESS(f'Created profile for {user.username} with role: {role}')
+                self.style.SUCCESS(f'Created profile for {profile.user.username} with role: {profile.role}')
             )
-        
+        count = len(profiles)
+
         if count == 0:
             self.stdout.write(self.style.SUCCESS('All users already have profiles'))
         else:
             self.stdout.write(
                 self.style.SUCCESS(f'Successfully created {count} user profile(s)')
             )
-
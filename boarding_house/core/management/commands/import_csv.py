@@ -0,0 +1,192 @@
+"""
+Management command to bulk-load historical members, payments or bills
+Run: python manage.py import_csv members|payments|bills <file.csv> [--chunk-size N] [--skip-invalid] [--dry-run]
+
+The CSV is streamed and validated in chunks; each chunk is written with one
+``bulk_create`` (plus a handful of lookups), with the per-row signal
+handlers suppressed. The dashboard summary gets one delta per chunk and
+clients get a single ``bulk_created`` notification when the import commits.
+
+Columns are the model fields by name; payments and bills reference their
+member by ``member_email``. Empty cells take the model default. Members whose
+email already exists are skipped (``ignore_conflicts`` on ``Member.email``).
+The whole import is one transaction: by default any invalid row aborts it,
+``--skip-invalid`` imports the valid rows and lists the others.
+"""
+import csv
+import itertools
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core import changes, notifications, summary
+from core.models import Member, Payment, Bill
+from core.signals import suppress_row_handlers
+
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 20
+
+# model name -> (model, importable columns, auto_now_add date column)
+TARGETS = {
+    'members': (Member, [
+        'name', 'email', 'contact', 'home_address', 'emergency_contact',
+        'room_number', 'status', 'joined_date',
+    ], 'joined_date'),
+    'payments': (Payment, [
+        'member_email', 'amount', 'payment_date', 'collected_by', 'status',
+    ], 'payment_date'),
+    'bills': (Bill, [
+        'member_email', 'month', 'water_amount', 'electricity_amount', 'balance', 'paid_status',
+    ], None),
+}
+
+
+def _chunks(rows, size):
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = 'Bulk-import members, payments or bills from a CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', choices=sorted(TARGETS))
+        parser.add_argument('path', help='CSV file with a header row')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help=f'Rows validated and written per batch (default {CHUNK_SIZE})')
+        parser.add_argument('--skip-invalid', action='store_true',
+                            help='Import the valid rows and report the invalid ones')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Validate and write, then roll everything back')
+
+    def handle(self, *args, **options):
+        model, columns, self.date_column = TARGETS[options['target']]
+        self.model = model
+        self.model_name = model._meta.model_name
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        started = time.perf_counter()
+        self.created_ids, self.owners = [], set()
+        self.read = self.skipped = 0
+        self.errors = []
+
+        try:
+            source = open(options['path'], newline='', encoding='utf-8-sig')
+        except OSError as exc:
+            raise CommandError(f'Cannot read {options["path"]}: {exc}')
+        with source, transaction.atomic(), suppress_row_handlers():
+            reader = csv.DictReader(source)
+            unknown = set(reader.fieldnames or ()) - set(columns)
+            if not reader.fieldnames or unknown:
+                raise CommandError(
+                    f'Unknown or missing columns {sorted(unknown)}; expected some of: {", ".join(columns)}'
+                )
+            # Data starts on line 2, after the header
+            numbered = zip(itertools.count(2), reader)
+            for chunk in _chunks(numbered, options['chunk_size']):
+                self.read += len(chunk)
+                self._import_chunk(chunk)
+
+            if self.errors and not options['skip_invalid']:
+                self._report_errors()
+                raise CommandError(f'{len(self.errors)} invalid row(s); nothing was imported')
+            if self.created_ids:
+                changes.bump(self.model_name, self.owners)
+                notifications.queue_bulk(self.model_name, 'created', self.created_ids)
+            if options['dry_run']:
+                transaction.set_rollback(True)
+
+        elapsed = time.perf_counter() - started
+        self._report_errors()
+        verb = 'Would import' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {len(self.created_ids)} {options["target"]} from {self.read} rows '
+            f'({self.skipped} existing skipped, {len(self.errors)} invalid) '
+            f'in {elapsed:.2f}s ({self.read / elapsed if elapsed else 0:.0f} rows/s)'
+        ))
+
+    def _report_errors(self):
+        for line, messages in self.errors[:MAX_REPORTED_ERRORS]:
+            self.stderr.write(self.style.WARNING(f'line {line}: {messages}'))
+        if len(self.errors) > MAX_REPORTED_ERRORS:
+            self.stderr.write(self.style.WARNING(
+                f'... and {len(self.errors) - MAX_REPORTED_ERRORS} more invalid row(s)'
+            ))
+
+    def _import_chunk(self, chunk):
+        """Validate ``chunk`` (``(line, row)`` pairs) and bulk-create its valid rows."""
+        members = {}
+        if self.model is not Member:
+            emails = {row.get('member_email') for _, row in chunk} - {None, ''}
+            members = dict(Member.objects.filter(email__in=emails).values_list('email', 'pk'))
+
+        objs, dates = [], []
+        for line, row in chunk:
+            values = {key: value for key, value in row.items() if value not in (None, '')}
+            errors = {}
+            if self.model is not Member:
+                email = values.pop('member_email', None)
+                if email not in members:
+                    errors['member_email'] = ['No member with this email.' if email else 'This field is required.']
+                values['member_id'] = members.get(email)
+            date = values.pop(self.date_column, None) if self.date_column else None
+            obj = self.model(**values)
+            try:
+                # Field and choice checks only; unique and FK lookups are done per chunk
+                obj.full_clean(exclude=['member', 'user'], validate_unique=False, validate_constraints=False)
+                if date is not None:
+                    date = self.model._meta.get_field(self.date_column).to_python(date)
+            except ValidationError as exc:
+                if hasattr(exc, 'error_dict'):
+                    errors.update(exc.message_dict)
+                else:
+                    errors[self.date_column] = exc.messages
+            if errors:
+                self.errors.append((line, errors))
+                continue
+            objs.append(obj)
+            dates.append(date)
+
+        if self.model is Member:
+            objs, dates = self._new_members(objs, dates)
+        if not objs:
+            return
+        self.model.objects.bulk_create(objs, ignore_conflicts=self.model is Member)
+        if self.model is Member:
+            # ignore_conflicts leaves the primary keys unset
+            ids = dict(Member.objects.filter(email__in=[obj.email for obj in objs]).values_list('email', 'pk'))
+            for obj in objs:
+                obj.pk = ids[obj.email]
+
+        # auto_now_add overrides the date on insert; put the historical one back
+        dated = []
+        for obj, date in zip(objs, dates):
+            if date is not None:
+                setattr(obj, self.date_column, date)
+                dated.append(obj)
+        if dated:
+            self.model.objects.bulk_update(dated, [self.date_column])
+
+        summary.record_rows(self.model, new_rows=[summary.row_of(obj) for obj in objs])
+        self.created_ids.extend(obj.pk for obj in objs)
+        self.owners.update(notifications.owner_id(obj) for obj in objs)
+
+    def _new_members(self, objs, dates):
+        """Drop members whose email exists already or repeats within the chunk."""
+        existing = set(Member.objects.filter(email__in=[obj.email for obj in objs]).values_list('email', flat=True))
+        kept, kept_dates = [], []
+        for obj, date in zip(objs, dates):
+            if obj.email in existing:
+                self.skipped += 1
+                continue
+            existing.add(obj.email)
+            kept.append(obj)
+            kept_dates.append(date)
+        return kept, kept_dates
@@ -0,0 +1,139 @@
+"""
+Management command to create member-portal logins for members without one
+Run: python manage.py provision_member_accounts --output credentials.csv [--workers N] [--batch-size N]
+
+For every ``Member`` with no linked ``User`` (and an email no account uses as
+its username yet) it creates a ``User`` (username = email, random initial
+password), its ``member`` ``UserProfile`` and the ``Member.user`` link. The
+password hashes (the slow part) are computed in a process pool; users,
+profiles and links are written with one ``bulk_create`` / ``bulk_update``
+per batch, without the per-user ``post_save`` handler. The initial
+passwords are written to ``--output`` (created with 0600 permissions) for
+distribution.
+"""
+import csv
+import os
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+
+from core import changes, notifications
+from core.models import Member, UserProfile
+
+
+BATCH_SIZE = 500
+PASSWORD_LENGTH = 12
+USERNAME_LENGTH = User._meta.get_field('username').max_length
+FIRST_NAME_LENGTH = User._meta.get_field('first_name').max_length
+
+
+def _init_worker():
+    # Spawned workers need settings for the configured password hashers
+    import django
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Create and link member-portal user accounts for all unlinked members'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', required=True,
+                            help='CSV file to write member_id,email,username,password to')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Processes hashing passwords (0 hashes in this process)')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help=f'Accounts written per transaction (default {BATCH_SIZE})')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        try:
+            fd = os.open(options['output'], os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except OSError as exc:
+            raise CommandError(f'Cannot create {options["output"]}: {exc}')
+
+        started = time.perf_counter()
+        # Ids up front: the batches write to the rows this query reads
+        member_ids = list(Member.objects.filter(user__isnull=True).exclude(
+            email__in=User.objects.values('username'),
+        ).order_by('id').values_list('id', flat=True))
+        executor = ProcessPoolExecutor(options['workers'], initializer=_init_worker) if options['workers'] else None
+        created = skipped = 0
+        try:
+            with os.fdopen(fd, 'w', newline='') as output:
+                writer = csv.writer(output)
+                writer.writerow(['member_id', 'email', 'username', 'password'])
+                for start in range(0, len(member_ids), options['batch_size']):
+                    rows = Member.objects.filter(
+                        pk__in=member_ids[start:start + options['batch_size']],
+                    ).order_by('id').values_list('id', 'email', 'name')
+                    batch = [row for row in rows if len(row[1]) <= USERNAME_LENGTH]
+                    skipped += len(rows) - len(batch)
+                    created += self._provision(batch, executor, writer)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Provisioned {created} member account(s) in {elapsed:.2f}s; '
+            f'initial passwords written to {options["output"]}'
+        ))
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f'Skipped {skipped} member(s) whose email is too long for a username'
+            ))
+
+    def _provision(self, rows, executor, writer):
+        """Create, profile and link the users of one batch of ``(id, email, name)`` rows."""
+        if not rows:
+            return 0
+        passwords = [secrets.token_urlsafe(PASSWORD_LENGTH) for _ in rows]
+        if executor is not None:
+            hashes = list(executor.map(make_password, passwords, chunksize=max(1, len(rows) // 32)))
+        else:
+            hashes = [make_password(password) for password in passwords]
+
+        with transaction.atomic():
+            # Re-check inside the transaction; skip members linked meanwhile
+            still_unlinked = set(Member.objects.filter(
+                pk__in=[pk for pk, _, _ in rows], user__isnull=True,
+            ).values_list('pk', flat=True))
+            pending = [
+                (row, password, hashed) for row, password, hashed in zip(rows, passwords, hashes)
+                if row[0] in still_unlinked
+            ]
+            users = [
+                User(username=email, email=email, first_name=name[:FIRST_NAME_LENGTH], password=hashed)
+                for (_, email, name), _, hashed in pending
+            ]
+            User.objects.bulk_create(users)
+            if any(user.pk is None for user in users):
+                # Backends without RETURNING
+                ids = dict(User.objects.filter(
+                    username__in=[user.username for user in users],
+                ).values_list('username', 'pk'))
+                for user in users:
+                    user.pk = ids[user.username]
+            UserProfile.objects.bulk_create([UserProfile(user=user, role='member') for user in users])
+
+            members = [
+                Member(pk=member_id, user_id=user.pk, version=F('version') + 1)
+                for ((member_id, _, _), _, _), user in zip(pending, users)
+            ]
+            Member.objects.bulk_update(members, ['user', 'version'])
+            member_ids = [member.pk for member in members]
+            if member_ids:
+                # The new users have no cached roles, so only clients need telling
+                changes.bump('member', member_ids)
+                notifications.queue_bulk('member', 'updated', member_ids)
+
+        for ((member_id, email, _), password, _) in pending:
+            writer.writerow([member_id, email, email, password])
+        return len(pending)
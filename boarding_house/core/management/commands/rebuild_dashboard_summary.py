@@ -0,0 +1,33 @@
+"""
+Management command to rebuild the incrementally maintained dashboard summary
+Run: python manage.py rebuild_dashboard_summary [--check]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from core import summary
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the dashboard summary from scratch, or check it for drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drift; exit with an error if any counter is off',
+        )
+
+    def handle(self, *args, **options):
+        diffs = summary.drift()
+        for name, (stored, actual) in sorted(diffs.items()):
+            self.stdout.write(
+                self.style.WARNING(f'Drift in {name}: stored={stored} actual={actual}')
+            )
+
+        if options['check']:
+            if diffs:
+                raise CommandError(f'Dashboard summary has drifted ({len(diffs)} counter(s))')
+            self.stdout.write(self.style.SUCCESS('Dashboard summary is consistent'))
+            return
+
+        summary.rebuild()
+        self.stdout.write(self.style.SUCCESS('Dashboard summary rebuilt'))
@@ -0,0 +1,208 @@
+"""
+Utility meter reading ingestion and usage rollups.
+
+A collector posts batches of per-room sub-meter register readings to
+``/api/meters/readings/``::
+
+    [{"room": "101", "meter": "water", "taken_at": "2025-01-05T10:15:00Z",
+      "value": "1532.250"}, ...]
+
+``ingest`` appends them to ``MeterReading`` and, for each reading newer than
+the last one counted for its room and meter (``MeterState``), adds the
+consumption since that reading to the ``MeterUsage`` rollups of the hour,
+day and month (in ``TIME_ZONE``) the reading falls in. Monthly usage of a
+room is then one indexed row lookup (``usage_for``), never a scan of raw
+readings.
+
+* the first reading of a meter only sets the baseline;
+* a value lower than the previous one is taken as a meter reset/rollover,
+  and the reading's own value as the usage since;
+* readings at or before the last counted one (late or re-sent) are stored
+  but not counted, so retrying a batch does not double-count;
+* a batch costs a handful of bulk queries, not a query per reading;
+* the ``MeterState`` rows of a batch are locked while it is counted, so
+  concurrent batches for the same meter take turns. A state row that does
+  not exist yet cannot be locked: when two collectors send the first reading
+  of a meter at once, the second insert hits the unique constraint and that
+  batch is rolled back and counted again against the other's state.
+"""
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, transaction
+from django.utils import dateparse, timezone
+
+from .models import MeterReading, MeterState, MeterUsage
+
+
+BATCH_SIZE = 1000
+MAX_READINGS = 20000
+ATTEMPTS = 3  # per batch, when a new MeterState row conflicts with a concurrent insert
+
+METERS = {'water': MeterReading.WATER, 'electricity': MeterReading.ELECTRICITY}
+PERIODS = {'hour': MeterUsage.HOUR, 'day': MeterUsage.DAY, 'month': MeterUsage.MONTH}
+
+
+def period_starts(taken_at):
+    """``(period, start)`` of the hour, day and month containing ``taken_at``."""
+    local = timezone.localtime(taken_at)
+    hour = local.replace(minute=0, second=0, microsecond=0)
+    day = hour.replace(hour=0)
+    return [
+        (MeterUsage.HOUR, hour),
+        (MeterUsage.DAY, day),
+        (MeterUsage.MONTH, day.replace(day=1)),
+    ]
+
+
+def month_start(year, month):
+    return timezone.make_aware(datetime(year, month, 1))
+
+
+def parse_readings(items):
+    """
+    Validate a list of reading dicts; returns ``(readings, errors)`` where
+    ``errors`` is aligned with ``items`` (empty dicts for valid items).
+    """
+    readings, errors = [], []
+    for item in items:
+        error = {}
+        if not isinstance(item, dict):
+            readings.append(None)
+            errors.append({'non_field_errors': ['Expected an object.']})
+            continue
+
+        room = item.get('room')
+        if not isinstance(room, str) or not room or len(room) > 20:
+            error['room'] = ['A room number of at most 20 characters is required.']
+        meter = METERS.get(item.get('meter'))
+        if meter is None:
+            error['meter'] = [f'Must be one of: {", ".join(METERS)}.']
+        taken_at = item.get('taken_at')
+        taken_at = dateparse.parse_datetime(taken_at) if isinstance(taken_at, str) else None
+        if taken_at is None:
+            error['taken_at'] = ['An ISO 8601 date-time is required.']
+        elif timezone.is_naive(taken_at):
+            taken_at = timezone.make_aware(taken_at)
+        try:
+            value = Decimal(str(item.get('value')))
+            if not value.is_finite() or value < 0 or value >= 10 ** 9:
+                raise InvalidOperation
+            value = value.quantize(Decimal('0.001'))
+        except (InvalidOperation, ValueError):
+            error['value'] = ['A non-negative number below 1e9 is required.']
+
+        errors.append(error)
+        readings.append(None if error else MeterReading(
+            room_number=room, meter=meter, taken_at=taken_at, value=value,
+        ))
+    return readings, errors
+
+
+def ingest(readings):
+    """
+    Store ``readings`` (unsaved ``MeterReading`` objects) and roll the new
+    consumption up into ``MeterUsage``. Returns counts for the response.
+    """
+    series = defaultdict(dict)
+    for reading in readings:
+        # Duplicates within the batch: first one wins
+        series[(reading.room_number, reading.meter)].setdefault(reading.taken_at, reading)
+
+    for attempt in range(ATTEMPTS):
+        try:
+            with transaction.atomic():
+                counted, late = _count(series)
+            break
+        except IntegrityError:
+            # Another collector created one of this batch's states first
+            if attempt == ATTEMPTS - 1:
+                raise
+
+    return {'received': len(readings), 'counted': len(counted), 'late': len(late)}
+
+
+def _lock_states(rooms):
+    return {
+        (state.room_number, state.meter): state
+        for state in MeterState.objects.select_for_update().filter(room_number__in=rooms)
+    }
+
+
+def _count(series):
+    """Store and count one batch (in a transaction); returns ``(counted, late)``."""
+    rooms = {room for room, _ in series}
+    counted, late = [], []
+    rollups = defaultdict(lambda: [Decimal(0), 0])
+
+    states = _lock_states(rooms)
+    new_states, moved_states = [], []
+    for key, by_time in series.items():
+        state = states.get(key)
+        for taken_at in sorted(by_time):
+            reading = by_time[taken_at]
+            if state is not None and taken_at <= state.taken_at:
+                late.append(reading)
+                continue
+            if state is None:
+                state = MeterState(room_number=key[0], meter=key[1])
+                new_states.append(state)
+                usage = None
+            else:
+                if state.pk is not None and (not moved_states or moved_states[-1] is not state):
+                    moved_states.append(state)
+                # A lower value means the meter was reset or rolled over
+                usage = reading.value - state.value if reading.value >= state.value else reading.value
+            state.taken_at, state.value = taken_at, reading.value
+            counted.append(reading)
+            if usage is not None:
+                for period, start in period_starts(taken_at):
+                    total = rollups[key + (period, start)]
+                    total[0] += usage
+                    total[1] += 1
+
+    MeterReading.objects.bulk_create(counted + late, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    MeterState.objects.bulk_create(new_states, batch_size=BATCH_SIZE)
+    MeterState.objects.bulk_update(moved_states, ['taken_at', 'value'], batch_size=BATCH_SIZE)
+    _apply_rollups(rollups)
+    return counted, late
+
+
+def _apply_rollups(rollups):
+    if not rollups:
+        return
+    existing = {
+        (row.room_number, row.meter, row.period, row.start): row
+        for row in MeterUsage.objects.select_for_update().filter(
+            room_number__in={key[0] for key in rollups},
+            start__in={key[3] for key in rollups},
+        )
+    }
+    created, updated = [], []
+    for key, (usage, count) in rollups.items():
+        row = existing.get(key)
+        if row is None:
+            created.append(MeterUsage(
+                room_number=key[0], meter=key[1], period=key[2], start=key[3],
+                usage=usage, readings=count,
+            ))
+        else:
+            row.usage += usage
+            row.readings += count
+            updated.append(row)
+    MeterUsage.objects.bulk_create(created, batch_size=BATCH_SIZE)
+    MeterUsage.objects.bulk_update(updated, ['usage', 'readings'], batch_size=BATCH_SIZE)
+
+
+def usage_for(room_number, meter, period, start):
+    """Usage of one room's meter in one hour/day/month (a single indexed lookup)."""
+    value = MeterUsage.objects.filter(
+        room_number=room_number, meter=meter, period=period, start=start,
+    ).values_list('usage', flat=True).first()
+    return value if value is not None else Decimal(0)
+
+
+def monthly_usage(room_number, meter, year, month):
+    return usage_for(room_number, meter, MeterUsage.MONTH, month_start(year, month))
+
@@ -0,0 +1,271 @@
+"""
+Process-local instrumentation, exported in the Prometheus text format.
+
+``MetricsMiddleware`` times every request and, through an execute wrapper
+installed on each new database connection, counts the SQL queries it runs
+and the time spent in them (queries made on thread-pool connections by the
+async read path included: the per-request tally lives in a context
+variable). ``core/notifications.py`` records the fan-out of every broadcast
+and the latency of each ``group_send``; the WebSocket connection gauge and
+governance counters come from ``core/governance.py``.
+
+``GET /api/metrics/`` (staff) serves everything in the Prometheus text
+format. Each metric is a few dict updates under a lock per request or
+query, cheap enough to leave on; ``METRICS_ENABLED=0`` turns the request
+and SQL instrumentation off. The numbers are per process: scrape every
+worker, or sum them in Prometheus.
+"""
+import bisect
+import contextvars
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+from . import governance, representations
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+FANOUT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 500)
+
+_lock = threading.Lock()
+REGISTRY = []
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values = {}
+        REGISTRY.append(self)
+
+    def reset(self):
+        with _lock:
+            self.values = {}
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with _lock:
+            items = sorted(self.values.items())
+        for labels, value in items:
+            lines.extend(self._samples(labels, value))
+        return lines
+
+    def _samples(self, labels, value):
+        return [f'{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}']
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with _lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+
+class Collected(Metric):
+    """A gauge or counter read from ``collect()`` (``{labels: value}``) at render time."""
+
+    def __init__(self, name, documentation, labels=(), kind='gauge', collect=None):
+        super().__init__(name, documentation, labels)
+        self.kind = kind
+        self.collect = collect
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for labels, value in sorted(self.collect().items()):
+            lines.extend(self._samples(labels, value))
+        return lines
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            state = self.values.get(labels)
+            if state is None:
+                # Per-bucket counts (cumulated on render), sum, count
+                state = self.values[labels] = [[0] * (len(self.buckets) + 1), 0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self, labels, state):
+        counts, total, count = state
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            bucket_labels = _format_labels(self.labels, labels, [('le', _format_value(bound))])
+            lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+        suffix = _format_labels(self.labels, labels)
+        lines.append(f'{self.name}_sum{suffix} {_format_value(float(total))}')
+        lines.append(f'{self.name}_count{suffix} {count}')
+        return lines
+
+
+def render():
+    """All metrics in the Prometheus text exposition format (0.0.4)."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+# HTTP
+request_seconds = Histogram(
+    'http_request_duration_seconds', 'Request latency by view.', ('view', 'method'),
+)
+requests_total = Counter(
+    'http_requests_total', 'Requests by view and status code.', ('view', 'method', 'status'),
+)
+request_queries = Histogram(
+    'http_request_db_queries', 'SQL queries per request by view.', ('view',), buckets=QUERY_COUNT_BUCKETS,
+)
+request_query_seconds = Histogram(
+    'http_request_db_seconds', 'Time spent in SQL per request by view.', ('view',),
+)
+
+# Real-time notifications
+broadcast_groups = Histogram(
+    'notification_broadcast_groups', 'Channel-layer groups each broadcast is sent to.',
+    buckets=FANOUT_BUCKETS,
+)
+broadcast_events = Histogram(
+    'notification_broadcast_events', 'Events per broadcast.', buckets=FANOUT_BUCKETS,
+)
+group_send_seconds = Histogram(
+    'channel_layer_group_send_seconds', 'Latency of channel-layer group_send calls.',
+)
+# Kept by core/governance.py
+ws_connections = Collected(
+    'websocket_connections', 'Open notification WebSocket connections.',
+    collect=lambda: {(): governance.stats.snapshot()['open']},
+)
+ws_events = Collected(
+    'websocket_governance_events_total', 'Notification sockets accepted, refused, dropped and evicted.',
+    ('event',), kind='counter',
+    collect=lambda: {
+        (event,): value for event, value in governance.stats.snapshot().items() if event != 'open'
+    },
+)
+
+# Kept by core/representations.py
+representation_cache = Collected(
+    'representation_cache_events_total', 'Representation cache hits, misses and LRU evictions.', ('event',),
+    kind='counter',
+    collect=lambda: {
+        ('hit',): representations.cache.hits, ('miss',): representations.cache.misses,
+        ('evicted',): representations.cache.evictions,
+    },
+)
+representation_cache_rows = Collected(
+    'representation_cache_rows', 'Rows held by the representation cache.',
+    collect=lambda: {(): len(representations.cache)},
+)
+
+
+def enabled():
+    return getattr(settings, 'METRICS_ENABLED', True)
+
+
+# SQL per request: set by MetricsMiddleware, read by the execute wrapper
+_query_tally = contextvars.ContextVar('query_tally', default=None)
+
+
+def _count_query(execute, sql, params, many, context):
+    tally = _query_tally.get()
+    if tally is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        tally[0] += 1
+        tally[1] += time.perf_counter() - start
+
+
+def install_query_counter(sender=None, connection=None, **kwargs):
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+def connect_signals():
+    connection_created.connect(install_query_counter, dispatch_uid='core.metrics.query_counter')
+
+
+class MetricsMiddleware:
+    """Latency, status and SQL queries/time of each request, by view name."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = enabled()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+        tally, token, start = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _query_tally.reset(token)
+        self._record(request, response, tally, start)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        tally, token, start = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _query_tally.reset(token)
+        self._record(request, response, tally, start)
+        return response
+
+    def _start(self):
+        tally = [0, 0.0]
+        return tally, _query_tally.set(tally), time.perf_counter()
+
+    def _record(self, request, response, tally, start):
+        elapsed = time.perf_counter() - start
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unmatched'
+        request_seconds.observe(elapsed, view, request.method)
+        requests_total.inc(view, request.method, str(response.status_code))
+        request_queries.observe(tally[0], view)
+        request_query_seconds.observe(tally[1], view)
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_member_user_userprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_members', models.IntegerField(default=0)),
+                ('active_members', models.IntegerField(default=0)),
+                ('pending_payments', models.IntegerField(default=0)),
+                ('pending_payment_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('pending_repairs', models.IntegerField(default=0)),
+                ('unpaid_bills', models.IntegerField(default=0)),
+                ('unpaid_bill_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ScheduleDayStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('total', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_dashboard_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['member', 'month'], name='bill_member_month_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['paid_status', 'month'], name='bill_status_month_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(condition=models.Q(('paid_status', 'Unpaid')), fields=['balance'], name='bill_unpaid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['status'], name='member_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['payment_date', 'id'], name='payment_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['member', 'payment_date', 'id'], name='payment_member_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'payment_date'], name='payment_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(condition=models.Q(('status', 'Unpaid')), fields=['amount'], name='payment_unpaid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='repair',
+            index=models.Index(fields=['repair_date', 'id'], name='repair_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='repair',
+            index=models.Index(fields=['member', 'repair_date', 'id'], name='repair_member_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='repair',
+            index=models.Index(fields=['status', 'repair_date'], name='repair_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['date', 'completed'], name='schedule_date_done_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['date', 'time', 'id'], name='schedule_date_time_idx'),
+        ),
+    ]
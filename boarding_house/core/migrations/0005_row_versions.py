@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bill',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='repair',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='schedule',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_row_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeterReading',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_number', models.CharField(max_length=20)),
+                ('meter', models.PositiveSmallIntegerField(choices=[(1, 'Water'), (2, 'Electricity')])),
+                ('taken_at', models.DateTimeField()),
+                ('value', models.DecimalField(decimal_places=3, max_digits=12)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('room_number', 'meter', 'taken_at'), name='meter_reading_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MeterState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_number', models.CharField(max_length=20)),
+                ('meter', models.PositiveSmallIntegerField(choices=[(1, 'Water'), (2, 'Electricity')])),
+                ('taken_at', models.DateTimeField()),
+                ('value', models.DecimalField(decimal_places=3, max_digits=12)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('room_number', 'meter'), name='meter_state_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MeterUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_number', models.CharField(max_length=20)),
+                ('meter', models.PositiveSmallIntegerField(choices=[(1, 'Water'), (2, 'Electricity')])),
+                ('period', models.CharField(choices=[('H', 'Hour'), ('D', 'Day'), ('M', 'Month')], max_length=1)),
+                ('start', models.DateTimeField()),
+                ('usage', models.DecimalField(decimal_places=3, default=0, max_digits=14)),
+                ('readings', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('room_number', 'meter', 'period', 'start'), name='meter_usage_unique')],
+            },
+        ),
+    ]
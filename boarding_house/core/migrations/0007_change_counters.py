@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_meter_readings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=64, unique=True)),
+                ('version', models.BigIntegerField(default=0)),
+                ('changed_at', models.DateTimeField()),
+            ],
+        ),
+    ]
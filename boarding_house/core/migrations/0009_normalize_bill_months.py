@@ -0,0 +1,39 @@
+import datetime
+
+from django.db import migrations
+
+
+# As core.models.MONTH_INPUT_FORMATS when this migration was written
+MONTH_INPUT_FORMATS = ('%Y-%m', '%Y/%m', '%m/%Y', '%m-%Y', '%b-%Y', '%b %Y', '%B-%Y', '%B %Y')
+
+
+def _normalized(month):
+    for input_format in MONTH_INPUT_FORMATS:
+        try:
+            return datetime.datetime.strptime(month.strip(), input_format).strftime('%Y-%m')
+        except ValueError:
+            continue
+    return None
+
+
+def normalize_bill_months(apps, schema_editor):
+    """Rewrite months such as 'Nov-2025' as '2025-11'; unreadable ones are left alone."""
+    Bill = apps.get_model('core', 'Bill')
+    renamed = {}
+    for month in Bill.objects.values_list('month', flat=True).distinct():
+        normalized = _normalized(month)
+        if normalized is not None and normalized != month:
+            renamed[month] = normalized
+    for month, normalized in renamed.items():
+        Bill.objects.filter(month=month).update(month=normalized)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_list_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_bill_months, migrations.RunPython.noop),
+    ]
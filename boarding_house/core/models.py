@@ -1,7 +1,25 @@
+import datetime
+
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import User
 
 
+# Spellings of a bill month accepted on input; stored as YYYY-MM
+MONTH_INPUT_FORMATS = ('%Y-%m', '%Y/%m', '%m/%Y', '%m-%Y', '%b-%Y', '%b %Y', '%B-%Y', '%B %Y')
+
+
+def normalize_month(value):
+    """``value`` as ``YYYY-MM`` ('Nov-2025', 'November 2025', '11/2025' -> '2025-11')."""
+    text = str(value).strip()
+    for input_format in MONTH_INPUT_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, input_format).strftime('%Y-%m')
+        except ValueError:
+            continue
+    raise ValidationError('Enter a month as YYYY-MM, e.g. 2025-11.', code='invalid_month')
+
+
 class Member(models.Model):
     STATUS_CHOICES = [('Active', 'Active'), ('Inactive', 'Inactive')]
 
@@ -15,6 +33,16 @@ class Member(models.Model):
     joined_date = models.DateField(auto_now_add=True)
     # Link member to Django User for member portal access
     user = models.OneToOneField(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='member_profile')
+    # Bumped on every change; WebSocket patches are relative to it (core/versioning.py)
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status'], name='member_status_idx'),
+            # Ordering and keyset pages (?ordering=name, ?ordering=room_number)
+            models.Index(fields=['name', 'id'], name='member_name_idx'),
+            models.Index(fields=['room_number', 'id'], name='member_room_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.room_number})"
@@ -57,6 +85,15 @@ class Schedule(models.Model):
     date = models.DateField()
     time = models.TimeField()
     completed = models.BooleanField(default=False)
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        indexes = [
+            # Dashboard "today" counts and the date filter
+            models.Index(fields=['date', 'completed'], name='schedule_date_done_idx'),
+            # Keyset pagination / recent activity ordering
+            models.Index(fields=['date', 'time', 'id'], name='schedule_date_time_idx'),
+        ]
 
     def __str__(self):
         return f"{self.task_type} on {self.date} {self.time}"
@@ -70,6 +107,20 @@ class Payment(models.Model):
     payment_date = models.DateField(auto_now_add=True)
     collected_by = models.CharField(max_length=200, blank=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Paid')
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination / recent activity ordering, staff and member-scoped
+            models.Index(fields=['payment_date', 'id'], name='payment_date_idx'),
+            models.Index(fields=['member', 'payment_date', 'id'], name='payment_member_date_idx'),
+            models.Index(fields=['status', 'payment_date'], name='payment_status_date_idx'),
+            # Pending payments count/sum only ever look at unpaid rows
+            models.Index(
+                fields=['amount'], name='payment_unpaid_idx',
+                condition=models.Q(status='Unpaid'),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.member} - {self.amount}"
@@ -79,15 +130,35 @@ class Bill(models.Model):
     STATUS_CHOICES = [('Paid', 'Paid'), ('Unpaid', 'Unpaid')]
 
     member = models.ForeignKey(Member, on_delete=models.CASCADE)
-    month = models.CharField(max_length=20)
+    month = models.CharField(max_length=20)  # YYYY-MM, see normalize_month
     water_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     electricity_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     balance = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     paid_status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Unpaid')
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['month', 'id'], name='bill_month_idx'),
+            models.Index(fields=['member', 'month'], name='bill_member_month_idx'),
+            models.Index(fields=['paid_status', 'month'], name='bill_status_month_idx'),
+            # Unpaid bills count/sum only ever look at unpaid rows
+            models.Index(
+                fields=['balance'], name='bill_unpaid_idx',
+                condition=models.Q(paid_status='Unpaid'),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.member} - {self.month}"
 
+    def clean(self):
+        # The ledger dates bills by month, so they must sort as dates
+        try:
+            self.month = normalize_month(self.month)
+        except ValidationError as exc:
+            raise ValidationError({'month': exc.messages})
+
 
 class Repair(models.Model):
     STATUS_CHOICES = [('Completed', 'Completed'), ('Pending', 'Pending')]
@@ -99,6 +170,127 @@ class Repair(models.Model):
     replaced_by = models.CharField(max_length=200, blank=True)
     description = models.TextField(blank=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Pending')
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination / recent activity ordering, staff and member-scoped
+            models.Index(fields=['repair_date', 'id'], name='repair_date_idx'),
+            models.Index(fields=['member', 'repair_date', 'id'], name='repair_member_date_idx'),
+            models.Index(fields=['status', 'repair_date'], name='repair_status_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.item_name} - {self.status}"
+
+
+class DashboardSummary(models.Model):
+    """
+    Single-row, incrementally maintained dashboard counters.
+
+    Kept up to date with deltas by the handlers in ``core/signals.py`` (see
+    ``core/summary.py``); rebuild or check for drift with
+    ``python manage.py rebuild_dashboard_summary [--check]``.
+    """
+    total_members = models.IntegerField(default=0)
+    active_members = models.IntegerField(default=0)
+    pending_payments = models.IntegerField(default=0)
+    pending_payment_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    pending_repairs = models.IntegerField(default=0)
+    unpaid_bills = models.IntegerField(default=0)
+    unpaid_bill_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Dashboard summary ({self.updated_at})"
+
+
+class ScheduleDayStats(models.Model):
+    """Per-date schedule counters backing the dashboard's "today" figures."""
+    date = models.DateField(unique=True)
+    total = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.date}: {self.completed}/{self.total}"
+
+
+class MeterReading(models.Model):
+    """
+    Raw sub-meter register readings, append-only (see ``core/meters.py``).
+
+    Rows are never updated; usage is read from the ``MeterUsage`` rollups.
+    """
+    WATER = 1
+    ELECTRICITY = 2
+    METER_CHOICES = [(WATER, 'Water'), (ELECTRICITY, 'Electricity')]
+
+    room_number = models.CharField(max_length=20)
+    meter = models.PositiveSmallIntegerField(choices=METER_CHOICES)
+    taken_at = models.DateTimeField()
+    value = models.DecimalField(max_digits=12, decimal_places=3)
+
+    class Meta:
+        constraints = [
+            # Also the (room, meter, time) index; makes re-sent batches no-ops
+            models.UniqueConstraint(
+                fields=['room_number', 'meter', 'taken_at'], name='meter_reading_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.room_number} {self.get_meter_display()} {self.value} @ {self.taken_at}"
+
+
+class MeterState(models.Model):
+    """Latest counted reading per room and meter; usage is measured from it."""
+    room_number = models.CharField(max_length=20)
+    meter = models.PositiveSmallIntegerField(choices=MeterReading.METER_CHOICES)
+    taken_at = models.DateTimeField()
+    value = models.DecimalField(max_digits=12, decimal_places=3)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room_number', 'meter'], name='meter_state_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.room_number} {self.get_meter_display()}: {self.value} @ {self.taken_at}"
+
+
+class MeterUsage(models.Model):
+    """Hourly, daily and monthly usage per room and meter, kept incrementally."""
+    HOUR = 'H'
+    DAY = 'D'
+    MONTH = 'M'
+    PERIOD_CHOICES = [(HOUR, 'Hour'), (DAY, 'Day'), (MONTH, 'Month')]
+
+    room_number = models.CharField(max_length=20)
+    meter = models.PositiveSmallIntegerField(choices=MeterReading.METER_CHOICES)
+    period = models.CharField(max_length=1, choices=PERIOD_CHOICES)
+    start = models.DateTimeField()
+    usage = models.DecimalField(max_digits=14, decimal_places=3, default=0)
+    readings = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['room_number', 'meter', 'period', 'start'], name='meter_usage_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.room_number} {self.get_meter_display()} {self.period} {self.start}: {self.usage}"
+
+
+class ChangeCounter(models.Model):
+    """
+    Change counter per model (``payment``) and per member-scoped view of a
+    model (``payment:12``), behind the API's ETags; see ``core/changes.py``.
+    """
+    scope = models.CharField(max_length=64, unique=True)
+    version = models.BigIntegerField(default=0)
+    changed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.scope} v{self.version}"
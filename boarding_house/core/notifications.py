@@ -0,0 +1,269 @@
+"""
+Transaction-aware, coalesced real-time notifications.
+
+The model signal handlers in ``core/signals.py`` do not broadcast directly.
+They ``queue`` an event on a per-transaction buffer that is flushed from a
+single ``transaction.on_commit`` hook (``core/commits.py``):
+
+* nothing is sent for a transaction that rolls back;
+* several changes to the same (model, id) collapse into one event, and a row
+  created and deleted in the same transaction produces none;
+* rows are serialized once, at flush time, in their final committed state;
+* a commit produces one channel-layer message (``broadcast.batch``) per
+  affected group however many rows it touched.
+
+Events only go to the groups entitled to them: staff sockets subscribe to
+per-model ``topic.<model>`` groups, member sockets to their own
+``member.<id>`` group (see ``NotificationConsumer``), so a write to one
+member's bill reaches the staff subscribed to bills and that member only.
+Schedules are staff-only over REST, so they never go to member groups.
+
+Updates to a row whose previous state is known go out as ``patched`` events
+carrying only the changed fields and the row's new ``version`` (see
+``core/versioning.py``); inserts and deletes are sent whole.
+
+Outside ``atomic`` blocks ``on_commit`` runs immediately, so every save still
+goes out right away as a single event. Events queued inside a savepoint that
+rolls back are dropped, even if the outer transaction commits.
+"""
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+
+from . import metrics, representations
+from .commits import CommitBuffer
+from .models import Member
+from .versioning import delta_fields
+
+# Staff-only group for client-originated and model-less messages
+GROUP = 'notifications'
+
+TOPICS = ('member', 'schedule', 'payment', 'bill', 'repair')
+# Not sent to (or fetchable by) member sockets: ScheduleViewSet is IsStaff
+STAFF_ONLY_TOPICS = ('schedule',)
+
+
+def topic_group(topic):
+    return f'topic.{topic}'
+
+
+def member_group(member_id):
+    return f'member.{member_id}'
+
+
+def owner_id(instance):
+    """Id of the member a row belongs to (the member itself for Member rows)."""
+    if isinstance(instance, Member):
+        return instance.pk
+    member_id = getattr(instance, 'member_id', None)
+    if member_id is None:
+        member_id = getattr(instance, 'assigned_to_id', None)
+    return member_id
+
+
+def groups_for(model, member_id=None):
+    groups = [topic_group(model) if model in TOPICS else GROUP]
+    if member_id is not None and model not in STAFF_ONLY_TOPICS:
+        groups.append(member_group(member_id))
+    return groups
+
+
+def _group_send(group, payloads):
+    channel_layer = get_channel_layer()
+    if channel_layer is None or not payloads:
+        return
+    if len(payloads) == 1:
+        message = {'type': 'broadcast.message', 'message': payloads[0]}
+    else:
+        message = {'type': 'broadcast.batch', 'messages': payloads}
+    start = time.perf_counter()
+    async_to_sync(channel_layer.group_send)(group, message)
+    metrics.group_send_seconds.observe(time.perf_counter() - start)
+
+
+def send_notification(payload: dict, member_id=None):
+    """
+    Send a JSON payload to the groups entitled to it: the staff topic group
+    for ``payload['model']`` and, if given, the owning member's group.
+    """
+    groups = groups_for(payload.get('model'), member_id)
+    metrics.broadcast_groups.observe(len(groups))
+    metrics.broadcast_events.observe(1)
+    for group in groups:
+        _group_send(group, [payload])
+
+
+def send_batch(events):
+    """
+    Send ``(payload, member_id)`` pairs with one channel-layer message per
+    target group.
+    """
+    by_group = {}
+    for payload, member_id in events:
+        for group in groups_for(payload.get('model'), member_id):
+            by_group.setdefault(group, []).append(payload)
+    if by_group:
+        metrics.broadcast_groups.observe(len(by_group))
+        metrics.broadcast_events.observe(len(events))
+    for group, payloads in by_group.items():
+        _group_send(group, payloads)
+
+
+class _Event:
+    __slots__ = (
+        'model', 'action', 'pk', 'member_id', 'instance', 'serializer_class', 'data',
+        'changed', 'base_version',
+    )
+
+    def __init__(self, model, action, pk, member_id, instance, serializer_class, data,
+                 changed=None, base_version=None):
+        self.model = model
+        self.action = action
+        self.pk = pk
+        self.member_id = member_id
+        self.instance = instance
+        self.serializer_class = serializer_class
+        self.data = data
+        # Model fields changed by an update, if known: sent as a patch
+        self.changed = changed
+        self.base_version = base_version
+
+    def payload(self):
+        data = self.data
+        if data is None and self.action == 'updated' and self.changed is not None \
+                and self.serializer_class is not None:
+            # The full row goes to the representation cache for later GETs
+            full = representations.store(self.serializer_class, self.instance)
+            keep = delta_fields(representations.template(self.serializer_class), self.changed)
+            return {
+                'model': self.model, 'action': 'patched', 'base_version': self.base_version,
+                'data': {name: value for name, value in full.items() if name in keep},
+            }
+        if data is None:
+            if self.action == 'deleted' or self.serializer_class is None:
+                data = {'id': self.pk}
+            else:
+                data = representations.store(self.serializer_class, self.instance)
+        return {'model': self.model, 'action': self.action, 'data': data}
+
+
+def _merge(previous, event):
+    """Coalesce two events for the same row; ``None`` means "send nothing"."""
+    if previous.action == 'created':
+        if event.action == 'deleted':
+            return None
+        event.action = 'created'
+        event.changed = None
+    elif previous.action == 'updated' and event.action == 'updated':
+        # One patch from the first update's base version to the final state
+        if previous.changed is None or event.changed is None:
+            event.changed = None
+        else:
+            event.changed = previous.changed | event.changed
+        event.base_version = previous.base_version
+    elif previous.action == 'deleted' and event.action != 'deleted':
+        # Same id re-used within the transaction
+        event.action = 'updated'
+        event.changed = None
+    return event
+
+
+class NotificationBuffer(CommitBuffer):
+    """
+    Events queued during one transaction, each with the savepoint it was
+    queued in; coalesced by (model, id) on commit.
+    """
+    attr = '_core_notification_buffer'
+
+    def __init__(self, using):
+        super().__init__(using)
+        self.queued = []
+
+    def add(self, event):
+        self.queued.append((self.segment(), event))
+
+    def flush(self):
+        queued, self.queued = self.queued, []
+        events = {}
+        for segment, event in queued:
+            if not segment.live:
+                # Queued inside a savepoint that rolled back
+                continue
+            key = (event.model, event.pk)
+            previous = events.pop(key, None)
+            if previous is not None:
+                event = _merge(previous, event)
+            if event is not None:
+                events[key] = event
+        send_batch([(event.payload(), event.member_id) for event in events.values()])
+
+
+def queue(model, action, instance=None, serializer_class=None, data=None,
+          using=DEFAULT_DB_ALIAS, changed=None, base_version=None):
+    """
+    Queue a ``{'model', 'action', 'data'}`` notification for ``instance`` to
+    be broadcast when the current transaction commits.
+
+    For an update, ``changed`` (model field names) and ``base_version`` turn
+    it into a ``patched`` event with only the affected fields.
+    """
+    pk = instance.pk if instance is not None else (data or {}).get('id')
+    member_id = owner_id(instance) if instance is not None else None
+    event = _Event(
+        model, action, pk, member_id, instance, serializer_class, data,
+        changed=changed, base_version=base_version,
+    )
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        send_batch([(event.payload(), member_id)])
+        return
+    NotificationBuffer.current(using).add(event)
+
+
+def queue_saved(model, instance, created, serializer_class, using=DEFAULT_DB_ALIAS):
+    """post_save: queue ``created``, or an ``updated`` patch of the changed fields."""
+    if created:
+        queue(model, 'created', instance, serializer_class, using=using)
+        return
+    changed = getattr(instance, '_changed_fields', None)
+    if changed is not None and not changed:
+        # Saved without changes: nothing for clients to apply
+        return
+    queue(
+        model, 'updated', instance, serializer_class, using=using,
+        changed=changed, base_version=getattr(instance, '_base_version', None),
+    )
+
+
+def queue_bulk(model, action, ids, owners=None, using=DEFAULT_DB_ALIAS):
+    """
+    Queue one summarizing ``bulk_<action>`` notification for a bulk write of
+    ``ids``; clients refetch the affected list instead of applying N events.
+
+    ``owners`` maps id -> member id; each affected member's group gets a
+    summary limited to its own rows.
+    """
+    ids = list(ids)
+
+    def payload(row_ids):
+        return {
+            'model': model,
+            'action': f'bulk_{action}',
+            'data': {'count': len(row_ids), 'ids': row_ids},
+        }
+
+    def send():
+        _group_send(groups_for(model)[0], [payload(ids)])
+        per_member = {}
+        for pk, member_id in (owners or {}).items():
+            if member_id is not None and model not in STAFF_ONLY_TOPICS:
+                per_member.setdefault(member_id, []).append(pk)
+        metrics.broadcast_groups.observe(1 + len(per_member))
+        metrics.broadcast_events.observe(1)
+        for member_id, row_ids in per_member.items():
+            _group_send(member_group(member_id), [payload(row_ids)])
+
+    transaction.on_commit(send, using=using)
@@ -0,0 +1,200 @@
+"""
+Keyset (cursor) pagination for the core viewsets.
+
+Each viewset declares ``cursor_ordering``, a tuple of indexed columns ending in
+a unique one (``id``), e.g. ``('-payment_date', '-id')``. A page is fetched
+with a ``WHERE (payment_date, id) < (:last_date, :last_id)`` style predicate
+rather than an OFFSET, so its cost does not depend on how deep the client has
+paged and rows inserted meanwhile never shift or duplicate a page. An
+``?ordering=`` accepted by ``core.filters.KeysetOrderingFilter`` replaces
+``cursor_ordering`` for that request (and its cursors).
+
+Backwards compatibility: while ``PAGINATION_LEGACY_ARRAY`` is enabled, requests
+that pass neither ``cursor`` nor ``page_size`` still get the plain, unpaginated
+JSON array the React slices expect. Clients opt in by sending either
+parameter and get ``{"next", "previous", "results"}`` back.
+"""
+import base64
+import json
+import operator
+from urllib import parse
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    default_ordering = ('-id',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        max_page_size = getattr(settings, 'PAGINATION_MAX_PAGE_SIZE', 500)
+        page_size = api_settings.PAGE_SIZE or 100
+        if self.page_size_query_param in request.query_params:
+            try:
+                page_size = int(request.query_params[self.page_size_query_param])
+            except ValueError:
+                pass
+        return max(1, min(page_size, max_page_size))
+
+    def is_requested(self, request):
+        if not getattr(settings, 'PAGINATION_LEGACY_ARRAY', True):
+            return True
+        return (
+            self.cursor_query_param in request.query_params
+            or self.page_size_query_param in request.query_params
+        )
+
+    def get_ordering(self, view, queryset=None):
+        # An ordering requested with ?ordering= (core.filters) takes precedence
+        requested = tuple(queryset.query.order_by) if queryset is not None else ()
+        if requested and isinstance(requested[-1], str) and requested[-1].lstrip('-') in ('id', 'pk'):
+            return requested
+        ordering = tuple(getattr(view, 'cursor_ordering', self.default_ordering))
+        assert ordering[-1].lstrip('-') in ('id', 'pk'), (
+            'cursor_ordering must end in a unique column such as "id"'
+        )
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        return self._page(list(self._page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` for async views (core/async_views.py)."""
+        if not self.is_requested(request):
+            return None
+        return self._page([row async for row in self._page_queryset(queryset, request, view)])
+
+    def _page_queryset(self, queryset, request, view):
+        """The (unevaluated) query for the requested page, plus one row to detect more."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(view, queryset)
+        self.model = queryset.model
+
+        self.position, self.reverse = self.decode_cursor(request)
+        ordering = self.ordering if not self.reverse else tuple(_flip(o) for o in self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(_after(ordering, self.position))
+        return queryset[:self.page_size + 1]
+
+    def _page(self, rows):
+        position, reverse = self.position, self.reverse
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Forward: more rows ahead means a next page; having a cursor means a
+        # previous one. Reverse is the mirror image.
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = position is not None if not reverse else has_more
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self._position(self.page[0]), reverse=True)
+
+    def _position(self, obj):
+        # Model instances, or the .values() rows of core.fastpath
+        get = operator.getitem if isinstance(obj, dict) else getattr
+        return [
+            _to_json(get(obj, self.model._meta.get_field(_name(o)).attname))
+            for o in self.ordering
+        ]
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        token = base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            token = parse.unquote(token)
+            payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+            values = payload['p']
+            reverse = bool(payload.get('r'))
+            if len(values) != len(self.ordering):
+                raise ValueError
+            position = [
+                self.model._meta.get_field(_name(o)).to_python(value)
+                for o, value in zip(self.ordering, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+
+def _name(ordering):
+    name = ordering.lstrip('-')
+    return 'id' if name == 'pk' else name
+
+
+def _flip(ordering):
+    return ordering[1:] if ordering.startswith('-') else '-' + ordering
+
+
+def _after(ordering, position):
+    """
+    Lexicographic "comes after ``position`` in ``ordering``" predicate:
+    (a > x) OR (a = x AND b > y) OR ...
+
+    The redundant leading ``a >= x`` lets the database seek into the index
+    instead of filtering it from the start.
+    """
+    predicate = Q()
+    equal = {}
+    for o, value in zip(ordering, position):
+        lookup = 'lt' if o.startswith('-') else 'gt'
+        predicate |= Q(**equal, **{f'{_name(o)}__{lookup}': value})
+        equal[_name(o)] = value
+    first = ordering[0]
+    bound = 'lte' if first.startswith('-') else 'gte'
+    return Q(**{f'{_name(first)}__{bound}': position[0]}) & predicate
+
+
+def _to_json(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
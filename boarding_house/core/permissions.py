@@ -1,5 +1,5 @@
 from rest_framework import permissions
-from .models import UserProfile
+from . import roles
 
 
 class IsAdmin(permissions.BasePermission):
@@ -7,14 +7,8 @@ class IsAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
             return False
-        
-        # Create profile if it doesn't exist (backward compatibility)
-        profile, created = UserProfile.objects.get_or_create(
-            user=request.user,
-            defaults={'role': 'admin' if request.user.is_superuser else 'member'}
-        )
-        
-        return profile.is_admin
+
+        return roles.is_admin(request)
 
 
 class IsStaff(permissions.BasePermission):
@@ -22,20 +16,8 @@ class IsStaff(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
             return False
-        
-        # Create profile if it doesn't exist (backward compatibility)
-        # Superusers default to admin, others default to member
-        profile, created = UserProfile.objects.get_or_create(
-            user=request.user,
-            defaults={'role': 'admin' if request.user.is_superuser else 'member'}
-        )
-        
-        # If user is superuser but profile says member, upgrade to admin
-        if request.user.is_superuser and not profile.is_admin:
-            profile.role = 'admin'
-            profile.save()
-        
-        return profile.is_staff
+
+        return roles.is_staff(request)
 
 
 class IsMember(permissions.BasePermission):
@@ -43,14 +25,8 @@ class IsMember(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
             return False
-        
-        # Create profile if it doesn't exist
-        profile, created = UserProfile.objects.get_or_create(
-            user=request.user,
-            defaults={'role': 'admin' if request.user.is_superuser else 'member'}
-        )
-        
-        return profile.is_member
+
+        return roles.is_member(request)
 
 
 class IsOwnerOrStaff(permissions.BasePermission):
@@ -58,47 +34,19 @@ class IsOwnerOrStaff(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
             return False
-        
-        # Create profile if it doesn't exist
-        profile, created = UserProfile.objects.get_or_create(
-            user=request.user,
-            defaults={'role': 'admin' if request.user.is_superuser else 'member'}
-        )
-        
-        # If user is superuser but profile says member, upgrade to admin
-        if request.user.is_superuser and not profile.is_admin:
-            profile.role = 'admin'
-            profile.save()
-        
-        # Staff and admin can access all
-        if profile.is_staff:
-            return True
-        
-        # Members can only access their own data
-        if profile.is_member:
-            return True
-        
-        return False
-    
+
+        # Staff and admin can access all; members only their own data
+        return roles.get_role(request) in ('admin', 'staff', 'member')
+
     def has_object_permission(self, request, view, obj):
-        # Get or create profile
-        profile, created = UserProfile.objects.get_or_create(
-            user=request.user,
-            defaults={'role': 'admin' if request.user.is_superuser else 'member'}
-        )
-        
         # Staff and admin can access all
-        if profile.is_staff:
+        if roles.is_staff(request):
             return True
-        
+
         # Members can only access their own data
-        if profile.is_member:
+        if roles.is_member(request):
             # Check if the object belongs to the member
-            if hasattr(obj, 'member'):
-                member = obj.member
-                if hasattr(member, 'user') and member.user == request.user:
-                    return True
-            return False
-        
-        return False
+            member_id = roles.get_member_id(request)
+            return member_id is not None and getattr(obj, 'member_id', None) == member_id
 
+        return False
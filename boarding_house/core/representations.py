@@ -0,0 +1,158 @@
+"""
+Shared cache of serialized rows.
+
+A saved row is serialized once for its broadcast (``core/notifications.py``)
+and then again by every client's GET. ``cache`` keeps each row's
+representation, keyed by ``(model, pk)`` and stamped with the row's
+``version`` plus the version of every related row its serializer reads
+(``Meta.related_fields``, e.g. the member behind ``member_name``). An entry
+is only served while its stamp matches the row being represented, so:
+
+* a save that changes the row bumps its version in the UPDATE itself
+  (``core/versioning.py``), so concurrent saves never share a stamp; the
+  post_save handler also evicts the entry at once, and the broadcast
+  overwrites it with the saved row's representation (``store``) when the
+  transaction commits;
+* renaming a member bumps the member's version, which is part of the stamp
+  of that member's payments, bills and repairs: their old entries
+  (``member_name``/``member_email``/``member_room``) stop matching,
+  without this process having to know which ones they are, and in other
+  worker processes too;
+* deletes evict the entry.
+
+The cache holds at most ``REPRESENTATION_CACHE_SIZE`` rows (0 disables it)
+and evicts the least recently used. Served data is copied, so callers may
+modify it. ``RepresentationCacheMixin`` routes a viewset's ``retrieve`` and
+serializer-built lists through it; the payment, bill and repair lists
+built from ``.values()`` rows (``core/fastpath.py``) are cheaper to build
+than to look up and bypass it.
+"""
+import functools
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.response import Response
+
+from .versioning import VERSION_FIELD
+
+
+class RepresentationCache:
+    """LRU of ``(model, pk) -> (stamp, data)``."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, model, pk, stamp):
+        key = (model, pk)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != stamp:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, model, pk, stamp, data):
+        if self.maxsize <= 0:
+            return
+        key = (model, pk)
+        with self._lock:
+            self._entries[key] = (stamp, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def evict(self, model, pks):
+        with self._lock:
+            for pk in pks:
+                self._entries.pop((model, pk), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+cache = RepresentationCache(getattr(settings, 'REPRESENTATION_CACHE_SIZE', 10000))
+
+
+def cacheable(serializer_class):
+    model = serializer_class.Meta.model
+    return any(field.attname == VERSION_FIELD for field in model._meta.concrete_fields)
+
+
+@functools.cache
+def template(serializer_class):
+    """One bound serializer per class; ``to_representation`` keeps no state."""
+    return serializer_class()
+
+
+def stamp(serializer_class, instance):
+    """The row's version, then the version of each related row it is serialized with."""
+    values = [getattr(instance, VERSION_FIELD)]
+    for relation in getattr(serializer_class.Meta, 'related_fields', None) or ():
+        related = None
+        if getattr(instance, instance._meta.get_field(relation).attname) is not None:
+            related = getattr(instance, relation)
+        values.append(getattr(related, VERSION_FIELD, None))
+    return tuple(values)
+
+
+def represent(serializer_class, instance):
+    """``serializer_class(instance).data``, served from the cache when current."""
+    if not cacheable(serializer_class):
+        return serializer_class(instance).data
+    model, current = instance._meta.model_name, stamp(serializer_class, instance)
+    data = cache.get(model, instance.pk, current)
+    if data is None:
+        data = template(serializer_class).to_representation(instance)
+        cache.put(model, instance.pk, current, data)
+    return dict(data)
+
+
+def store(serializer_class, instance):
+    """
+    ``serializer_class(instance).data`` of a row just saved, replacing any
+    cached entry: the saved instance is the authority, not an entry that
+    happens to carry the same stamp.
+    """
+    data = template(serializer_class).to_representation(instance)
+    if cacheable(serializer_class):
+        cache.put(instance._meta.model_name, instance.pk, stamp(serializer_class, instance), data)
+    return dict(data)
+
+
+def represent_many(serializer_class, instances):
+    return [represent(serializer_class, instance) for instance in instances]
+
+
+class RepresentationCacheMixin:
+    """
+    ``retrieve`` and ``list`` (sync and async) through ``cache``. The
+    serializer must not depend on the request context.
+    """
+
+    def represent_object(self, obj):
+        return represent(self.get_serializer_class(), obj)
+
+    def represent_many(self, objs):
+        return represent_many(self.get_serializer_class(), objs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(self.represent_object(self.get_object()))
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.represent_many(page))
+        return Response(self.represent_many(queryset))
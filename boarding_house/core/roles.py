@@ -0,0 +1,299 @@
+"""
+Role resolution for the permission layer.
+
+Every permission class and member-scoped ``get_queryset`` needs to know the
+caller's role (admin / staff / member) and, for members, which ``Member`` row
+they own. Resolving that from the database on every hit costs one or more
+queries per request, so it is resolved here once and reused:
+
+1. per request  - the result is memoised on the request object;
+2. per process  - a bounded LRU keyed by user id, invalidated by the
+   ``UserProfile`` / ``Member`` signal handlers in ``core/signals.py``;
+3. per token    - when ``ROLE_CLAIMS_FROM_TOKEN`` is enabled the role and
+   member id are read straight from the SimpleJWT access token claims
+   (see ``RoleTokenObtainPairSerializer``), unless the user's role changed
+   after the claims were minted (``role_changes``).
+
+The process cache is per worker, so ``ROLE_CACHE_TTL`` bounds how long a role
+change made in another process can go unnoticed. Token claims are resolved
+again for every refreshed access token (never copied from the refresh
+token), so there ``ACCESS_TOKEN_LIFETIME`` bounds it.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+
+from .commits import CommitBuffer
+from .models import Member, UserProfile
+
+
+RoleInfo = namedtuple('RoleInfo', ['role', 'member_id'])
+
+ROLE_CLAIM = 'role'
+MEMBER_CLAIM = 'member_id'
+# When the role claims were resolved (epoch seconds); copied on refresh
+ROLE_AT_CLAIM = 'role_at'
+
+_REQUEST_ATTR = '_core_role_info'
+
+
+class RoleCache:
+    """Thread-safe LRU of user id -> (RoleInfo, expiry)."""
+
+    def __init__(self, max_size=1024, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is None:
+                return None
+            info, expires = entry
+            if expires < time.monotonic():
+                del self._data[user_id]
+                return None
+            self._data.move_to_end(user_id)
+            return info
+
+    def set(self, user_id, info):
+        with self._lock:
+            self._data[user_id] = (info, time.monotonic() + self.ttl)
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RoleChanges:
+    """
+    When each user's role or member link last changed in this process, so
+    token claims resolved before that are not trusted. Entries are kept as
+    long as an access token lives; past ``max_size`` the oldest are folded
+    into ``floor``, which distrusts every token minted before it.
+    """
+
+    def __init__(self, max_size=10000, retention=86400):
+        self.max_size = max_size
+        self.retention = retention
+        self.floor = None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, user_id):
+        now = time.time()
+        with self._lock:
+            self._data[user_id] = now
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.max_size:
+                _, changed = self._data.popitem(last=False)
+                self.floor = max(self.floor or 0, changed)
+
+    def record_all(self):
+        with self._lock:
+            self.floor = time.time()
+
+    def trusts(self, user_id, claimed_at):
+        """Whether claims resolved at ``claimed_at`` are newer than the last change."""
+        horizon = time.time() - self.retention
+        with self._lock:
+            while self._data and next(iter(self._data.values())) < horizon:
+                self._data.popitem(last=False)
+            if self.floor is not None and self.floor < horizon:
+                self.floor = None
+            changes = [at for at in (self.floor, self._data.get(user_id)) if at is not None]
+        if not changes:
+            return True
+        return claimed_at is not None and claimed_at > max(changes)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.floor = None
+
+
+role_cache = RoleCache(
+    max_size=getattr(settings, 'ROLE_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'ROLE_CACHE_TTL', 300),
+)
+role_changes = RoleChanges(
+    retention=getattr(settings, 'SIMPLE_JWT', {}).get('ACCESS_TOKEN_LIFETIME', timedelta(minutes=5)).total_seconds(),
+)
+
+
+def _load_role_info(user):
+    """Resolve role and member id from the database (cache miss path)."""
+    # Create profile if it doesn't exist (backward compatibility)
+    # Superusers default to admin, others default to member
+    profile, created = UserProfile.objects.get_or_create(
+        user=user,
+        defaults={'role': 'admin' if user.is_superuser else 'member'}
+    )
+
+    # If user is superuser but profile says member, upgrade to admin
+    if user.is_superuser and not profile.is_admin:
+        profile.role = 'admin'
+        profile.save(update_fields=['role'])
+
+    member_id = None
+    if profile.is_member:
+        member_id = Member.objects.filter(user=user).values_list('id', flat=True).first()
+    return RoleInfo(profile.role, member_id)
+
+
+def role_info_from_token(user, token):
+    """
+    ``RoleInfo`` from the role claims of ``token`` (a validated access token
+    or its claims mapping) for ``user``, or ``None`` when they are missing or
+    no longer trusted and the role has to be resolved from the database.
+    """
+    if token is None or not hasattr(token, 'get'):
+        return None
+    role = token.get(ROLE_CLAIM)
+    if role not in dict(UserProfile.ROLE_CHOICES):
+        return None
+    if not role_changes.trusts(user.pk, token.get(ROLE_AT_CLAIM)):
+        return None
+    return RoleInfo(role, token.get(MEMBER_CLAIM))
+
+
+def get_user_role_info(user):
+    """Return the cached ``RoleInfo`` for ``user``, loading it on a miss."""
+    info = role_cache.get(user.pk)
+    if info is None:
+        info = _load_role_info(user)
+        role_cache.set(user.pk, info)
+    return info
+
+
+def get_role_info(request):
+    """
+    Return the ``RoleInfo`` for the authenticated user of ``request``, or
+    ``None`` for anonymous requests.
+    """
+    info = getattr(request, _REQUEST_ATTR, None)
+    if info is not None:
+        return info
+
+    user = getattr(request, 'user', None)
+    if not user or not user.is_authenticated:
+        return None
+
+    if getattr(settings, 'ROLE_CLAIMS_FROM_TOKEN', False):
+        info = role_info_from_token(user, getattr(request, 'auth', None))
+    if info is None:
+        info = get_user_role_info(user)
+
+    setattr(request, _REQUEST_ATTR, info)
+    return info
+
+
+async def aget_role_info(request):
+    """
+    ``get_role_info`` for async views. Memoised on the request the same way,
+    so the sync permission and queryset code that runs afterwards reads it
+    without touching the database; only a process cache miss is loaded
+    through the thread pool.
+    """
+    info = getattr(request, _REQUEST_ATTR, None)
+    if info is not None:
+        return info
+
+    user = getattr(request, 'user', None)
+    if not user or not user.is_authenticated:
+        return None
+
+    if getattr(settings, 'ROLE_CLAIMS_FROM_TOKEN', False):
+        info = role_info_from_token(user, getattr(request, 'auth', None))
+    if info is None:
+        info = role_cache.get(user.pk)
+    if info is None:
+        info = await sync_to_async(get_user_role_info)(user)
+
+    setattr(request, _REQUEST_ATTR, info)
+    return info
+
+
+def get_role(request):
+    info = get_role_info(request)
+    return info.role if info else None
+
+
+def is_admin(request):
+    return get_role(request) == 'admin'
+
+
+def is_staff(request):
+    return get_role(request) in ('admin', 'staff')
+
+
+def is_member(request):
+    return get_role(request) == 'member'
+
+
+def get_member_id(request):
+    """Member id owned by a member-role caller, ``None`` for staff/anonymous."""
+    info = get_role_info(request)
+    return info.member_id if info else None
+
+
+class _Invalidations(CommitBuffer):
+    """Roles dropped during a transaction, dropped again once it commits."""
+    attr = '_core_role_invalidations'
+
+    def __init__(self, using):
+        super().__init__(using)
+        self.user_ids = set()
+        self.everyone = False
+
+    def flush(self):
+        # Again, in case a concurrent request re-cached (or minted) the old row
+        if self.everyone:
+            role_cache.clear()
+            role_changes.record_all()
+        for user_id in self.user_ids:
+            role_cache.invalidate(user_id)
+            role_changes.record(user_id)
+
+
+def _after_commit():
+    """The invalidations to repeat on commit, or ``None`` outside a transaction."""
+    if transaction.get_connection().in_atomic_block:
+        return _Invalidations.current()
+    return None
+
+
+def invalidate_user(user_id):
+    """Drop the cached role of ``user_id`` (called from signal handlers)."""
+    if user_id is not None:
+        role_cache.invalidate(user_id)
+        role_changes.record(user_id)
+        pending = _after_commit()
+        if pending is not None:
+            pending.user_ids.add(user_id)
+
+
+def invalidate_all():
+    """Drop every cached role (after bulk writes that may re-link members)."""
+    role_cache.clear()
+    role_changes.record_all()
+    pending = _after_commit()
+    if pending is not None:
+        pending.everyone = True
@@ -1,6 +1,11 @@
+import time
+
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
 from django.contrib.auth.models import User
-from .models import Member, Schedule, Payment, Bill, Repair, UserProfile
+from .models import Member, Schedule, Payment, Bill, Repair, UserProfile, MeterUsage, normalize_month
 
 
 class UserProfileSerializer(serializers.ModelSerializer):
@@ -17,22 +22,86 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 'profile']
 
 
-class MemberSerializer(serializers.ModelSerializer):
+def _with_role_claims(access, user):
+    """``access`` (an encoded access token) with the user's current role claims added."""
+    from .roles import get_user_role_info, ROLE_CLAIM, MEMBER_CLAIM, ROLE_AT_CLAIM
+
+    token = AccessToken(access, verify=False)
+    resolved_at = time.time()
+    info = get_user_role_info(user)
+    token[ROLE_CLAIM] = info.role
+    token[MEMBER_CLAIM] = info.member_id
+    token[ROLE_AT_CLAIM] = resolved_at
+    return str(token)
+
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Embed the user's role (and member id) as access token claims for
+    core.roles. Not in the refresh token: SimpleJWT would copy them into every
+    access token refreshed from it, for the whole refresh lifetime.
+    """
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        data['access'] = _with_role_claims(data['access'], self.user)
+        return data
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    """Resolve the role claims again for each refreshed access token"""
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        user_id = AccessToken(data['access'], verify=False)[jwt_settings.USER_ID_CLAIM]
+        user = User.objects.get(**{jwt_settings.USER_ID_FIELD: user_id})
+        data['access'] = _with_role_claims(data['access'], user)
+        return data
+
+
+class QueryPlanMixin:
+    """
+    Declarative query plan for serializers that read through relations.
+
+    A serializer lists the related objects (and the columns of each) that its
+    ``source=`` fields touch in ``Meta.related_fields``::
+
+        related_fields = {'member': ['name', 'email', 'room_number']}
+
+    ``plan_queryset`` turns that into ``select_related`` + ``only()`` so a list
+    endpoint costs one query regardless of row count.
+    """
+
+    @classmethod
+    def plan_queryset(cls, queryset):
+        related_fields = getattr(cls.Meta, 'related_fields', None)
+        if not related_fields:
+            return queryset
+        own_fields = [f.name for f in queryset.model._meta.concrete_fields]
+        joined_fields = [
+            f'{relation}__{field}'
+            for relation, fields in related_fields.items()
+            for field in fields
+        ]
+        return queryset.select_related(*related_fields).only(*own_fields, *joined_fields)
+
+
+class MemberSerializer(QueryPlanMixin, serializers.ModelSerializer):
     class Meta:
         model = Member
         fields = '__all__'
 
 
-class ScheduleSerializer(serializers.ModelSerializer):
+class ScheduleSerializer(QueryPlanMixin, serializers.ModelSerializer):
     member_name = serializers.CharField(source='assigned_to.name', read_only=True)
     member_room = serializers.CharField(source='assigned_to.room_number', read_only=True)
     
     class Meta:
         model = Schedule
         fields = '__all__'
+        # version: stamps cached representations (core/representations.py)
+        related_fields = {'assigned_to': ['name', 'room_number', 'version']}
 
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(QueryPlanMixin, serializers.ModelSerializer):
     member_name = serializers.CharField(source='member.name', read_only=True)
     member_email = serializers.CharField(source='member.email', read_only=True)
     member_room = serializers.CharField(source='member.room_number', read_only=True)
@@ -40,9 +109,10 @@ class PaymentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Payment
         fields = '__all__'
+        related_fields = {'member': ['name', 'email', 'room_number', 'version']}
 
 
-class BillSerializer(serializers.ModelSerializer):
+class BillSerializer(QueryPlanMixin, serializers.ModelSerializer):
     member_name = serializers.CharField(source='member.name', read_only=True)
     member_email = serializers.CharField(source='member.email', read_only=True)
     member_room = serializers.CharField(source='member.room_number', read_only=True)
@@ -50,9 +120,13 @@ class BillSerializer(serializers.ModelSerializer):
     class Meta:
         model = Bill
         fields = '__all__'
+        related_fields = {'member': ['name', 'email', 'room_number', 'version']}
 
+    def validate_month(self, value):
+        return normalize_month(value)
 
-class RepairSerializer(serializers.ModelSerializer):
+
+class RepairSerializer(QueryPlanMixin, serializers.ModelSerializer):
     member_name = serializers.CharField(source='member.name', read_only=True)
     member_email = serializers.CharField(source='member.email', read_only=True)
     member_room = serializers.CharField(source='member.room_number', read_only=True)
@@ -60,3 +134,20 @@ class RepairSerializer(serializers.ModelSerializer):
     class Meta:
         model = Repair
         fields = '__all__'
+        related_fields = {'member': ['name', 'email', 'room_number', 'version']}
+
+
+class MeterUsageSerializer(serializers.ModelSerializer):
+    room = serializers.CharField(source='room_number')
+    meter = serializers.SerializerMethodField()
+    period = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MeterUsage
+        fields = ['room', 'meter', 'period', 'start', 'usage', 'readings']
+
+    def get_meter(self, obj):
+        return obj.get_meter_display().lower()
+
+    def get_period(self, obj):
+        return obj.get_period_display().lower()
@@ -1,128 +1,193 @@
-from django.db.models.signals import post_save, post_delete
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
 from .models import Member, Schedule, Payment, Bill, Repair, UserProfile
 from .serializers import (
     MemberSerializer, ScheduleSerializer, PaymentSerializer, 
     BillSerializer, RepairSerializer
 )
+from . import changes, notifications, representations, roles, summary, versioning
+from .notifications import send_notification  # noqa: F401  (public API)
+
+
+_handlers_suppressed = ContextVar('core_row_handlers_suppressed', default=False)
+
 
+@contextmanager
+def suppress_row_handlers():
+    """
+    Skip the per-row Member/Schedule/Payment/Bill/Repair handlers below.
 
-def send_notification(payload: dict):
-    """Send a JSON payload to the 'notifications' group via channel layer."""
-    channel_layer = get_channel_layer()
-    if channel_layer is None:
-        return
-    async_to_sync(channel_layer.group_send)(
-        'notifications',
-        {
-            'type': 'broadcast.message',
-            'message': payload,
-        },
-    )
+    For bulk writes that update the dashboard summary, role cache and
+    notifications once for the whole batch instead (see core/bulk.py).
+    """
+    token = _handlers_suppressed.set(True)
+    try:
+        yield
+    finally:
+        _handlers_suppressed.reset(token)
+
+
+def row_handler(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _handlers_suppressed.get():
+            return
+        return func(*args, **kwargs)
+    return wrapper
 
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     """Create UserProfile when a User is created"""
+    # is_superuser may have changed (or a deleted user's id been reused)
+    roles.invalidate_user(instance.pk)
     if created:
-        # Default to admin role for first user, otherwise member
-        role = 'admin' if User.objects.count() == 1 else 'member'
+        # Default to admin role for first user, otherwise member (an indexed
+        # EXISTS rather than counting the whole table on every signup)
+        is_first = not User.objects.exclude(pk=instance.pk).exists()
+        role = 'admin' if is_first else 'member'
         UserProfile.objects.get_or_create(user=instance, defaults={'role': role})
 
 
+@receiver(pre_delete, sender=User)
+def user_pre_delete(sender, instance, **kwargs):
+    # Member.user is SET_NULL: cleared by one UPDATE that sends no Member signals
+    member_ids = list(Member.objects.filter(user=instance).values_list('pk', flat=True))
+    if member_ids:
+        Member.objects.filter(pk__in=member_ids).update(version=F('version') + 1)
+        representations.cache.evict('member', member_ids)
+        changes.record_unlinked(member_ids)
+
+
+@receiver(post_delete, sender=User)
+def user_post_delete(sender, instance, **kwargs):
+    roles.invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def user_profile_changed(sender, instance: UserProfile, **kwargs):
+    roles.invalidate_user(instance.user_id)
+
+
+@receiver(pre_save, sender=Member)
+@row_handler
+def member_pre_save(sender, instance: Member, **kwargs):
+    stored = versioning.remember_previous(instance)
+    # Invalidate the previously linked user if the member is re-linked
+    instance._previous_user_id = stored['user_id'] if stored else None
+    summary.remember_previous(instance, stored)
+
+
+@receiver(pre_save, sender=Schedule)
+@receiver(pre_save, sender=Payment)
+@receiver(pre_save, sender=Bill)
+@receiver(pre_save, sender=Repair)
+@row_handler
+def row_pre_save(sender, instance, **kwargs):
+    stored = versioning.remember_previous(instance)
+    summary.remember_previous(instance, stored)
+
+
 @receiver(post_save, sender=Member)
+@row_handler
 def member_post_save(sender, instance: Member, created, **kwargs):
-    serializer = MemberSerializer(instance)
-    send_notification({
-        'model': 'member',
-        'action': 'created' if created else 'updated',
-        'data': serializer.data,
-    })
+    versioning.settle(instance)
+    summary.record_change(instance)
+    roles.invalidate_user(instance.user_id)
+    roles.invalidate_user(getattr(instance, '_previous_user_id', None))
+    changes.record_save('member', instance, created)
+    representations.cache.evict('member', [instance.pk])
+    notifications.queue_saved('member', instance, created, MemberSerializer)
 
 
 @receiver(post_delete, sender=Member)
+@row_handler
 def member_post_delete(sender, instance: Member, **kwargs):
-    send_notification({
-        'model': 'member',
-        'action': 'deleted',
-        'data': {'id': instance.id},
-    })
+    summary.record_change(instance, deleted=True)
+    roles.invalidate_user(instance.user_id)
+    changes.record_delete('member', instance)
+    representations.cache.evict('member', [instance.pk])
+    notifications.queue('member', 'deleted', instance)
 
 
 @receiver(post_save, sender=Schedule)
+@row_handler
 def schedule_post_save(sender, instance: Schedule, created, **kwargs):
-    serializer = ScheduleSerializer(instance)
-    send_notification({
-        'model': 'schedule',
-        'action': 'created' if created else 'updated',
-        'data': serializer.data,
-    })
+    versioning.settle(instance)
+    summary.record_change(instance)
+    changes.record_save('schedule', instance, created)
+    representations.cache.evict('schedule', [instance.pk])
+    notifications.queue_saved('schedule', instance, created, ScheduleSerializer)
 
 
 @receiver(post_delete, sender=Schedule)
+@row_handler
 def schedule_post_delete(sender, instance: Schedule, **kwargs):
-    send_notification({
-        'model': 'schedule',
-        'action': 'deleted',
-        'data': {'id': instance.id},
-    })
+    summary.record_change(instance, deleted=True)
+    changes.record_delete('schedule', instance)
+    representations.cache.evict('schedule', [instance.pk])
+    notifications.queue('schedule', 'deleted', instance)
 
 
 @receiver(post_save, sender=Payment)
+@row_handler
 def payment_post_save(sender, instance: Payment, created, **kwargs):
-    serializer = PaymentSerializer(instance)
-    send_notification({
-        'model': 'payment',
-        'action': 'created' if created else 'updated',
-        'data': serializer.data,
-    })
+    versioning.settle(instance)
+    summary.record_change(instance)
+    changes.record_save('payment', instance, created)
+    representations.cache.evict('payment', [instance.pk])
+    notifications.queue_saved('payment', instance, created, PaymentSerializer)
 
 
 @receiver(post_delete, sender=Payment)
+@row_handler
 def payment_post_delete(sender, instance: Payment, **kwargs):
-    send_notification({
-        'model': 'payment',
-        'action': 'deleted',
-        'data': {'id': instance.id},
-    })
+    summary.record_change(instance, deleted=True)
+    changes.record_delete('payment', instance)
+    representations.cache.evict('payment', [instance.pk])
+    notifications.queue('payment', 'deleted', instance)
 
 
 @receiver(post_save, sender=Bill)
+@row_handler
 def bill_post_save(sender, instance: Bill, created, **kwargs):
-    serializer = BillSerializer(instance)
-    send_notification({
-        'model': 'bill',
-        'action': 'created' if created else 'updated',
-        'data': serializer.data,
-    })
+    versioning.settle(instance)
+    summary.record_change(instance)
+    changes.record_save('bill', instance, created)
+    representations.cache.evict('bill', [instance.pk])
+    notifications.queue_saved('bill', instance, created, BillSerializer)
 
 
 @receiver(post_delete, sender=Bill)
+@row_handler
 def bill_post_delete(sender, instance: Bill, **kwargs):
-    send_notification({
-        'model': 'bill',
-        'action': 'deleted',
-        'data': {'id': instance.id},
-    })
+    summary.record_change(instance, deleted=True)
+    changes.record_delete('bill', instance)
+    representations.cache.evict('bill', [instance.pk])
+    notifications.queue('bill', 'deleted', instance)
 
 
 @receiver(post_save, sender=Repair)
+@row_handler
 def repair_post_save(sender, instance: Repair, created, **kwargs):
-    serializer = RepairSerializer(instance)
-    send_notification({
-        'model': 'repair',
-        'action': 'created' if created else 'updated',
-        'data': serializer.data,
-    })
+    versioning.settle(instance)
+    summary.record_change(instance)
+    changes.record_save('repair', instance, created)
+    representations.cache.evict('repair', [instance.pk])
+    notifications.queue_saved('repair', instance, created, RepairSerializer)
 
 
 @receiver(post_delete, sender=Repair)
+@row_handler
 def repair_post_delete(sender, instance: Repair, **kwargs):
-    send_notification({
-        'model': 'repair',
-        'action': 'deleted',
-        'data': {'id': instance.id},
-    })
+    summary.record_change(instance, deleted=True)
+    changes.record_delete('repair', instance)
+    representations.cache.evict('repair', [instance.pk])
+    notifications.queue('repair', 'deleted', instance)
@@ -0,0 +1,258 @@
+"""
+Incrementally maintained dashboard summary.
+
+``DashboardSummary`` holds the dashboard counters in one row and
+``ScheduleDayStats`` the per-date schedule counts. Instead of re-aggregating
+the main tables on every ``/api/dashboard/stats/`` call, the signal handlers
+in ``core/signals.py`` call ``remember_previous`` (pre_save) and
+``record_change`` (post_save / post_delete). Each write then applies the
+difference between a row's old and new contribution with ``F()`` updates, in
+the same transaction as the write itself.
+
+``rebuild`` recomputes everything from the main tables; ``drift`` compares
+that with the stored values (see the ``rebuild_dashboard_summary`` command).
+Bulk writes that bypass model signals must call ``rebuild`` (or
+``apply_deltas``) themselves.
+"""
+from collections import Counter
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import (
+    Member, Schedule, Payment, Bill, Repair, DashboardSummary, ScheduleDayStats,
+)
+
+
+SUMMARY_PK = 1
+
+# Per model: the columns a row's contribution depends on, and the function
+# mapping those column values to {DashboardSummary field: amount}.
+CONTRIBUTIONS = {
+    Member: (
+        ('status',),
+        lambda row: {
+            'total_members': 1,
+            'active_members': int(row['status'] == 'Active'),
+        },
+    ),
+    Payment: (
+        ('status', 'amount'),
+        lambda row: {
+            'pending_payments': int(row['status'] == 'Unpaid'),
+            'pending_payment_amount': _to_decimal(row['amount']) if row['status'] == 'Unpaid' else 0,
+        },
+    ),
+    Repair: (
+        ('status',),
+        lambda row: {'pending_repairs': int(row['status'] == 'Pending')},
+    ),
+    Bill: (
+        ('paid_status', 'balance'),
+        lambda row: {
+            'unpaid_bills': int(row['paid_status'] == 'Unpaid'),
+            'unpaid_bill_amount': _to_decimal(row['balance']) if row['paid_status'] == 'Unpaid' else 0,
+        },
+    ),
+}
+
+SCHEDULE_FIELDS = ('date', 'completed')
+
+
+def _fields_for(model):
+    if model is Schedule:
+        return SCHEDULE_FIELDS
+    return CONTRIBUTIONS[model][0]
+
+
+def _row(instance, fields):
+    return {field: getattr(instance, field) for field in fields}
+
+
+def _to_decimal(value):
+    return value if isinstance(value, Decimal) else Decimal(str(value or 0))
+
+
+def remember_previous(instance, stored_row=None):
+    """
+    pre_save: stash the stored row's tracked columns on ``instance``.
+
+    ``stored_row`` is the row already loaded by the caller, if any (see
+    ``versioning.remember_previous``); otherwise it is queried.
+    """
+    model = type(instance)
+    if instance.pk is None or instance._state.adding:
+        instance._summary_previous = None
+        return
+    fields = _fields_for(model)
+    if stored_row is not None:
+        instance._summary_previous = {field: stored_row[field] for field in fields}
+        return
+    instance._summary_previous = model.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+def record_change(instance, deleted=False):
+    """post_save / post_delete: apply this row's contribution delta."""
+    model = type(instance)
+    fields = _fields_for(model)
+    if deleted:
+        old, new = _row(instance, fields), None
+    else:
+        old, new = getattr(instance, '_summary_previous', None), _row(instance, fields)
+        instance._summary_previous = new
+    record_rows(model, [old] if old else [], [new] if new else [])
+
+
+def record_rows(model, old_rows=(), new_rows=()):
+    """
+    Apply the combined delta of replacing ``old_rows`` by ``new_rows`` (dicts
+    of the tracked columns, see ``tracked_fields``) in a single update.
+    """
+    if model is Schedule:
+        day_deltas = {}
+        for rows, sign in ((old_rows, -1), (new_rows, 1)):
+            for row in rows:
+                total, completed = day_deltas.get(row['date'], (0, 0))
+                day_deltas[row['date']] = (
+                    total + sign, completed + sign * int(bool(row['completed'])),
+                )
+        apply_deltas({}, day_deltas)
+        return
+
+    contribute = CONTRIBUTIONS[model][1]
+    deltas = Counter()
+    for row in new_rows:
+        deltas.update(contribute(row))
+    for row in old_rows:
+        deltas.subtract(contribute(row))
+    apply_deltas(deltas)
+
+
+def tracked_fields(model):
+    """Columns of ``model`` the summary depends on."""
+    return _fields_for(model)
+
+
+def row_of(instance):
+    return _row(instance, _fields_for(type(instance)))
+
+
+def apply_deltas(deltas, day_deltas=None):
+    """
+    Add ``deltas`` ({summary field: amount}) to the summary row and
+    ``day_deltas`` ({date: (total, completed)}) to the schedule day rows.
+    """
+    deltas = {field: amount for field, amount in deltas.items() if amount}
+    with transaction.atomic():
+        if deltas:
+            updated = DashboardSummary.objects.filter(pk=SUMMARY_PK).update(
+                **{field: F(field) + amount for field, amount in deltas.items()}
+            )
+            if not updated:
+                # First write ever: the rebuild already includes this change
+                rebuild()
+                return
+        for date, (total, completed) in (day_deltas or {}).items():
+            _bump_day(date, total, completed)
+
+
+def _bump_day(date, total, completed):
+    if not total and not completed:
+        return
+    changes = {'total': F('total') + total, 'completed': F('completed') + completed}
+    if ScheduleDayStats.objects.filter(date=date).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            ScheduleDayStats.objects.create(date=date, total=total, completed=completed)
+    except IntegrityError:
+        # Created concurrently
+        ScheduleDayStats.objects.filter(date=date).update(**changes)
+
+
+def compute():
+    """Aggregate the summary from the main tables (one query per model)."""
+    members = Member.objects.aggregate(
+        total=Count('id'), active=Count('id', filter=Q(status='Active')),
+    )
+    payments = Payment.objects.filter(status='Unpaid').aggregate(
+        count=Count('id'), amount=Sum('amount'),
+    )
+    bills = Bill.objects.filter(paid_status='Unpaid').aggregate(
+        count=Count('id'), amount=Sum('balance'),
+    )
+    summary = {
+        'total_members': members['total'],
+        'active_members': members['active'],
+        'pending_payments': payments['count'],
+        'pending_payment_amount': _to_decimal(payments['amount']),
+        'pending_repairs': Repair.objects.filter(status='Pending').count(),
+        'unpaid_bills': bills['count'],
+        'unpaid_bill_amount': _to_decimal(bills['amount']),
+    }
+    days = {
+        row['date']: (row['total'], row['completed'])
+        for row in Schedule.objects.values('date').annotate(
+            total=Count('id'), completed=Count('id', filter=Q(completed=True)),
+        )
+    }
+    return summary, days
+
+
+def rebuild():
+    """Recompute the summary and schedule day rows from scratch."""
+    summary, days = compute()
+    with transaction.atomic():
+        DashboardSummary.objects.update_or_create(pk=SUMMARY_PK, defaults=summary)
+        ScheduleDayStats.objects.exclude(date__in=list(days)).delete()
+        for date, (total, completed) in days.items():
+            ScheduleDayStats.objects.update_or_create(
+                date=date, defaults={'total': total, 'completed': completed},
+            )
+    return summary, days
+
+
+def drift():
+    """
+    Return ``{name: (stored, actual)}`` for every counter that differs from a
+    fresh aggregate; empty when the summary is consistent.
+    """
+    summary, days = compute()
+    stored = DashboardSummary.objects.filter(pk=SUMMARY_PK).values(*summary).first() or {}
+    diffs = {
+        field: (stored.get(field), value)
+        for field, value in summary.items()
+        if stored.get(field) != value
+    }
+    stored_days = {
+        row['date']: (row['total'], row['completed'])
+        for row in ScheduleDayStats.objects.values('date', 'total', 'completed')
+    }
+    for date in set(days) | set(stored_days):
+        actual = days.get(date, (0, 0))
+        if stored_days.get(date, (0, 0)) != actual:
+            diffs[f'schedules[{date}]'] = (stored_days.get(date), actual)
+    return diffs
+
+
+def get_summary(date):
+    """
+    Return ``(DashboardSummary, ScheduleDayStats-or-None)`` for ``date``,
+    building the summary on first use.
+    """
+    summary = DashboardSummary.objects.filter(pk=SUMMARY_PK).first()
+    if summary is None:
+        rebuild()
+        summary = DashboardSummary.objects.get(pk=SUMMARY_PK)
+    return summary, ScheduleDayStats.objects.filter(date=date).first()
+
+
+async def aget_summary(date):
+    """``get_summary`` with the async ORM (for core/async_views.py)."""
+    summary = await DashboardSummary.objects.filter(pk=SUMMARY_PK).afirst()
+    if summary is None:
+        await sync_to_async(rebuild)()
+        summary = await DashboardSummary.objects.aget(pk=SUMMARY_PK)
+    return summary, await ScheduleDayStats.objects.filter(date=date).afirst()
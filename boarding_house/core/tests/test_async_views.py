@@ -0,0 +1,64 @@
+import types
+
+from asgiref.sync import iscoroutinefunction
+from django.test import TestCase, override_settings
+from django.urls import include, path, resolve
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core import urls as core_urls
+from core.async_views import async_urlpatterns
+from core.models import Payment
+from .utils import make_member, make_user
+
+
+async_urls = types.ModuleType('async_urls')
+async_urls.urlpatterns = [path('api/', include(async_urlpatterns(core_urls.router.urls)))]
+
+
+def jwt_client(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+    return client
+
+
+@override_settings(ROOT_URLCONF=async_urls)
+class AsyncReadViewTests(TestCase):
+    def setUp(self):
+        self.staff = jwt_client(make_user('staff'))
+        self.user = make_user('member')
+        self.member = make_member(user=self.user)
+        self.own = Payment.objects.create(member=self.member, amount=5)
+        self.other = Payment.objects.create(member=make_member(), amount=7)
+
+    def test_reads_are_async_writes_are_not(self):
+        self.assertTrue(iscoroutinefunction(resolve('/api/payments/').func))
+        self.assertTrue(iscoroutinefunction(resolve('/api/dashboard/stats/').func))
+        self.assertFalse(iscoroutinefunction(resolve('/api/payments/export/').func))
+
+        response = self.staff.post('/api/payments/', {'member': self.member.id, 'amount': '3.00'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Payment.objects.count(), 3)
+
+    def test_list_and_retrieve_keep_member_scoping(self):
+        member = jwt_client(self.user)
+        self.assertEqual([row['id'] for row in member.get('/api/payments/').json()], [self.own.id])
+        self.assertEqual(member.get(f'/api/payments/{self.own.id}/').json()['amount'], '5.00')
+        self.assertEqual(member.get(f'/api/payments/{self.other.id}/').status_code, 404)
+        self.assertEqual(member.get('/api/members/').status_code, 403)
+        self.assertEqual(member.get('/api/dashboard/stats/').status_code, 403)
+
+        page = self.staff.get('/api/payments/?page_size=1').json()
+        self.assertEqual([row['id'] for row in page['results']], [self.other.id])
+        self.assertEqual(self.staff.get(page['next']).json()['results'][0]['id'], self.own.id)
+
+    def test_authentication_and_conditional_get(self):
+        self.assertEqual(APIClient().get('/api/payments/').status_code, 401)
+        bad = APIClient()
+        bad.credentials(HTTP_AUTHORIZATION='Bearer nonsense')
+        self.assertEqual(bad.get('/api/payments/').status_code, 401)
+
+        first = self.staff.get('/api/dashboard/stats/')
+        self.assertEqual(first.json()['payments']['pending_count'], 0)
+        second = self.staff.get('/api/dashboard/stats/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
@@ -0,0 +1,113 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core import summary
+from core.models import Bill, Member
+from .utils import authed_client, make_member, make_user
+
+
+@mock.patch('core.notifications._group_send')
+class BulkEndpointTests(TestCase):
+    def setUp(self):
+        self.client = authed_client(make_user('staff'))
+        self.members = [make_member() for _ in range(20)]
+
+    def bills(self, members):
+        return [{'member': m.id, 'month': '2025-02', 'balance': '12.50'} for m in members]
+
+    def test_bulk_create_is_constant_query_and_single_notification(self, send):
+        self.client.get('/api/bills/')  # warm the role cache
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as small:
+                self.client.post('/api/bills/bulk/', self.bills(self.members[:2]), format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as large:
+                response = self.client.post('/api/bills/bulk/', self.bills(self.members), format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()), 20)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        self.assertEqual(Bill.objects.count(), 22)
+        # Staff topic group once per request, plus one per affected member
+        staff_calls = [c for c in send.call_args_list if c[0][0] == 'topic.bill']
+        self.assertEqual(len(staff_calls), 2)
+        self.assertEqual(staff_calls[-1][0][1][0]['action'], 'bulk_created')
+        self.assertEqual(staff_calls[-1][0][1][0]['data']['count'], 20)
+        self.assertEqual(send.call_count, 2 + 2 + 20)
+        self.assertEqual(summary.drift(), {})
+
+    def test_bulk_create_validates_everything_before_writing(self, send):
+        items = self.bills(self.members[:2]) + [{'member': 999999, 'month': '2025-02'}]
+        response = self.client.post('/api/bills/bulk/', items, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(errors[:2], [{}, {}])
+        self.assertIn('member', errors[2])
+        self.assertFalse(Bill.objects.exists())
+
+    def test_bulk_member_create_checks_unique_email(self, send):
+        items = [
+            {'name': 'A', 'email': self.members[0].email},
+            {'name': 'B', 'email': 'new@example.com'},
+            {'name': 'C', 'email': 'new@example.com'},
+        ]
+        response = self.client.post('/api/members/bulk/', items, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertIn('email', errors[0])
+        self.assertEqual(errors[1], {})
+        self.assertIn('email', errors[2])
+
+    def test_bulk_items_with_unhashable_values_get_per_item_errors(self, send):
+        items = [
+            {'name': 'A', 'email': ['a@example.com']},
+            {'name': 'B', 'email': 'b@example.com'},
+            {'name': 'C', 'email': {'address': 'c@example.com'}},
+            'D',
+        ]
+        response = self.client.post('/api/members/bulk/', items, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual([sorted(e) for e in errors], [['email'], [], ['email'], ['non_field_errors']])
+
+        bills = self.bills(self.members[:1]) + [{'member': [self.members[1].id], 'month': '2025-02'}]
+        response = self.client.post('/api/bills/bulk/', bills, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()[0], {})
+        self.assertIn('member', response.json()[1])
+
+        response = self.client.delete('/api/bills/bulk/', {'ids': [{'id': 1}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Bill.objects.exists())
+
+    def test_bulk_update_and_delete(self, send):
+        self.client.post('/api/bills/bulk/', self.bills(self.members[:3]), format='json')
+        ids = list(Bill.objects.values_list('id', flat=True))
+
+        response = self.client.patch(
+            '/api/bills/bulk/', [{'id': pk, 'paid_status': 'Paid'} for pk in ids], format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Bill.objects.filter(paid_status='Unpaid').exists())
+        self.assertEqual(summary.drift(), {})
+
+        response = self.client.delete('/api/bills/bulk/', {'ids': ids[:2]}, format='json')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(Bill.objects.count(), 1)
+        self.assertEqual(summary.drift(), {})
+
+        response = self.client.delete(
+            '/api/members/bulk/', {'ids': [m.id for m in self.members]}, format='json',
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Member.objects.exists())
+        self.assertEqual(summary.drift(), {})
+
+    def test_members_cannot_bulk_write(self, send):
+        user = make_user('member')
+        make_member(user=user)
+        response = authed_client(user).post('/api/bills/bulk/', [], format='json')
+        self.assertEqual(response.status_code, 403)
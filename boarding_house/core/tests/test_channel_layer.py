@@ -0,0 +1,126 @@
+import asyncio
+import os
+import tempfile
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.exceptions import ChannelFull
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from core.channel_layer import UnixSocketChannelLayer, default_path
+
+
+class UnixSocketChannelLayerTests(SimpleTestCase):
+    """Two layer instances stand in for two worker processes sharing a directory."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def layer(self, **kwargs):
+        return UnixSocketChannelLayer(path=self.tmp.name, **kwargs)
+
+    def test_group_send_reaches_members_in_every_worker(self):
+        async def run():
+            first, second = self.layer(), self.layer()
+            a = await first.new_channel()
+            b = await second.new_channel()
+            await first.group_add('topic.bill', a)
+            await second.group_add('topic.bill', b)
+
+            await first.group_send('topic.bill', {'type': 'broadcast.message', 'message': {'n': 1}})
+            received = await asyncio.wait_for(
+                asyncio.gather(first.receive(a), second.receive(b)), 5,
+            )
+            await first.close()
+            await second.close()
+            return received
+
+        received = async_to_sync(run)()
+        self.assertEqual([m['message'] for m in received], [{'n': 1}, {'n': 1}])
+
+    def test_send_routes_to_the_owning_worker(self):
+        async def run():
+            first, second = self.layer(), self.layer()
+            channel = await second.new_channel()
+            await first.send(channel, {'type': 'x', 'payload': b'\x00bytes'})
+            message = await asyncio.wait_for(second.receive(channel), 5)
+            await first.close()
+            await second.close()
+            return message
+
+        self.assertEqual(async_to_sync(run)()['payload'], b'\x00bytes')
+
+    def test_group_discard_and_capacity(self):
+        async def run():
+            layer = self.layer(capacity=1)
+            channel = await layer.new_channel()
+            await layer.send(channel, {'type': 'x'})
+            with self.assertRaises(ChannelFull):
+                await layer.send(channel, {'type': 'x'})
+            await layer.receive(channel)
+
+            await layer.group_add('g', channel)
+            await layer.group_discard('g', channel)
+            await layer.group_send('g', {'type': 'x'})
+            self.assertTrue(layer._queue(channel).empty())
+            await layer.close()
+
+        async_to_sync(run)()
+
+    def test_expired_messages_are_dropped(self):
+        async def run():
+            layer = self.layer(expiry=0)
+            channel = await layer.new_channel()
+            await layer.group_add('g', channel)
+            await layer.group_send('g', {'type': 'stale'})
+            layer.expiry = 60
+            await layer.send(channel, {'type': 'fresh'})
+            message = await asyncio.wait_for(layer.receive(channel), 5)
+            await layer.close()
+            return message
+
+        self.assertEqual(async_to_sync(run)()['type'], 'fresh')
+
+    def test_dead_worker_socket_is_cleaned_up(self):
+        async def run():
+            dead, live = self.layer(), self.layer()
+            await dead.new_channel()
+            # Simulate a crashed worker: socket file left, nobody listening
+            dead._server.close()
+            await dead._server.wait_closed()
+            self.assertIn(dead.node, live.live_nodes())
+            await live.group_send('g', {'type': 'x'})
+            nodes = live.live_nodes()
+            await live.close()
+            return dead.node, nodes
+
+        node, nodes = async_to_sync(run)()
+        self.assertNotIn(node, nodes)
+
+    def test_refuses_a_directory_others_could_control(self):
+        shared = os.path.join(self.tmp.name, 'shared')
+        os.mkdir(shared)
+        os.chmod(shared, 0o755)
+        link = os.path.join(self.tmp.name, 'link')
+        os.symlink(self.tmp.name, link)
+
+        for path, problem in [(shared, 'mode'), (link, 'symlink')]:
+            layer = UnixSocketChannelLayer(path=path)
+            with self.assertRaisesRegex(ImproperlyConfigured, problem):
+                async_to_sync(layer.new_channel)()
+            with self.assertRaisesRegex(ImproperlyConfigured, problem):
+                layer.live_nodes()
+
+        with mock.patch('core.channel_layer.os.getuid', return_value=os.getuid() + 1):
+            with self.assertRaisesRegex(ImproperlyConfigured, 'owned by'):
+                UnixSocketChannelLayer(path=self.tmp.name).live_nodes()
+
+    def test_default_directory_prefers_the_runtime_dir(self):
+        with mock.patch.dict(os.environ, {'XDG_RUNTIME_DIR': '/run/user/1000'}):
+            self.assertEqual(os.path.dirname(default_path()), '/run/user/1000')
+        # Senders never create it
+        layer = UnixSocketChannelLayer(path=os.path.join(self.tmp.name, 'missing'))
+        self.assertEqual(layer.live_nodes(), [])
+        self.assertFalse(os.path.exists(layer.path))
@@ -0,0 +1,107 @@
+import datetime
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Payment, Schedule
+from .utils import authed_client, make_member, make_user
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.staff = authed_client(make_user('staff'))
+
+    def get(self, client, url, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return client.get(url, **headers)
+
+    def test_unchanged_list_is_304_without_touching_main_tables(self):
+        member = make_member()
+        Payment.objects.create(member=member, amount=5)
+        first = self.get(self.staff, '/api/payments/')
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first['ETag'].startswith('W/"'))
+        self.assertIn('Last-Modified', first)
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.get(self.staff, '/api/payments/', first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second['ETag'], first['ETag'])
+        tables = ' '.join(q['sql'] for q in ctx.captured_queries)
+        self.assertNotIn('core_payment', tables)
+        self.assertNotIn('core_member', tables)
+
+        Payment.objects.create(member=member, amount=6)
+        third = self.get(self.staff, '/api/payments/', first['ETag'])
+        self.assertEqual(third.status_code, 200)
+        self.assertNotEqual(third['ETag'], first['ETag'])
+        # Query string is part of the representation
+        self.assertNotEqual(self.get(self.staff, '/api/payments/?page_size=1')['ETag'], third['ETag'])
+
+    def test_member_etags_follow_their_own_rows(self):
+        user = make_user('member')
+        own = make_member(user=user)
+        other = make_member()
+        client = authed_client(user)
+        etag = self.get(client, '/api/payments/')['ETag']
+
+        Payment.objects.create(member=other, amount=1)
+        self.assertEqual(self.get(client, '/api/payments/', etag).status_code, 304)
+
+        payment = Payment.objects.create(member=own, amount=2)
+        response = self.get(client, '/api/payments/', etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        # member_name is embedded in payments
+        own.name = 'Renamed'
+        own.save()
+        response = self.get(client, '/api/payments/', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['member_name'], 'Renamed')
+
+        # Moving the payment away changes the previous owner's list too
+        etag = response['ETag']
+        payment.member = other
+        payment.save()
+        self.assertEqual(self.get(client, '/api/payments/', etag).status_code, 200)
+
+    def test_dashboard_and_bulk_writes(self):
+        stats = self.get(self.staff, '/api/dashboard/stats/')
+        self.assertEqual(self.get(self.staff, '/api/dashboard/stats/', stats['ETag']).status_code, 304)
+
+        member = make_member()
+        response = self.staff.post(
+            '/api/bills/bulk/', [{'member': member.id, 'month': '2025-05'}], format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.get(self.staff, '/api/dashboard/stats/', stats['ETag']).status_code, 200)
+
+    def test_member_delete_changes_schedules_that_were_assigned_to_it(self):
+        member = make_member()
+        Schedule.objects.create(task_type='Water', assigned_to=member, date=datetime.date.today(),
+                                time=datetime.time(9))
+        first = self.get(self.staff, '/api/schedules/')
+        self.assertEqual(first.status_code, 200)
+
+        # assigned_to is SET_NULL: cleared by an UPDATE without row signals
+        member.delete()
+        response = self.get(self.staff, '/api/schedules/', first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertIsNone(response.data[0]['assigned_to'])
+
+    def test_deleting_a_linked_user_changes_its_member(self):
+        user = make_user('member')
+        member = make_member(user=user)
+        urls = ['/api/members/', f'/api/members/{member.pk}/']
+        etags = [self.get(self.staff, url)['ETag'] for url in urls]
+
+        # Member.user is SET_NULL as well
+        user.delete()
+        for url, etag in zip(urls, etags):
+            response = self.get(self.staff, url, etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+        self.assertIsNone(response.data['user'])
@@ -0,0 +1,256 @@
+import datetime
+import time
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.test import TransactionTestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from boarding_house.asgi import application
+from core import governance, roles
+from core.models import Payment, Schedule
+from core.notifications import TOPICS
+from .utils import authed_client, make_member, make_user
+
+
+create_payment = database_sync_to_async(Payment.objects.create)
+create_schedule = database_sync_to_async(Schedule.objects.create)
+
+
+def connect(user=None, query='', token=None):
+    params = [query] if query else []
+    if user is not None:
+        params.append(f'token={token or AccessToken.for_user(user)}')
+    path = '/ws/notifications/' + ('?' + '&'.join(params) if params else '')
+    return WebsocketCommunicator(application, path)
+
+
+async def receive_all(communicator):
+    frames = []
+    while not await communicator.receive_nothing(timeout=0.2):
+        frames.append(await communicator.receive_json_from())
+    return frames
+
+
+class NotificationConsumerTests(TransactionTestCase):
+    def test_anonymous_socket_is_rejected(self):
+        async def run():
+            connected, code = await connect().connect()
+            self.assertFalse(connected)
+            self.assertEqual(code, 4401)
+        async_to_sync(run)()
+
+    def test_members_only_receive_their_own_rows(self):
+        user = make_user('member')
+        own = make_member(user=user)
+        other = make_member()
+
+        async def run():
+            communicator = connect(user)
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            await create_payment(member=other, amount=1)
+            await create_payment(member=own, amount=2)
+            frames = await receive_all(communicator)
+            self.assertEqual([f['data']['member'] for f in frames], [own.id])
+            await communicator.disconnect()
+        async_to_sync(run)()
+
+    def test_members_do_not_get_schedules(self):
+        user = make_user('member')
+        own = make_member(user=user)
+        schedule = Schedule.objects.create(
+            task_type='Water', assigned_to=own, date=datetime.date.today(), time=datetime.time(9),
+        )
+
+        async def run():
+            communicator = connect(user)
+            await communicator.connect()
+            await create_schedule(
+                task_type='Trash', assigned_to=own, date=datetime.date.today(), time=datetime.time(10),
+            )
+            # Staff-only over REST as well
+            await communicator.send_json_to({'action': 'fetch', 'model': 'schedule', 'id': schedule.id})
+            self.assertEqual(await receive_all(communicator), [])
+            await create_payment(member=own, amount=1)
+            frames = await receive_all(communicator)
+            self.assertEqual([f['model'] for f in frames], ['payment'])
+            await communicator.disconnect()
+        async_to_sync(run)()
+
+    def test_staff_topics_and_client_broadcasts(self):
+        staff = make_user('staff')
+        member_user = make_user('member')
+        make_member(user=member_user)
+        member = make_member()
+
+        async def run():
+            staff_socket = connect(staff, 'topics=bill')
+            member_socket = connect(member_user)
+            await staff_socket.connect()
+            await member_socket.connect()
+            self.assertEqual(await staff_socket.receive_json_from(), {'subscribed': ['bill']})
+
+            await create_payment(member=member, amount=1)  # not subscribed
+            # Member-originated messages are not relayed
+            await member_socket.send_json_to({'hello': 'staff'})
+            self.assertTrue(await staff_socket.receive_nothing(timeout=0.2))
+
+            await staff_socket.send_json_to({'action': 'subscribe', 'topics': ['payment']})
+            self.assertEqual(
+                await staff_socket.receive_json_from(), {'subscribed': ['bill', 'payment']},
+            )
+            await create_payment(member=member, amount=2)
+            frames = await receive_all(staff_socket)
+            self.assertEqual([(f['model'], f['action']) for f in frames], [('payment', 'created')])
+
+            await staff_socket.disconnect()
+            await member_socket.disconnect()
+        async_to_sync(run)()
+
+    def test_unknown_topics_are_refused(self):
+        staff = make_user('staff')
+
+        async def run():
+            for query in ('topics=bill,bils', 'topics=nothing'):
+                connected, code = await connect(staff, query).connect()
+                self.assertEqual((connected, code), (False, 4400))
+            communicator = connect(staff, 'topics=')
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            self.assertEqual(await communicator.receive_json_from(), {'subscribed': sorted(TOPICS)})
+            await communicator.disconnect()
+        async_to_sync(run)()
+
+    @override_settings(ROLE_CLAIMS_FROM_TOKEN=True)
+    def test_role_claims_do_not_outlive_a_demotion(self):
+        user = make_user('staff')
+        token = AccessToken.for_user(user)
+        token[roles.ROLE_CLAIM] = 'staff'
+        token[roles.MEMBER_CLAIM] = None
+        token[roles.ROLE_AT_CLAIM] = time.time()
+
+        async def join():
+            communicator = connect(user, 'topics=bill', token=token)
+            connected, code = await communicator.connect()
+            if connected:
+                await communicator.disconnect()
+            return connected, code
+
+        self.assertTrue(async_to_sync(join)()[0])
+        profile = user.profile
+        profile.role = 'member'
+        profile.save()
+        # Member role without a linked Member row
+        self.assertEqual(async_to_sync(join)(), (False, 4403))
+
+    def test_fetch_returns_full_row_within_scope(self):
+        user = make_user('member')
+        own = make_member(user=user)
+        other = make_member()
+        mine = Payment.objects.create(member=own, amount=3)
+        theirs = Payment.objects.create(member=other, amount=4)
+
+        async def run():
+            communicator = connect(user)
+            await communicator.connect()
+            await communicator.send_json_to({'action': 'fetch', 'model': 'payment', 'id': mine.id})
+            frame = await communicator.receive_json_from()
+            self.assertEqual((frame['action'], frame['data']['amount']), ('updated', '3.00'))
+            self.assertEqual(frame['data']['version'], 1)
+
+            await communicator.send_json_to({'action': 'fetch', 'model': 'payment', 'id': theirs.id})
+            frame = await communicator.receive_json_from()
+            self.assertEqual(frame, {'model': 'payment', 'action': 'missing', 'data': {'id': theirs.id}})
+            await communicator.disconnect()
+        async_to_sync(run)()
+
+
+class ConnectionGovernanceTests(TransactionTestCase):
+    def setUp(self):
+        governance.stats.reset()
+        self.staff = make_user('staff')
+
+    @override_settings(WS_RATE_LIMIT=0.01, WS_RATE_BURST=2)
+    def test_messages_over_the_rate_limit_are_dropped(self):
+        async def run():
+            communicator = connect(self.staff, 'topics=bill')
+            await communicator.connect()
+            await communicator.receive_json_from()
+            for _ in range(5):
+                await communicator.send_json_to({'action': 'subscribe', 'topics': ['payment']})
+            self.assertEqual(len(await receive_all(communicator)), 2)
+            await communicator.disconnect()
+        async_to_sync(run)()
+        self.assertEqual(governance.stats.snapshot()['rate_limited'], 3)
+
+    @override_settings(WS_MAX_FRAME_BYTES=64)
+    def test_oversized_frame_closes_the_socket(self):
+        async def run():
+            communicator = connect(self.staff)
+            await communicator.connect()
+            await communicator.receive_json_from()
+            await communicator.send_json_to({'action': 'fetch', 'model': 'payment', 'id': 'é' * 40})
+            self.assertEqual(await communicator.receive_output(), {'type': 'websocket.close', 'code': 1009})
+            await communicator.disconnect()
+        async_to_sync(run)()
+        self.assertEqual(governance.stats.snapshot()['oversized'], 1)
+
+    @override_settings(WS_CLIENT_BROADCASTS=False)
+    def test_client_broadcasts_can_be_disabled(self):
+        async def run():
+            sender, listener = connect(self.staff), connect(self.staff)
+            for communicator in (sender, listener):
+                await communicator.connect()
+                await communicator.receive_json_from()
+            await sender.send_json_to({'hello': 'staff'})
+            self.assertTrue(await listener.receive_nothing(timeout=0.2))
+            await sender.disconnect()
+            await listener.disconnect()
+        async_to_sync(run)()
+        self.assertEqual(governance.stats.snapshot()['broadcasts_blocked'], 1)
+
+    @override_settings(WS_HEARTBEAT_INTERVAL=0.1, WS_IDLE_TIMEOUT=0.25)
+    def test_heartbeats_and_idle_eviction(self):
+        async def run():
+            communicator = connect(self.staff)
+            await communicator.connect()
+            await communicator.receive_json_from()
+            # Answering pings keeps the socket open
+            for _ in range(4):
+                self.assertEqual(await communicator.receive_json_from(), {'type': 'ping'})
+                await communicator.send_json_to({'action': 'pong'})
+            # Silence gets it closed
+            frame = await communicator.receive_output()
+            while frame['type'] != 'websocket.close':
+                frame = await communicator.receive_output()
+            self.assertEqual(frame['code'], 4408)
+            await communicator.disconnect()
+        async_to_sync(run)()
+        self.assertEqual(governance.stats.snapshot()['evicted_idle'], 1)
+
+    @override_settings(WS_MAX_CONNECTIONS=1)
+    def test_connection_cap(self):
+        async def run():
+            first = connect(self.staff)
+            self.assertTrue((await first.connect())[0])
+            connected, code = await connect(self.staff).connect()
+            self.assertEqual((connected, code), (False, 1013))
+            await first.disconnect()
+            second = connect(self.staff)
+            self.assertTrue((await second.connect())[0])
+            await second.disconnect()
+        async_to_sync(run)()
+        self.assertEqual(governance.stats.snapshot(), {
+            'open': 0, 'accepted': 2, 'rejected_capacity': 1, 'rate_limited': 0,
+            'oversized': 0, 'evicted_idle': 0, 'broadcasts_blocked': 0,
+        })
+
+    def test_counters_endpoint_is_staff_only(self):
+        governance.stats.incr('rate_limited', 2)
+        response = authed_client(self.staff).get('/api/dashboard/realtime/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['open'], response.data['rate_limited']), (0, 2))
+        member = authed_client(make_user('member')).get('/api/dashboard/realtime/')
+        self.assertEqual(member.status_code, 403)
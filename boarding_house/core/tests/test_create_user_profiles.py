@@ -0,0 +1,22 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import roles
+from core.models import UserProfile
+from core.roles import RoleInfo
+from .utils import make_user
+
+
+class CreateUserProfilesTests(TestCase):
+    def test_creates_missing_profiles_and_drops_cached_roles(self):
+        user = make_user('staff')
+        UserProfile.objects.filter(user=user).delete()
+        roles.role_cache.set(user.pk, RoleInfo('staff', None))
+
+        out = io.StringIO()
+        call_command('create_user_profiles', stdout=out)
+        self.assertEqual(UserProfile.objects.get(user=user).role, 'member')
+        self.assertIsNone(roles.role_cache.get(user.pk))
+        self.assertIn(f'Created profile for {user.username} with role: member', out.getvalue())
@@ -0,0 +1,62 @@
+import csv
+import io
+import json
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Bill, Payment
+from .utils import authed_client, make_member, make_user
+
+
+def content(response):
+    return b''.join(response.streaming_content).decode()
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.staff = authed_client(make_user('staff'))
+
+    def test_csv_streams_rows_with_member_columns(self):
+        member = make_member(name='=SUM(A1)', room_number='7')
+        Payment.objects.create(member=member, amount='12.50', status='Unpaid', collected_by='Ann')
+        Payment.objects.create(member=member, amount=3)
+
+        response = self.staff.get('/api/payments/export/?status=Unpaid')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="payments-', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(content(response))))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['amount'], '12.50')
+        self.assertEqual(rows[0]['member_room'], '7')
+        # Formula-looking text is neutralised for spreadsheet apps
+        self.assertEqual(rows[0]['member_name'], "'=SUM(A1)")
+
+    def test_negative_amounts_stay_numeric(self):
+        Bill.objects.create(member=make_member(), month='2025-01', balance='-5.00', water_amount='-0.50')
+        rows = list(csv.DictReader(io.StringIO(content(self.staff.get('/api/bills/export/')))))
+        self.assertEqual((rows[0]['balance'], rows[0]['water_amount']), ('-5.00', '-0.50'))
+
+    def test_ndjson_is_member_scoped(self):
+        user = make_user('member')
+        own = make_member(user=user)
+        Bill.objects.create(member=own, month='2025-01', balance='4.00')
+        Bill.objects.create(member=make_member(), month='2025-01')
+
+        response = authed_client(user).get('/api/bills/export/?as=ndjson')
+        lines = [json.loads(line) for line in content(response).splitlines()]
+        self.assertEqual([(b['member'], b['balance']) for b in lines], [(own.id, '4.00')])
+
+    def test_one_query_whatever_the_row_count(self):
+        member = make_member()
+        Payment.objects.bulk_create([Payment(member=member, amount=i) for i in range(50)])
+        self.staff.get('/api/payments/export/')  # warm the role cache
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.staff.get('/api/payments/export/?as=ndjson')
+            self.assertEqual(len(content(response).splitlines()), 50)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_unknown_format(self):
+        self.assertEqual(self.staff.get('/api/repairs/export/?as=xlsx').status_code, 400)
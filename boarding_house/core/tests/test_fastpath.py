@@ -0,0 +1,50 @@
+import datetime
+
+from django.test import TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+
+from core.fastpath import representation_for
+from core.models import Bill, Payment, Repair, Schedule
+from core.serializers import BillSerializer, PaymentSerializer, RepairSerializer, ScheduleSerializer
+from .utils import authed_client, make_member, make_user, seed_rows
+
+
+class FastPathTests(TestCase):
+    def setUp(self):
+        seed_rows(3)
+        member = make_member(name='Zoë "Z" <z>', room_number='')
+        Payment.objects.create(member=member, amount='1234567.5', status='Paid', collected_by='')
+        Bill.objects.create(member=member, month='2025-02', water_amount='0.1', balance='-3')
+        Repair.objects.create(member=member, item_name='Door', repair_date=datetime.date(2024, 2, 29), cost=0)
+        Schedule.objects.create(task_type='Garbage', date=datetime.date.today(), time=datetime.time(7, 30))
+
+    def test_rows_match_the_serializers(self):
+        render = JSONRenderer().render
+        for serializer_class in (PaymentSerializer, BillSerializer, RepairSerializer, ScheduleSerializer):
+            with self.subTest(serializer=serializer_class.__name__):
+                queryset = serializer_class.plan_queryset(serializer_class.Meta.model.objects.order_by('id'))
+                representation = representation_for(serializer_class)
+                self.assertEqual(
+                    render(representation.data(representation.values(queryset))),
+                    render(serializer_class(queryset, many=True).data),
+                )
+
+    def test_list_responses_are_byte_identical(self):
+        user = make_user('member')
+        owner = make_member(user=user)
+        seed_rows(4, member=owner)
+        clients = {'staff': authed_client(make_user('staff')), 'member': authed_client(user)}
+        for role, client in clients.items():
+            for url in ('/api/payments/', '/api/bills/?page_size=2', '/api/repairs/?page_size=3&ordering=cost'):
+                with self.subTest(role=role, url=url):
+                    pages = []
+                    for fast in (False, True):
+                        with override_settings(FAST_LIST_SERIALIZATION=fast):
+                            responses, next_url = [], url
+                            while next_url:
+                                response = client.get(next_url)
+                                self.assertEqual(response.status_code, 200)
+                                responses.append(response.content)
+                                next_url = response.data.get('next') if isinstance(response.data, dict) else None
+                            pages.append(responses)
+                    self.assertEqual(pages[0], pages[1])
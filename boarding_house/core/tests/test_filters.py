@@ -0,0 +1,64 @@
+import datetime
+
+from django.test import TestCase
+
+from core.models import Bill, Payment, Repair
+from .utils import authed_client, make_member, make_user
+
+
+class ListFilterTests(TestCase):
+    def setUp(self):
+        self.staff = authed_client(make_user('staff'))
+
+    def test_member_search_status_and_ordering(self):
+        make_member(name='Alice', email='alice@example.com', room_number='101')
+        make_member(name='Bob', email='bob@example.com', room_number='102', status='Inactive')
+        make_member(name='Carol', email='xcarol@example.com', room_number='A1')
+        make_member(name='John Smith', email='js@example.com', room_number='B7')
+
+        def names(query):
+            response = self.staff.get(f'/api/members/?{query}')
+            self.assertEqual(response.status_code, 200, response.data)
+            return [m['name'] for m in response.data]
+
+        self.assertEqual(names('search=al&ordering=name'), ['Alice'])
+        self.assertEqual(names('search=xcar'), ['Carol'])
+        # Substring, case-insensitive: matches anywhere in the name
+        self.assertEqual(names('search=smith'), ['John Smith'])
+        self.assertEqual(names('search=10&ordering=-name'), ['Bob', 'Alice'])
+        self.assertEqual(names('status=Inactive'), ['Bob'])
+        self.assertEqual(names('room=A1'), ['Carol'])
+        self.assertEqual(self.staff.get('/api/members/?status=Gone').status_code, 400)
+
+    def test_keyset_pages_follow_requested_ordering(self):
+        for name in ['Dan', 'Amy', 'Cid', 'Bea']:
+            make_member(name=name)
+        response = self.staff.get('/api/members/?ordering=name&page_size=2')
+        self.assertEqual([m['name'] for m in response.data['results']], ['Amy', 'Bea'])
+        response = self.staff.get(response.data['next'])
+        self.assertEqual([m['name'] for m in response.data['results']], ['Cid', 'Dan'])
+
+    def test_filters_keep_member_scoping(self):
+        user = make_user('member')
+        own = make_member(user=user)
+        other = make_member()
+        for member in (own, other):
+            Payment.objects.create(member=member, amount=1, status='Unpaid')
+            Bill.objects.create(member=member, month='2025-01')
+            Repair.objects.create(member=member, item_name='Tap', repair_date=datetime.date(2025, 1, 5), cost=3)
+        client = authed_client(user)
+
+        response = client.get(f'/api/payments/?status=Unpaid&member={other.id}')
+        self.assertEqual(response.data, [])
+        response = client.get('/api/bills/?month=2025-01')
+        self.assertEqual([b['member'] for b in response.data], [own.id])
+        # Read the way bills are written: normalised to YYYY-MM
+        response = client.get('/api/bills/?month=Jan-2025')
+        self.assertEqual([b['member'] for b in response.data], [own.id])
+        self.assertEqual(client.get('/api/bills/?month=Janvier').status_code, 400)
+        response = client.get('/api/repairs/?from=2025-01-01&to=2025-01-31&status=Pending')
+        self.assertEqual([r['member'] for r in response.data], [own.id])
+        self.assertEqual(client.get('/api/repairs/?from=January').status_code, 400)
+
+        response = self.staff.get('/api/repairs/?from=2025-01-06')
+        self.assertEqual(response.data, [])
@@ -0,0 +1,100 @@
+import datetime
+import io
+import os
+import tempfile
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core import summary
+from core.models import Bill, Member, Payment
+from .utils import make_member
+
+
+def write_csv(text):
+    handle = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+    handle.write(text)
+    handle.close()
+    return handle.name
+
+
+@mock.patch('core.notifications._group_send')
+class ImportCsvTests(TestCase):
+    def run_import(self, target, text, *args):
+        path = write_csv(text)
+        self.addCleanup(os.unlink, path)
+        out = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_csv', target, path, *args, stdout=out, stderr=io.StringIO())
+        return out.getvalue()
+
+    def test_members_skip_existing_emails(self, send):
+        make_member(email='taken@example.com')
+        rows = ''.join(f'M{i},m{i}@example.com,{100 + i}\n' for i in range(25))
+        output = self.run_import(
+            'members', 'name,email,room_number\nOld,taken@example.com,1\n' + rows, '--chunk-size', '10',
+        )
+        self.assertEqual(Member.objects.count(), 26)
+        self.assertIn('Imported 25 members from 26 rows (1 existing skipped, 0 invalid)', output)
+        self.assertIn('rows/s', output)
+        # One summary notification for the whole import
+        self.assertEqual(send.call_count, 1)
+        group, payloads = send.call_args[0]
+        self.assertEqual(group, 'topic.member')
+        self.assertEqual(payloads[0]['action'], 'bulk_created')
+        self.assertEqual(payloads[0]['data']['count'], 25)
+        self.assertEqual(summary.drift(), {})
+
+    def test_payments_keep_historical_dates_and_scale_by_chunk(self, send):
+        members = [make_member() for _ in range(3)]
+
+        def payments(count):
+            return 'member_email,amount,payment_date,status\n' + ''.join(
+                f'{members[i % 3].email},{i}.50,2024-03-0{1 + i % 9},Unpaid\n' for i in range(count)
+            )
+
+        self.run_import('payments', payments(3))  # create the change counters
+        with CaptureQueriesContext(connection) as small:
+            self.run_import('payments', payments(5), '--chunk-size', '100')
+        with CaptureQueriesContext(connection) as large:
+            self.run_import('payments', payments(60), '--chunk-size', '100')
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        self.assertEqual(Payment.objects.count(), 68)
+        self.assertFalse(Payment.objects.filter(payment_date__gte=datetime.date(2025, 1, 1)).exists())
+        self.assertEqual(summary.drift(), {})
+
+    def test_invalid_rows_abort_unless_skipped(self, send):
+        member = make_member()
+        text = (
+            'member_email,amount,status\n'
+            f'{member.email},10,Paid\n'
+            'nobody@example.com,10,Paid\n'
+            f'{member.email},ten,Maybe\n'
+        )
+        with self.assertRaisesMessage(CommandError, '2 invalid row(s)'):
+            self.run_import('payments', text)
+        self.assertFalse(Payment.objects.exists())
+
+        output = self.run_import('payments', text, '--skip-invalid')
+        self.assertEqual(Payment.objects.count(), 1)
+        self.assertIn('(0 existing skipped, 2 invalid)', output)
+
+    def test_unknown_columns(self, send):
+        with self.assertRaisesMessage(CommandError, "Unknown or missing columns ['id']"):
+            self.run_import('bills', 'id,member_email,month\n')
+
+    def test_dry_run_rolls_back(self, send):
+        output = self.run_import('members', 'name,email\nA,a@example.com\n', '--dry-run')
+        self.assertIn('Would import 1 members', output)
+        self.assertFalse(Member.objects.exists())
+        send.assert_not_called()
+
+    def test_bill_months_are_normalized(self, send):
+        member = make_member()
+        self.run_import('bills', f'member_email,month,balance\n{member.email},Nov-2025,5\n{member.email},3/2025,5\n')
+        self.assertEqual(sorted(Bill.objects.values_list('month', flat=True)), ['2025-03', '2025-11'])
+        with self.assertRaises(CommandError):
+            self.run_import('bills', f'member_email,month\n{member.email},soon\n')
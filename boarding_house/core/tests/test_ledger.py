@@ -0,0 +1,72 @@
+import datetime
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Bill, Payment, Repair
+from .utils import authed_client, make_member, make_user
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.user = make_user('member')
+        self.member = make_member(user=self.user)
+        self.staff = authed_client(make_user('staff'))
+        Bill.objects.create(member=self.member, month='2025-01', balance='100.00')
+        Repair.objects.create(member=self.member, item_name='Tap', repair_date=datetime.date(2025, 1, 10), cost='20.50')
+        paid = Payment.objects.create(member=self.member, amount='90.00', status='Paid')
+        unpaid = Payment.objects.create(member=self.member, amount='5.00', status='Unpaid')
+        Payment.objects.filter(pk=paid.pk).update(payment_date=datetime.date(2025, 1, 15))
+        Payment.objects.filter(pk=unpaid.pk).update(payment_date=datetime.date(2025, 1, 16))
+        # Someone else's rows never show up
+        Bill.objects.create(member=make_member(), month='2025-01', balance='999.00')
+
+    def test_running_balance_newest_first(self):
+        response = self.staff.get(f'/api/members/{self.member.id}/ledger/')
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['balance'], '30.50')
+        self.assertEqual(
+            [(row['kind'], row['date'], row['change'], row['balance']) for row in body['results']],
+            [
+                ('payment', '2025-01-16', '0.00', '30.50'),
+                ('payment', '2025-01-15', '-90.00', '30.50'),
+                ('repair', '2025-01-10', '20.50', '120.50'),
+                ('bill', '2025-01-01', '100.00', '100.00'),
+            ],
+        )
+
+    def test_member_portal_pages_through_own_ledger(self):
+        client = authed_client(self.user)
+        client.get('/api/ledger/')  # warm the role cache
+        with CaptureQueriesContext(connection) as ctx:
+            first = client.get('/api/ledger/?page_size=3').json()
+        # Change counters, then the ledger itself
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertEqual(len(first['results']), 3)
+        second = client.get(first['next']).json()
+        self.assertEqual([row['kind'] for row in second['results']], ['bill'])
+        self.assertIsNone(second['next'])
+        back = client.get(second['previous']).json()
+        self.assertEqual(back['results'], first['results'])
+
+    def test_access(self):
+        self.assertEqual(authed_client(self.user).get(f'/api/members/{self.member.id}/ledger/').status_code, 403)
+        self.assertEqual(self.staff.get('/api/ledger/').status_code, 403)
+        self.assertEqual(self.staff.get('/api/members/999999/ledger/').status_code, 404)
+        self.assertEqual(authed_client(self.user).get('/api/ledger/?cursor=junk').status_code, 404)
+
+    def test_bill_months_are_normalized_before_dating_entries(self):
+        response = self.staff.post('/api/bills/', {'member': self.member.id, 'month': 'Dec-2024', 'balance': '10.00'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['month'], '2024-12')
+        body = self.staff.get(f'/api/members/{self.member.id}/ledger/').json()
+        self.assertEqual(body['balance'], '40.50')
+        self.assertEqual(
+            [(row['kind'], row['date'], row['balance']) for row in body['results']][-2:],
+            [('bill', '2025-01-01', '110.00'), ('bill', '2024-12-01', '10.00')],
+        )
+        response = self.staff.post('/api/bills/', {'member': self.member.id, 'month': 'someday'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('month', response.data)
@@ -0,0 +1,117 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core import meters
+from core.models import MeterReading, MeterState, MeterUsage
+from .utils import authed_client, make_member, make_user
+
+
+def reading(room, at, value, meter='water'):
+    return {'room': room, 'meter': meter, 'taken_at': f'2025-01-{at}Z', 'value': value}
+
+
+class MeterIngestionTests(TestCase):
+    url = '/api/meters/readings/'
+
+    def setUp(self):
+        self.client = authed_client(make_user('staff'))
+
+    def post(self, items):
+        return self.client.post(self.url, items, format='json')
+
+    def test_rollups_track_consumption(self):
+        response = self.post([
+            reading('101', '05T10:00:00', '100'),
+            reading('101', '05T10:30:00', '102.5'),
+            reading('101', '05T11:15:00', '103'),
+            reading('101', '06T09:00:00', '110'),
+            reading('102', '05T10:00:00', '7', meter='electricity'),
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {'received': 5, 'counted': 5, 'late': 0})
+
+        water = MeterReading.WATER
+        self.assertEqual(meters.monthly_usage('101', water, 2025, 1), Decimal('10'))
+        day = meters.period_starts(meters.month_start(2025, 1).replace(day=5))[1][1]
+        self.assertEqual(meters.usage_for('101', water, MeterUsage.DAY, day), Decimal('3'))
+        hours = MeterUsage.objects.filter(room_number='101', period=MeterUsage.HOUR).order_by('start')
+        self.assertEqual([h.usage for h in hours], [Decimal('2.5'), Decimal('0.5'), Decimal('7')])
+        # First reading of a meter is only the baseline
+        self.assertEqual(meters.monthly_usage('102', MeterReading.ELECTRICITY, 2025, 1), 0)
+
+    def test_resent_and_late_readings_are_not_counted_twice(self):
+        batch = [reading('101', '05T10:00:00', '100'), reading('101', '05T11:00:00', '104')]
+        self.post(batch)
+        response = self.post(batch + [reading('101', '05T10:30:00', '101')])
+        self.assertEqual(response.data, {'received': 3, 'counted': 0, 'late': 3})
+        self.assertEqual(MeterReading.objects.count(), 3)
+        self.assertEqual(meters.monthly_usage('101', MeterReading.WATER, 2025, 1), Decimal('4'))
+
+        # Meter reset: the new value is the usage since
+        self.post([reading('101', '05T12:00:00', '2')])
+        self.assertEqual(meters.monthly_usage('101', MeterReading.WATER, 2025, 1), Decimal('6'))
+
+    def test_concurrent_first_readings_of_a_meter(self):
+        self.post([reading('101', '05T10:00:00', '100')])
+        lock_states = meters._lock_states
+        attempts = []
+
+        def other_collector(rooms):
+            # Another collector commits the first state of 102 just after this
+            # batch's SELECT FOR UPDATE. Here it shares the test transaction and
+            # is rolled back with the failed attempt, so it is re-created before
+            # the retry's SELECT, as the committed row would be seen then.
+            attempts.append(rooms)
+            states = lock_states(rooms) if len(attempts) == 1 else None
+            MeterState.objects.create(
+                room_number='102', meter=MeterReading.WATER,
+                taken_at=meters.month_start(2025, 1).replace(day=5, hour=9), value=Decimal('40'),
+            )
+            return states if states is not None else lock_states(rooms)
+
+        with mock.patch('core.meters._lock_states', side_effect=other_collector):
+            response = self.post([
+                reading('101', '05T11:00:00', '103'),
+                reading('102', '05T10:00:00', '45'),
+            ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {'received': 2, 'counted': 2, 'late': 0})
+        # Counted once, against the state the other collector created
+        self.assertEqual(meters.monthly_usage('101', MeterReading.WATER, 2025, 1), Decimal('3'))
+        self.assertEqual(meters.monthly_usage('102', MeterReading.WATER, 2025, 1), Decimal('5'))
+        self.assertEqual(MeterReading.objects.count(), 3)
+        self.assertEqual(len(attempts), 2)
+
+    def test_ingestion_query_count_does_not_scale(self):
+        def batch(n, offset):
+            return [
+                reading(str(100 * offset + room), f'{10 + offset:02d}T{hour:02d}:00:00', str(hour))
+                for room in range(n) for hour in range(24)
+            ]
+        self.post([])  # warm the role cache
+        with CaptureQueriesContext(connection) as small:
+            self.post(batch(1, 1))
+        with CaptureQueriesContext(connection) as large:
+            self.post(batch(3, 2))
+        self.assertEqual(len(small), len(large))
+
+    def test_invalid_items_are_reported_per_item(self):
+        response = self.post([reading('101', '05T10:00:00', '1'), {'room': '101', 'meter': 'gas'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertEqual(set(response.data[1]), {'meter', 'taken_at', 'value'})
+        self.assertFalse(MeterReading.objects.exists())
+
+    def test_members_only_see_their_room(self):
+        self.post([reading(room, f'0{day}T10:00:00', str(day)) for room in ('101', '102') for day in (5, 6)])
+        user = make_user('member')
+        make_member(user=user, room_number='102')
+        response = authed_client(user).get('/api/meters/usage/?room=101')
+        self.assertEqual(response.data, [])
+        response = authed_client(user).get('/api/meters/usage/?period=day')
+        self.assertEqual([(r['room'], r['usage']) for r in response.data], [('102', '1.000')])
+        self.assertEqual(authed_client(user).post(self.url, [], format='json').status_code, 403)
@@ -0,0 +1,72 @@
+from django.test import TestCase
+
+from core import metrics
+from core.models import Payment
+from .utils import authed_client, make_member, make_user
+
+
+def samples(text):
+    """``{'name{labels}': value}`` of a Prometheus text exposition."""
+    result = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, _, value = line.rpartition(' ')
+            result[name] = float(value)
+    return result
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        for metric in metrics.REGISTRY:
+            metric.reset()
+        self.staff = authed_client(make_user('staff'))
+
+    def scrape(self):
+        response = self.staff.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return samples(response.content.decode())
+
+    def test_request_latency_and_sql_per_view(self):
+        make_member()
+        self.staff.get('/api/payments/?page_size=10')
+        self.staff.get('/api/payments/?page_size=10')
+        self.staff.get('/api/nowhere/')
+
+        scraped = self.scrape()
+        self.assertEqual(scraped['http_request_duration_seconds_count{view="payment-list",method="GET"}'], 2)
+        self.assertEqual(scraped['http_request_duration_seconds_bucket{view="payment-list",method="GET",le="+Inf"}'], 2)
+        self.assertEqual(scraped['http_requests_total{view="payment-list",method="GET",status="200"}'], 2)
+        self.assertEqual(scraped['http_requests_total{view="unmatched",method="GET",status="404"}'], 1)
+        self.assertGreaterEqual(scraped['http_request_db_queries_sum{view="payment-list"}'], 2)
+        self.assertEqual(scraped['websocket_connections'], 0)
+        self.assertIn('websocket_governance_events_total{event="rate_limited"}', scraped)
+
+    def test_broadcast_fanout_and_group_send_latency(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            member = make_member()
+            Payment.objects.create(member=member, amount=5)
+
+        scraped = self.scrape()
+        # One commit: the member and payment topics and the member's own group
+        self.assertEqual(scraped['notification_broadcast_groups_count'], 1)
+        self.assertEqual(scraped['notification_broadcast_groups_sum'], 3)
+        self.assertEqual(scraped['notification_broadcast_events_sum'], 2)
+        self.assertEqual(scraped['channel_layer_group_send_seconds_count'], 3)
+
+    def test_staff_only(self):
+        response = authed_client(make_user('member')).get('/api/metrics/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.Histogram('test_seconds', 'Test.', buckets=(0.1, 1))
+        metrics.REGISTRY.remove(histogram)
+        for value in (0.05, 0.5, 0.7, 3):
+            histogram.observe(value)
+        self.assertEqual(histogram.render()[2:], [
+            'test_seconds_bucket{le="0.1"} 1',
+            'test_seconds_bucket{le="1"} 3',
+            'test_seconds_bucket{le="+Inf"} 4',
+            'test_seconds_sum 4.25',
+            'test_seconds_count 4',
+        ])
@@ -0,0 +1,132 @@
+from unittest import mock
+
+from django.db import transaction
+from django.test import TestCase
+
+from core.models import Payment
+from .utils import make_member, make_user
+
+
+@mock.patch('core.notifications.send_batch')
+class NotificationBufferTests(TestCase):
+    def test_transaction_sends_one_coalesced_batch(self, send_batch):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                member = make_member()
+                payment = Payment.objects.create(member=member, amount=10)
+                payment.amount = 20
+                payment.save()
+                temp = Payment.objects.create(member=member, amount=1)
+                temp.delete()
+            self.assertFalse(send_batch.called)
+
+        send_batch.assert_called_once()
+        payloads = [payload for payload, member_id in send_batch.call_args[0][0]]
+        self.assertEqual(
+            [(p['model'], p['action']) for p in payloads],
+            [('member', 'created'), ('payment', 'created')],
+        )
+        self.assertEqual(payloads[1]['data']['amount'], '20.00')
+
+    def test_rolled_back_changes_are_not_sent(self, send_batch):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    make_member()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertFalse(send_batch.called)
+
+    def test_one_commit_hook_per_transaction(self, send_batch):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                for _ in range(20):
+                    make_member(user=make_user('member'))
+        # The role invalidations, the notification buffer and the savepoint its
+        # events were queued in: not one per row
+        self.assertEqual(len(callbacks), 3)
+        send_batch.assert_called_once()
+        self.assertEqual(len(send_batch.call_args[0][0]), 20)
+
+    def test_changes_of_a_rolled_back_savepoint_are_not_sent(self, send_batch):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                kept = make_member()
+                try:
+                    with transaction.atomic():
+                        payment = Payment.objects.create(member=kept, amount=10)
+                        kept.name = 'Renamed'
+                        kept.save()
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                other = make_member()
+        send_batch.assert_called_once()
+        payloads = [payload for payload, member_id in send_batch.call_args[0][0]]
+        self.assertEqual(
+            [(p['model'], p['action'], p['data']['id']) for p in payloads],
+            [('member', 'created', kept.pk), ('member', 'created', other.pk)],
+        )
+        self.assertFalse(Payment.objects.filter(pk=payment.pk).exists())
+
+    def test_buffer_of_a_rolled_back_savepoint_is_replaced(self, send_batch):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                try:
+                    with transaction.atomic():
+                        make_member()
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                kept = make_member()
+        send_batch.assert_called_once()
+        payloads = [payload for payload, member_id in send_batch.call_args[0][0]]
+        self.assertEqual([p['data']['id'] for p in payloads], [kept.pk])
+
+    def test_updates_are_sent_as_versioned_patches(self, send_batch):
+        with self.captureOnCommitCallbacks(execute=True):
+            member = make_member()
+            payment = Payment.objects.create(member=member, amount=10)
+        self.assertEqual(payment.version, 1)
+        send_batch.reset_mock()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                payment.status = 'Unpaid'
+                payment.save()
+                payment.amount = 15
+                payment.save()
+        payload, member_id = send_batch.call_args[0][0][0]
+        self.assertEqual(member_id, member.pk)
+        self.assertEqual(payload['action'], 'patched')
+        self.assertEqual(payload['base_version'], 1)
+        self.assertEqual(
+            payload['data'],
+            {'id': payment.pk, 'version': 3, 'amount': '15.00', 'status': 'Unpaid'},
+        )
+        payment.refresh_from_db()
+        self.assertEqual(payment.version, 3)
+
+        send_batch.reset_mock()
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.save()  # no changes: no version bump, nothing sent
+        self.assertFalse(send_batch.called)
+        payment.refresh_from_db()
+        self.assertEqual(payment.version, 3)
+
+    def test_relation_change_patches_denormalized_fields(self, send_batch):
+        with self.captureOnCommitCallbacks(execute=True):
+            payment = Payment.objects.create(member=make_member(), amount=10)
+            other = make_member()
+        send_batch.reset_mock()
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.member = other
+            payment.save()
+        payload, member_id = send_batch.call_args[0][0][0]
+        self.assertEqual(member_id, other.pk)
+        self.assertEqual(
+            set(payload['data']),
+            {'id', 'version', 'member', 'member_name', 'member_email', 'member_room'},
+        )
@@ -0,0 +1,55 @@
+import datetime
+
+from django.test import TestCase, override_settings
+
+from core.models import Payment
+from .utils import authed_client, make_member, make_user
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = authed_client(make_user('staff'))
+        member = make_member()
+        # Several payments share a date so the id tie-breaker is exercised
+        for i in range(7):
+            payment = Payment.objects.create(member=member, amount=i)
+            Payment.objects.filter(pk=payment.pk).update(
+                payment_date=datetime.date(2025, 1, 1 + i // 3)
+            )
+        self.expected = list(
+            Payment.objects.order_by('-payment_date', '-id').values_list('id', flat=True)
+        )
+
+    def walk(self, url):
+        ids, pages = [], []
+        while url:
+            body = self.client.get(url).json()
+            pages.append(body)
+            ids.extend(row['id'] for row in body['results'])
+            url = body['next']
+        return ids, pages
+
+    def test_legacy_array_without_params(self):
+        body = self.client.get('/api/payments/').json()
+        self.assertIsInstance(body, list)
+        self.assertEqual(len(body), 7)
+
+    def test_forward_walk_is_complete_and_ordered(self):
+        ids, pages = self.walk('/api/payments/?page_size=3')
+        self.assertEqual(ids, self.expected)
+        self.assertEqual([len(p['results']) for p in pages], [3, 3, 1])
+        self.assertIsNone(pages[0]['previous'])
+
+    def test_previous_link_returns_preceding_page(self):
+        _, pages = self.walk('/api/payments/?page_size=3')
+        body = self.client.get(pages[2]['previous']).json()
+        self.assertEqual(body['results'], pages[1]['results'])
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get('/api/payments/?cursor=bogus')
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(PAGINATION_LEGACY_ARRAY=False)
+    def test_paginates_by_default_when_legacy_disabled(self):
+        body = self.client.get('/api/payments/').json()
+        self.assertEqual([row['id'] for row in body['results']], self.expected)
@@ -0,0 +1,177 @@
+"""
+Performance regression suite for the hot read endpoints.
+
+Seeds a production-sized dataset (``SEED_MEMBERS`` members with their
+payments, bills, repairs and schedules), then requests every endpoint in
+``BUDGETS`` as staff and as a member (whose querysets are scoped to their
+own rows) and fails when a response takes more queries than its budget or
+longer than its time budget. A serializer field that adds a query per row,
+or a lost index, shows up here.
+
+Query counts are taken with warm per-process caches (roles). Timings are
+the best of ``TIMING_RUNS`` requests; scale the time budgets for slow
+machines with ``PERF_TIME_SCALE=2`` and write the measurements to a JSON
+file with ``PERF_REPORT=perf.json``. Skip the suite with
+``python manage.py test core --exclude-tag performance``.
+"""
+import datetime
+import json
+import os
+import time
+
+from django.db import connection
+from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
+
+from core import summary
+from core.models import Member, Schedule, Payment, Bill, Repair
+from core.signals import suppress_row_handlers
+from .utils import authed_client, make_user
+
+
+SEED_MEMBERS = 10_000
+PAYMENTS_PER_MEMBER = 4
+BILLS_PER_MEMBER = 3
+OWN_HISTORY = 24  # months of payments and bills for the signed-in member
+TIMING_RUNS = 3
+
+# role -> name -> (url, max queries, max milliseconds)
+BUDGETS = {
+    'staff': {
+        'members page': ('/api/members/?page_size=50', 2, 150),
+        'members search': ('/api/members/?search=member%2099&page_size=50', 2, 150),
+        'member detail': ('/api/members/{member}/', 2, 100),
+        'member ledger': ('/api/members/{member}/ledger/', 3, 100),
+        'schedules page': ('/api/schedules/?page_size=50', 2, 150),
+        'payments page': ('/api/payments/?page_size=50', 2, 150),
+        'payments next page': ('{payments_next}', 2, 150),
+        'unpaid payments page': ('/api/payments/?status=Unpaid&page_size=50', 2, 150),
+        'payment detail': ('/api/payments/{payment}/', 2, 100),
+        'bills page': ('/api/bills/?page_size=50', 2, 150),
+        'repairs page': ('/api/repairs/?page_size=50', 2, 150),
+        'dashboard stats': ('/api/dashboard/stats/', 6, 150),
+        'payments export': ('/api/payments/export/?as=csv', 1, 5000),
+    },
+    'member': {
+        'own payments': ('/api/payments/', 2, 100),
+        'own payments page': ('/api/payments/?page_size=10', 2, 100),
+        'own payment detail': ('/api/payments/{payment}/', 2, 100),
+        'own bills': ('/api/bills/', 2, 100),
+        'own repairs': ('/api/repairs/', 2, 100),
+        'own ledger': ('/api/ledger/', 2, 100),
+        'own user': ('/api/users/', 2, 100),
+    },
+}
+
+
+def seed_dataset():
+    """Bulk-load the dataset; returns the id of the member the member user is linked to."""
+    today = datetime.date.today()
+    with suppress_row_handlers():
+        Member.objects.bulk_create([
+            Member(name=f'Member {i}', email=f'perf{i}@example.com', room_number=str(100 + i % 200),
+                   status='Active' if i % 10 else 'Inactive')
+            for i in range(SEED_MEMBERS)
+        ], batch_size=1000)
+        ids = list(Member.objects.order_by('id').values_list('id', flat=True))
+        own = ids[0]
+        Payment.objects.bulk_create([
+            Payment(member_id=pk, amount=100 + n, status='Unpaid' if n == 0 else 'Paid')
+            for pk in ids for n in range(PAYMENTS_PER_MEMBER if pk != own else OWN_HISTORY)
+        ], batch_size=1000)
+        Bill.objects.bulk_create([
+            Bill(member_id=pk, month=f'{2024 + n // 12}-{n % 12 + 1:02d}', balance=50,
+                 paid_status='Paid' if n else 'Unpaid')
+            for pk in ids for n in range(BILLS_PER_MEMBER if pk != own else OWN_HISTORY)
+        ], batch_size=1000)
+        Repair.objects.bulk_create([
+            Repair(member_id=pk, item_name='Tap', repair_date=today - datetime.timedelta(days=n % 365), cost=10)
+            for n, pk in enumerate(ids[::10])
+        ], batch_size=1000)
+        Schedule.objects.bulk_create([
+            Schedule(task_type='Water', assigned_to_id=pk, date=today - datetime.timedelta(days=n % 30),
+                     time=datetime.time(9), completed=bool(n % 2))
+            for n, pk in enumerate(ids[::5])
+        ], batch_size=1000)
+    summary.rebuild()
+    return own
+
+
+@tag('performance')
+class EndpointBudgetTests(TestCase):
+    report = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        own = seed_dataset()
+        cls.staff = make_user('staff')
+        cls.member_user = make_user('member')
+        Member.objects.filter(pk=own).update(user=cls.member_user)
+        cls.ids = {
+            'member': own,
+            'payment': Payment.objects.filter(member_id=own).values_list('id', flat=True).first(),
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        path = os.getenv('PERF_REPORT')
+        if path and cls.report:
+            with open(path, 'w') as fh:
+                json.dump({'members': SEED_MEMBERS, 'endpoints': cls.report}, fh, indent=2, sort_keys=True)
+        super().tearDownClass()
+
+    def measure(self, client, url):
+        """``(queries, best milliseconds)`` of GET ``url``, after a warm-up request."""
+        self.fetch(client, url)
+        with CaptureQueriesContext(connection) as ctx:
+            self.fetch(client, url)
+        # Read before the next request resets the query log
+        queries = ctx.captured_queries
+        timings = []
+        for _ in range(TIMING_RUNS):
+            start = time.perf_counter()
+            self.fetch(client, url)
+            timings.append((time.perf_counter() - start) * 1000)
+        return queries, min(timings)
+
+    def fetch(self, client, url):
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        if response.streaming:
+            # Streamed responses query as they are consumed
+            b''.join(response.streaming_content)
+        return response
+
+    def check_budgets(self, role, client, urls):
+        scale = float(os.getenv('PERF_TIME_SCALE', '1'))
+        for name, (url, max_queries, max_ms) in BUDGETS[role].items():
+            url = url.format(**urls)
+            with self.subTest(role=role, endpoint=name):
+                queries, ms = self.measure(client, url)
+                self.report[f'{role}: {name}'] = {
+                    'url': url, 'queries': len(queries), 'query_budget': max_queries,
+                    'ms': round(ms, 2), 'ms_budget': max_ms * scale,
+                }
+                self.assertLessEqual(
+                    len(queries), max_queries,
+                    f'{role} {url}: {len(queries)} queries, budget {max_queries}:\n'
+                    + '\n'.join(q['sql'] for q in queries),
+                )
+                self.assertLessEqual(
+                    ms, max_ms * scale, f'{role} {url}: {ms:.1f}ms, budget {max_ms * scale:g}ms',
+                )
+
+    def test_staff_budgets(self):
+        client = authed_client(self.staff)
+        first_page = self.fetch(client, '/api/payments/?page_size=50').data
+        self.assertEqual(len(first_page['results']), 50)
+        search = self.fetch(client, BUDGETS['staff']['members search'][0]).data
+        self.assertEqual(len(search['results']), 50)
+        self.check_budgets('staff', client, {**self.ids, 'payments_next': first_page['next']})
+
+    def test_member_budgets(self):
+        client = authed_client(self.member_user)
+        response = self.fetch(client, '/api/payments/')
+        # Scoped to the member's own rows
+        self.assertEqual(len(response.data), OWN_HISTORY)
+        self.check_budgets('member', client, self.ids)
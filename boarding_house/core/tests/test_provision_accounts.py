@@ -0,0 +1,65 @@
+import csv
+import io
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Member
+from .utils import make_member, make_user
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+@mock.patch('core.notifications._group_send')
+class ProvisionMemberAccountsTests(TestCase):
+    def provision(self, *args):
+        path = os.path.join(tempfile.mkdtemp(), 'credentials.csv')
+        self.addCleanup(os.unlink, path)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('provision_member_accounts', '--output', path, *args, stdout=io.StringIO())
+        with open(path, newline='') as fh:
+            return list(csv.DictReader(fh)), os.stat(path).st_mode & 0o777
+
+    def test_creates_profiles_and_links_in_batches(self, send):
+        linked = make_member(user=make_user('member'))
+        make_member(email='clash@example.com')
+        make_user('staff', username='clash@example.com')
+        members = [make_member() for _ in range(5)]
+
+        with CaptureQueriesContext(connection) as ctx:
+            rows, mode = self.provision('--workers', '0', '--batch-size', '2')
+        self.assertEqual(mode, 0o600)
+        self.assertEqual(sorted(int(row['member_id']) for row in rows), [m.id for m in members])
+        # No per-user count / profile queries: a fixed handful per batch of 2
+        self.assertLess(len(ctx.captured_queries), 3 * 12)
+        self.assertFalse(any('COUNT(' in q['sql'] for q in ctx.captured_queries))
+
+        for row in rows:
+            user = authenticate(username=row['username'], password=row['password'])
+            self.assertIsNotNone(user)
+            self.assertEqual(user.profile.role, 'member')
+            member = Member.objects.get(pk=row['member_id'])
+            self.assertEqual((member.user_id, member.version), (user.pk, 2))
+        self.assertEqual(Member.objects.get(pk=linked.pk).version, 1)
+        self.assertEqual(len(send.call_args_list), 3)  # one bulk_updated per batch
+
+        # Nothing left to do on a second run
+        rows, _ = self.provision('--workers', '0')
+        self.assertEqual(rows, [])
+
+    def test_hashes_in_a_process_pool(self, send):
+        make_member(email='pool@example.com')
+        rows, _ = self.provision('--workers', '2')
+        self.assertTrue(User.objects.get(username='pool@example.com').check_password(rows[0]['password']))
+
+    def test_refuses_to_overwrite_output(self, send):
+        handle = tempfile.NamedTemporaryFile(delete=False)
+        self.addCleanup(os.unlink, handle.name)
+        with self.assertRaisesMessage(CommandError, 'Cannot create'):
+            call_command('provision_member_accounts', '--output', handle.name, stdout=io.StringIO())
@@ -0,0 +1,41 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from .utils import QueryCountAssertionsMixin, authed_client, make_member, make_user, seed_rows
+
+
+LIST_URLS = [
+    '/api/members/',
+    '/api/schedules/',
+    '/api/payments/',
+    '/api/bills/',
+    '/api/repairs/',
+    '/api/dashboard/stats/',
+]
+
+MEMBER_URLS = ['/api/payments/', '/api/bills/', '/api/repairs/']
+
+
+class ListQueryPlanTests(QueryCountAssertionsMixin, TestCase):
+    def test_staff_list_queries_do_not_scale(self):
+        client = authed_client(make_user('staff'))
+        for url in LIST_URLS:
+            with self.subTest(url=url):
+                self.assertQueriesDoNotScale(client, url, seed_rows)
+
+    def test_member_scoped_list_queries_do_not_scale(self):
+        user = make_user('member')
+        member = make_member(user=user)
+        client = authed_client(user)
+        for url in MEMBER_URLS:
+            with self.subTest(url=url):
+                self.assertQueriesDoNotScale(client, url, lambda n: seed_rows(n, member=member))
+
+
+class IndexUsageTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        seed_rows(5)
+        # Raises CommandError listing the offending plans on a full scan
+        call_command('check_query_plans', stdout=io.StringIO())
@@ -0,0 +1,112 @@
+from django.db.models import F
+from django.db.models.signals import pre_save
+from django.test import TestCase
+
+from core import representations
+from core.models import Payment
+from core.representations import RepresentationCache
+from core.serializers import PaymentSerializer
+from .utils import authed_client, make_member, make_user
+
+
+class RepresentationCacheTests(TestCase):
+    def setUp(self):
+        self.staff = authed_client(make_user('staff'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member = make_member(name='Alice')
+            self.payment = Payment.objects.create(member=self.member, amount=100)
+        representations.cache.clear()
+
+    def get(self, url):
+        response = self.staff.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_detail_is_served_from_the_cache(self):
+        url = f'/api/payments/{self.payment.pk}/'
+        first = self.get(url)
+        hits = representations.cache.hits
+        self.assertEqual(self.get(url), first)
+        self.assertEqual(representations.cache.hits, hits + 1)
+        self.assertEqual(first, PaymentSerializer(Payment.objects.get(pk=self.payment.pk)).data)
+
+    def test_save_replaces_the_entry(self):
+        url = f'/api/payments/{self.payment.pk}/'
+        self.get(url)
+        response = self.staff.patch(url, {'status': 'Paid'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'Paid')
+        self.assertEqual(self.get(url)['status'], 'Paid')
+
+    def test_member_rename_reaches_cached_dependents(self):
+        url = f'/api/payments/{self.payment.pk}/'
+        self.assertEqual(self.get(url)['member_name'], 'Alice')
+        response = self.staff.patch(f'/api/members/{self.member.pk}/', {'name': 'Alicia'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get(url)['member_name'], 'Alicia')
+
+    def test_deleting_the_linked_user_reaches_the_cached_member(self):
+        user = make_user('member')
+        with self.captureOnCommitCallbacks(execute=True):
+            member = make_member(user=user)
+        url = f'/api/members/{member.pk}/'
+        first = self.get(url)
+        self.assertEqual(first['user'], user.pk)
+        user.delete()
+        data = self.get(url)
+        self.assertIsNone(data['user'])
+        self.assertEqual(data['version'], first['version'] + 1)
+
+    def test_delete_evicts(self):
+        self.get(f'/api/payments/{self.payment.pk}/')
+        self.assertEqual(len(representations.cache), 1)
+        response = self.staff.delete(f'/api/payments/{self.payment.pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(len(representations.cache), 0)
+
+    def test_broadcast_fills_the_cache_for_the_next_read(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            payment = Payment.objects.create(member=self.member, amount=7)
+        hits = representations.cache.hits
+        self.assertEqual(self.get(f'/api/payments/{payment.pk}/')['amount'], '7.00')
+        self.assertEqual(representations.cache.hits, hits + 1)
+
+    def test_concurrent_saves_get_distinct_versions(self):
+        url = f'/api/payments/{self.payment.pk}/'
+        stale = Payment.objects.get(pk=self.payment.pk)
+
+        def other_writer(sender, instance, **kwargs):
+            # Another request saves the row after this one read it
+            Payment.objects.filter(pk=instance.pk).update(amount=5, version=F('version') + 1)
+            self.get(url)  # and its representation gets cached
+
+        pre_save.connect(other_writer, sender=Payment, weak=False)
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                stale.collected_by = 'Clerk'
+                stale.save()
+        finally:
+            pre_save.disconnect(other_writer, sender=Payment)
+
+        self.assertEqual((stale.version, stale._base_version), (3, 2))
+        data = self.get(url)
+        self.assertEqual((data['version'], data['collected_by'], data['amount']), (3, 'Clerk', '100.00'))
+
+    def test_saved_row_replaces_an_entry_with_the_same_stamp(self):
+        url = f'/api/payments/{self.payment.pk}/'
+        stale = self.get(url)
+        stamp = representations.stamp(PaymentSerializer, self.payment)
+        representations.cache.put('payment', self.payment.pk, stamp, {**stale, 'status': 'Stale'})
+        representations.store(PaymentSerializer, self.payment)
+        self.assertEqual(self.get(url)['status'], self.payment.status)
+
+    def test_least_recently_used_is_evicted(self):
+        lru = RepresentationCache(2)
+        lru.put('payment', 1, (1,), {'id': 1})
+        lru.put('payment', 2, (1,), {'id': 2})
+        self.assertEqual(lru.get('payment', 1, (1,)), {'id': 1})
+        lru.put('payment', 3, (1,), {'id': 3})
+        self.assertIsNone(lru.get('payment', 2, (1,)))
+        self.assertEqual(lru.get('payment', 1, (1,)), {'id': 1})
+        self.assertIsNone(lru.get('payment', 1, (2,)))
+        self.assertEqual((len(lru), lru.evictions), (2, 1))
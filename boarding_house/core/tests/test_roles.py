@@ -0,0 +1,127 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from core import roles
+from core.models import Payment, UserProfile
+from core.roles import RoleCache, RoleChanges, RoleInfo
+from .utils import authed_client, make_member, make_user
+
+
+class RoleCacheInvalidationTests(TestCase):
+    def setUp(self):
+        roles.role_cache.clear()
+        roles.role_changes.clear()
+
+    def test_demoted_staff_is_refused_on_the_next_request(self):
+        user = make_user('staff')
+        client = authed_client(user)
+        self.assertEqual(client.get('/api/members/').status_code, 200)
+        self.assertIsNotNone(roles.role_cache.get(user.pk))
+
+        UserProfile.objects.filter(user=user).update(role='member')
+        # Cached: an UPDATE without the signal goes unnoticed until the TTL
+        self.assertEqual(client.get('/api/members/').status_code, 200)
+        profile = user.profile
+        profile.role = 'member'
+        profile.save()
+        self.assertEqual(client.get('/api/members/').status_code, 403)
+
+    def test_relinking_a_member_changes_the_visible_rows(self):
+        user = make_user('member')
+        first, second = make_member(user=user), make_member()
+        Payment.objects.create(member=first, amount=1)
+        Payment.objects.create(member=second, amount=2)
+        client = authed_client(user)
+
+        def amounts():
+            return [row['amount'] for row in client.get('/api/payments/').data]
+
+        self.assertEqual(amounts(), ['1.00'])
+        first.user = None
+        first.save()
+        second.user = user
+        second.save()
+        self.assertEqual(amounts(), ['2.00'])
+
+    @override_settings(ROLE_CLAIMS_FROM_TOKEN=True)
+    def test_token_claims_do_not_outlive_a_role_change(self):
+        user = make_user('staff', password='pass')
+        tokens = APIClient().post('/api/auth/token/', {'username': user.username, 'password': 'pass'}).data
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+        self.assertEqual(client.get('/api/members/').status_code, 200)
+
+        profile = user.profile
+        profile.role = 'member'
+        profile.save()
+        self.assertEqual(client.get('/api/members/').status_code, 403)
+
+        # A refreshed access token gets the claims resolved again
+        access = APIClient().post('/api/auth/token/refresh/', {'refresh': tokens['refresh']}).data['access']
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(client.get('/api/members/').status_code, 403)
+        self.assertEqual(client.get('/api/payments/').status_code, 200)
+
+        # Claims minted after the change are trusted again
+        tokens = APIClient().post('/api/auth/token/', {'username': user.username, 'password': 'pass'}).data
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+        self.assertEqual(client.get('/api/members/').status_code, 403)
+        self.assertEqual(client.get('/api/payments/').status_code, 200)
+
+
+    @override_settings(ROLE_CLAIMS_FROM_TOKEN=True)
+    def test_refresh_picks_up_a_change_made_by_another_worker(self):
+        user = make_user('staff', password='pass')
+        tokens = APIClient().post('/api/auth/token/', {'username': user.username, 'password': 'pass'}).data
+        self.assertEqual(AccessToken(tokens['access'])[roles.ROLE_CLAIM], 'staff')
+        self.assertNotIn(roles.ROLE_CLAIM, RefreshToken(tokens['refresh']).payload)
+
+        # Another process demotes the user: no signal here, the cache entry expires
+        UserProfile.objects.filter(user=user).update(role='member')
+        roles.role_cache.clear()
+        access = APIClient().post('/api/auth/token/refresh/', {'refresh': tokens['refresh']}).data['access']
+        self.assertEqual(AccessToken(access)[roles.ROLE_CLAIM], 'member')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(client.get('/api/members/').status_code, 403)
+
+
+class RoleCacheTests(TestCase):
+    def test_entries_expire_after_the_ttl(self):
+        cache = RoleCache(max_size=10, ttl=300)
+        with mock.patch('core.roles.time.monotonic', return_value=1000):
+            cache.set(1, RoleInfo('staff', None))
+        with mock.patch('core.roles.time.monotonic', return_value=1299):
+            self.assertEqual(cache.get(1), RoleInfo('staff', None))
+        with mock.patch('core.roles.time.monotonic', return_value=1301):
+            self.assertIsNone(cache.get(1))
+        self.assertEqual(len(cache), 0)
+
+    def test_least_recently_used_is_dropped(self):
+        cache = RoleCache(max_size=2, ttl=300)
+        cache.set(1, RoleInfo('staff', None))
+        cache.set(2, RoleInfo('member', 7))
+        cache.get(1)
+        cache.set(3, RoleInfo('admin', None))
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(1), RoleInfo('staff', None))
+        self.assertEqual(len(cache), 2)
+
+    def test_changes_past_the_size_bound_distrust_older_tokens(self):
+        changes = RoleChanges(max_size=1, retention=3600)
+        with mock.patch('core.roles.time.time', return_value=1000):
+            changes.record(1)
+            self.assertTrue(changes.trusts(3, None))
+        with mock.patch('core.roles.time.time', return_value=1010):
+            changes.record(2)
+        with mock.patch('core.roles.time.time', return_value=1020):
+            # User 1's change was folded into the floor, which covers everyone
+            self.assertFalse(changes.trusts(1, 999))
+            self.assertFalse(changes.trusts(3, 999))
+            self.assertTrue(changes.trusts(3, 1001))
+            self.assertFalse(changes.trusts(2, 1005))
+        with mock.patch('core.roles.time.time', return_value=5000):
+            self.assertTrue(changes.trusts(2, None))
@@ -0,0 +1,58 @@
+import datetime
+import io
+
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+
+from core import summary
+from core.models import Bill, Payment, Repair, Schedule
+from .utils import authed_client, make_member, make_user
+
+
+class DashboardSummaryTests(TestCase):
+    def setUp(self):
+        self.client = authed_client(make_user('staff'))
+        self.member = make_member()
+
+    def test_signal_deltas_match_full_rebuild(self):
+        today = datetime.date.today()
+        payment = Payment.objects.create(member=self.member, amount=40, status='Unpaid')
+        Payment.objects.create(member=self.member, amount=10, status='Paid')
+        bill = Bill.objects.create(member=self.member, month='2025-01', balance=25)
+        Repair.objects.create(member=self.member, item_name='Fan', repair_date=today, cost=5)
+        schedule = Schedule.objects.create(
+            task_type='Food', assigned_to=self.member, date=today, time=datetime.time(8),
+        )
+
+        payment.status = 'Paid'
+        payment.save()
+        bill.balance = 30
+        bill.save()
+        schedule.completed = True
+        schedule.save()
+        self.member.status = 'Inactive'
+        self.member.save()
+        make_member().delete()
+
+        self.assertEqual(summary.drift(), {})
+
+        stats = self.client.get('/api/dashboard/stats/').json()
+        self.assertEqual(stats['members'], {'total': 1, 'active': 0, 'inactive': 1})
+        self.assertEqual(stats['payments'], {'pending_count': 0, 'pending_amount': 0.0})
+        self.assertEqual(stats['bills'], {'unpaid_count': 1, 'unpaid_amount': 30.0})
+        self.assertEqual(stats['repairs'], {'pending': 1})
+        self.assertEqual(stats['schedules'], {'today': 1, 'completed_today': 1})
+
+    def test_cascade_delete_is_reflected(self):
+        Payment.objects.create(member=self.member, amount=40, status='Unpaid')
+        self.member.delete()
+        self.assertEqual(summary.drift(), {})
+
+    def test_command_detects_and_repairs_drift(self):
+        Payment.objects.create(member=self.member, amount=40, status='Unpaid')
+        # Bypass signals to simulate drift
+        Payment.objects.update(status='Paid')
+        with self.assertRaises(CommandError):
+            call_command('rebuild_dashboard_summary', '--check', stdout=io.StringIO())
+        call_command('rebuild_dashboard_summary', stdout=io.StringIO())
+        self.assertEqual(summary.drift(), {})
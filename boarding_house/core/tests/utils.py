@@ -0,0 +1,76 @@
+"""
+Shared helpers for the core test-suite.
+"""
+import datetime
+import itertools
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.models import Member, Schedule, Payment, Bill, Repair, UserProfile
+
+
+_seq = itertools.count()
+
+
+def make_user(role, username=None, password='pass'):
+    username = username or f'{role}{next(_seq)}'
+    user = User.objects.create_user(username=username, password=password)
+    UserProfile.objects.update_or_create(user=user, defaults={'role': role})
+    return user
+
+
+def authed_client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def make_member(**kwargs):
+    n = next(_seq)
+    kwargs.setdefault('name', f'Member {n}')
+    kwargs.setdefault('email', f'member{n}@example.com')
+    kwargs.setdefault('room_number', str(100 + n % 50))
+    return Member.objects.create(**kwargs)
+
+
+def seed_rows(count, member=None):
+    """Create ``count`` members, each with a payment, bill, repair and schedule."""
+    today = datetime.date.today()
+    for _ in range(count):
+        owner = member or make_member()
+        Payment.objects.create(member=owner, amount=100, status='Unpaid')
+        Bill.objects.create(member=owner, month='2025-01', balance=50)
+        Repair.objects.create(member=owner, item_name='Tap', repair_date=today, cost=10)
+        Schedule.objects.create(task_type='Water', assigned_to=owner, date=today, time=datetime.time(9))
+
+
+class QueryCountAssertionsMixin:
+    """
+    ``assertQueriesDoNotScale`` fails when an endpoint's query count grows
+    with the number of rows it returns (an N+1 on a serializer relation).
+    """
+
+    def count_queries(self, client, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, response.content[:200])
+        return len(ctx.captured_queries), ctx.captured_queries
+
+    def assertQueriesDoNotScale(self, client, url, seed, small=1, large=10):
+        """
+        Seed ``small`` rows, count queries for ``url``, seed up to ``large``
+        rows and assert the count is unchanged.
+        """
+        seed(small)
+        self.count_queries(client, url)  # warm per-process caches (roles)
+        small_count, _ = self.count_queries(client, url)
+        seed(large - small)
+        large_count, queries = self.count_queries(client, url)
+        self.assertEqual(
+            small_count, large_count,
+            f'{url}: {small_count} queries for {small} rows but {large_count} '
+            f'for {large} rows:\n' + '\n'.join(q['sql'] for q in queries),
+        )
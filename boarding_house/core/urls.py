@@ -1,5 +1,7 @@
+from django.conf import settings
 from rest_framework import routers
 from django.urls import path, include
+from .async_views import async_urlpatterns
 from .views import (
     MemberViewSet,
     ScheduleViewSet,
@@ -7,6 +9,9 @@ from .views import (
     BillViewSet,
     RepairViewSet,
     DashboardViewSet,
+    MeterViewSet,
+    LedgerViewSet,
+    MetricsViewSet,
     UserViewSet,
 )
 
@@ -17,8 +22,14 @@ router.register(r'payments', PaymentViewSet)
 router.register(r'bills', BillViewSet)
 router.register(r'repairs', RepairViewSet)
 router.register(r'dashboard', DashboardViewSet, basename='dashboard')
+router.register(r'meters', MeterViewSet, basename='meter')
+router.register(r'ledger', LedgerViewSet, basename='ledger')
+router.register(r'metrics', MetricsViewSet, basename='metrics')
 router.register(r'users', UserViewSet, basename='user')
 
+# GET on list/detail/dashboard routes served on the event loop (core/async_views.py)
+routes = async_urlpatterns(router.urls) if settings.ASYNC_READ_VIEWS else router.urls
+
 urlpatterns = [
-    path('', include(router.urls)),
+    path('', include(routes)),
 ]
@@ -0,0 +1,106 @@
+"""
+Per-row versions and field-level deltas for the WebSocket stream.
+
+Member, Schedule, Payment, Bill and Repair rows carry a ``version`` column
+that is bumped on every save that changes a column. ``remember_previous``
+(pre_save) loads the stored row once, works out which columns changed and
+sets the new version; the notification for the update (``core/notifications``)
+then carries only the serializer fields derived from those columns::
+
+    {"model": "schedule", "action": "patched", "base_version": 4,
+     "data": {"id": 7, "version": 5, "completed": true}}
+
+A client applies a patch only if its copy of the row is at ``base_version``;
+on a gap it asks for the full row (``{"action": "fetch", "model", "id"}`` on
+the socket, or the REST detail endpoint).
+
+The bump is done by the UPDATE itself (``version = version + 1``) and read
+back in post_save (``settle``), so two concurrent saves of the same row
+always get distinct versions. Bulk writes bump versions themselves (see
+``core/bulk.py``).
+"""
+from django.db.models import F
+
+from .models import Member, Schedule, Payment, Bill, Repair
+
+
+VERSIONED_MODELS = (Member, Schedule, Payment, Bill, Repair)
+VERSION_FIELD = 'version'
+
+
+def _compared_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if field.attname != VERSION_FIELD and not field.primary_key
+    ]
+
+
+def remember_previous(instance):
+    """
+    pre_save: load the stored row (``{attname: value}``, or ``None`` for an
+    insert) and bump ``instance.version`` if any column changed.
+
+    Stores the changed field names as ``instance._changed_fields``.
+    """
+    model = type(instance)
+    if instance.pk is None or instance._state.adding:
+        instance._previous_row = None
+        instance._changed_fields = None
+        instance._base_version = None
+        return None
+
+    previous = model.objects.filter(pk=instance.pk).values(
+        *[field.attname for field in model._meta.concrete_fields]
+    ).first()
+    instance._previous_row = previous
+    if previous is None:
+        instance._changed_fields = None
+        instance._base_version = None
+        return None
+
+    changed = set()
+    for field in _compared_fields(model):
+        try:
+            value = field.to_python(getattr(instance, field.attname))
+        except Exception:
+            value = getattr(instance, field.attname)
+        if value != previous[field.attname]:
+            changed.add(field.name)
+    instance._changed_fields = changed
+    instance._base_version = previous[VERSION_FIELD]
+    if changed:
+        # Atomic in the UPDATE: the stored version may have moved since the read
+        instance.version = F(VERSION_FIELD) + 1
+    else:
+        instance.version = previous[VERSION_FIELD]
+    return previous
+
+
+def settle(instance):
+    """
+    post_save: replace the ``F()`` bump set by ``remember_previous`` with the
+    version the UPDATE wrote, and make ``_base_version`` the one it replaced.
+    """
+    if hasattr(getattr(instance, VERSION_FIELD), 'resolve_expression'):
+        instance.refresh_from_db(fields=[VERSION_FIELD])
+        instance._base_version = getattr(instance, VERSION_FIELD) - 1
+
+
+def changed_fields(instance):
+    """Model field names changed by the last save (``None`` if unknown or an insert)."""
+    return getattr(instance, '_changed_fields', None)
+
+
+def delta_fields(serializer, changed):
+    """
+    Names of ``serializer``'s fields whose value can depend on the ``changed``
+    model fields, plus ``id`` and ``version``. ``source='member.name'`` style
+    fields count as depending on ``member``.
+    """
+    names = {'id', VERSION_FIELD}
+    for name, field in serializer.fields.items():
+        source = field.source or name
+        root = name if source == '*' else source.split('.')[0]
+        if root in changed:
+            names.add(name)
+    return names
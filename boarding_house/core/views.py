@@ -1,11 +1,15 @@
-from rest_framework import viewsets
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Sum, Q
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.http import HttpResponse
 from django.utils import timezone
-from datetime import datetime, timedelta
-from .models import Member, Schedule, Payment, Bill, Repair
+from django.utils.dateparse import parse_date
+from datetime import datetime
+from .models import Member, Schedule, Payment, Bill, Repair, MeterUsage, normalize_month
 from .serializers import (
     MemberSerializer,
     ScheduleSerializer,
@@ -13,64 +17,171 @@ from .serializers import (
     BillSerializer,
     RepairSerializer,
     UserSerializer,
+    MeterUsageSerializer,
 )
-from .permissions import IsStaff, IsOwnerOrStaff
+from .permissions import IsStaff, IsOwnerOrStaff, IsMember
+from . import governance, meters, metrics, roles, summary
+from .ledger import LedgerPagination
+from .bulk import BulkWriteMixin
+from .changes import ConditionalGetMixin, aconditional_get, conditional_get
+from .exports import ExportMixin
+from .async_views import AsyncReadMixin
+from .fastpath import FastListMixin
+from .representations import RepresentationCacheMixin
 
 
-class MemberViewSet(viewsets.ModelViewSet):
+class PlannedQuerysetMixin:
+    """Apply the serializer's declared query plan (see QueryPlanMixin)"""
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return self.get_serializer_class().plan_queryset(queryset)
+
+
+class TransactionalWriteMixin:
+    """
+    Run each write together with its signal side effects (dashboard summary
+    deltas) in one transaction
+    """
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            super().perform_update(serializer)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            super().perform_destroy(instance)
+
+
+class MemberViewSet(BulkWriteMixin, TransactionalWriteMixin, PlannedQuerysetMixin, ConditionalGetMixin, RepresentationCacheMixin, AsyncReadMixin, viewsets.ModelViewSet):
     queryset = Member.objects.all()
     serializer_class = MemberSerializer
     permission_classes = [IsStaff]  # Only staff/admin can manage members
+    cursor_ordering = ('-id',)
+    change_scope = 'member'
+    filter_fields = {'status': 'status', 'room': 'room_number'}
+    search_fields = ['name', 'email', 'room_number']
+    ordering_fields = ['name', 'room_number']
+    bulk_model_name = 'member'
+
+    @action(detail=True, methods=['get'])
+    def ledger(self, request, pk=None):
+        """The member's statement with a running balance (see core/ledger.py)"""
+        try:
+            member_id = Member._meta.pk.to_python(pk)
+        except Exception:
+            raise NotFound()
+        if not Member.objects.filter(pk=member_id).exists():
+            raise NotFound()
+        return ledger_response(request, member_id)
+
 
+def ledger_response(request, member_id):
+    return conditional_get(
+        request, ['payment', 'bill', 'repair'], _ledger_page, member_id, variant=str(member_id),
+    )
 
-class ScheduleViewSet(viewsets.ModelViewSet):
+
+def _ledger_page(request, member_id):
+    paginator = LedgerPagination()
+    rows = paginator.paginate_ledger(member_id, request)
+    return paginator.get_paginated_response(rows)
+
+
+class ScheduleViewSet(BulkWriteMixin, TransactionalWriteMixin, PlannedQuerysetMixin, ConditionalGetMixin, RepresentationCacheMixin, AsyncReadMixin, viewsets.ModelViewSet):
     queryset = Schedule.objects.all()
     serializer_class = ScheduleSerializer
     permission_classes = [IsStaff]  # Only staff/admin can manage schedules
+    cursor_ordering = ('-date', '-time', '-id')
+    change_scope = 'schedule'
+    filter_fields = {
+        'date': 'date', 'from': 'date__gte', 'to': 'date__lte',
+        'completed': 'completed', 'task_type': 'task_type', 'assigned_to': 'assigned_to',
+    }
+    ordering_fields = ['date', 'time']
+    bulk_model_name = 'schedule'
 
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(BulkWriteMixin, TransactionalWriteMixin, PlannedQuerysetMixin, ConditionalGetMixin, FastListMixin, RepresentationCacheMixin, AsyncReadMixin, ExportMixin, viewsets.ModelViewSet):
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
     permission_classes = [IsOwnerOrStaff]  # Members can view their own, staff can view all
+    cursor_ordering = ('-payment_date', '-id')
+    change_scope = 'payment'
+    filter_fields = {
+        'status': 'status', 'member': 'member',
+        'from': 'payment_date__gte', 'to': 'payment_date__lte',
+    }
+    ordering_fields = ['payment_date']
+    export_name = 'payments'
+    export_columns = {
+        'id': 'id', 'member': 'member_id', 'member_name': 'member__name',
+        'member_email': 'member__email', 'member_room': 'member__room_number',
+        'amount': 'amount', 'payment_date': 'payment_date',
+        'collected_by': 'collected_by', 'status': 'status',
+    }
+    bulk_model_name = 'payment'
     
     def get_queryset(self):
-        queryset = Payment.objects.all()
+        queryset = super().get_queryset()
         # If user is a member, filter to their own payments
-        if hasattr(self.request.user, 'profile') and self.request.user.profile.is_member:
-            if hasattr(self.request.user, 'member_profile'):
-                member = self.request.user.member_profile
-                queryset = queryset.filter(member=member)
+        if roles.is_member(self.request):
+            queryset = queryset.filter(member_id=roles.get_member_id(self.request))
         return queryset
 
 
-class BillViewSet(viewsets.ModelViewSet):
+class BillViewSet(BulkWriteMixin, TransactionalWriteMixin, PlannedQuerysetMixin, ConditionalGetMixin, FastListMixin, RepresentationCacheMixin, AsyncReadMixin, ExportMixin, viewsets.ModelViewSet):
     queryset = Bill.objects.all()
     serializer_class = BillSerializer
     permission_classes = [IsOwnerOrStaff]  # Members can view their own, staff can view all
+    cursor_ordering = ('-id',)
+    change_scope = 'bill'
+    filter_fields = {'month': 'month', 'status': 'paid_status', 'member': 'member'}
+    filter_parsers = {'month': normalize_month}  # stored as YYYY-MM
+    ordering_fields = ['month']
+    export_name = 'bills'
+    export_columns = {
+        'id': 'id', 'member': 'member_id', 'member_name': 'member__name',
+        'member_email': 'member__email', 'member_room': 'member__room_number',
+        'month': 'month', 'water_amount': 'water_amount',
+        'electricity_amount': 'electricity_amount', 'balance': 'balance', 'paid_status': 'paid_status',
+    }
+    bulk_model_name = 'bill'
     
     def get_queryset(self):
-        queryset = Bill.objects.all()
+        queryset = super().get_queryset()
         # If user is a member, filter to their own bills
-        if hasattr(self.request.user, 'profile') and self.request.user.profile.is_member:
-            if hasattr(self.request.user, 'member_profile'):
-                member = self.request.user.member_profile
-                queryset = queryset.filter(member=member)
+        if roles.is_member(self.request):
+            queryset = queryset.filter(member_id=roles.get_member_id(self.request))
         return queryset
 
 
-class RepairViewSet(viewsets.ModelViewSet):
+class RepairViewSet(TransactionalWriteMixin, PlannedQuerysetMixin, ConditionalGetMixin, FastListMixin, RepresentationCacheMixin, AsyncReadMixin, ExportMixin, viewsets.ModelViewSet):
     queryset = Repair.objects.all()
     serializer_class = RepairSerializer
     permission_classes = [IsOwnerOrStaff]  # Members can view their own, staff can view all
+    cursor_ordering = ('-repair_date', '-id')
+    change_scope = 'repair'
+    filter_fields = {
+        'status': 'status', 'member': 'member',
+        'from': 'repair_date__gte', 'to': 'repair_date__lte',
+    }
+    ordering_fields = ['repair_date']
+    export_name = 'repairs'
+    export_columns = {
+        'id': 'id', 'member': 'member_id', 'member_name': 'member__name',
+        'member_email': 'member__email', 'member_room': 'member__room_number',
+        'item_name': 'item_name', 'repair_date': 'repair_date', 'cost': 'cost',
+        'replaced_by': 'replaced_by', 'description': 'description', 'status': 'status',
+    }
     
     def get_queryset(self):
-        queryset = Repair.objects.all()
+        queryset = super().get_queryset()
         # If user is a member, filter to their own repairs
-        if hasattr(self.request.user, 'profile') and self.request.user.profile.is_member:
-            if hasattr(self.request.user, 'member_profile'):
-                member = self.request.user.member_profile
-                queryset = queryset.filter(member=member)
+        if roles.is_member(self.request):
+            queryset = queryset.filter(member_id=roles.get_member_id(self.request))
         return queryset
 
 
@@ -81,68 +192,154 @@ class DashboardViewSet(viewsets.ViewSet):
     def stats(self, request):
         """Get dashboard statistics"""
         today = timezone.now().date()
-        
-        # Total members
-        total_members = Member.objects.count()
-        active_members = Member.objects.filter(status='Active').count()
-        
-        # Pending payments (unpaid)
-        pending_payments = Payment.objects.filter(status='Unpaid').count()
-        total_pending_amount = Payment.objects.filter(status='Unpaid').aggregate(
-            total=Sum('amount')
-        )['total'] or 0
-        
-        # Pending repairs
-        pending_repairs = Repair.objects.filter(status='Pending').count()
-        
-        # Today's schedules
-        today_schedules = Schedule.objects.filter(date=today).count()
-        completed_today = Schedule.objects.filter(date=today, completed=True).count()
-        
-        # Recent activity (last 10 items)
-        recent_payments = PaymentSerializer(
-            Payment.objects.order_by('-payment_date')[:5], many=True
-        ).data
-        recent_repairs = RepairSerializer(
-            Repair.objects.order_by('-repair_date')[:5], many=True
-        ).data
-        recent_schedules = ScheduleSerializer(
-            Schedule.objects.order_by('-date', '-time')[:5], many=True
-        ).data
-        
-        # Monthly bills summary
-        unpaid_bills = Bill.objects.filter(paid_status='Unpaid').count()
-        total_unpaid_bills_amount = Bill.objects.filter(paid_status='Unpaid').aggregate(
-            total=Sum('balance')
-        )['total'] or 0
-        
-        return Response({
+        # Unchanged data (and day) -> 304 from the change counters alone
+        return conditional_get(
+            request, ['member', 'schedule', 'payment', 'bill', 'repair'],
+            self._stats, today, variant=str(today),
+        )
+
+    @action(detail=False, methods=['get'])
+    def realtime(self, request):
+        """WebSocket connections and governance counters of this process (core/governance.py)"""
+        return Response(governance.stats.snapshot())
+
+    async def astats(self, request):
+        """``stats`` for the async read path (core/async_views.py)"""
+        today = timezone.now().date()
+        return await aconditional_get(
+            request, ['member', 'schedule', 'payment', 'bill', 'repair'],
+            self._astats, today, variant=str(today),
+        )
+
+    def _recent_activity(self):
+        """(serializer, queryset) of the recent activity lists"""
+        return {
+            'payments': (PaymentSerializer, PaymentSerializer.plan_queryset(
+                Payment.objects.order_by('-payment_date'))[:5]),
+            'repairs': (RepairSerializer, RepairSerializer.plan_queryset(
+                Repair.objects.order_by('-repair_date'))[:5]),
+            'schedules': (ScheduleSerializer, ScheduleSerializer.plan_queryset(
+                Schedule.objects.order_by('-date', '-time'))[:5]),
+        }
+
+    def _stats(self, request, today):
+        # Counters are maintained incrementally by core/signals.py
+        totals, today_stats = summary.get_summary(today)
+        recent = {
+            name: serializer(queryset, many=True).data
+            for name, (serializer, queryset) in self._recent_activity().items()
+        }
+        return Response(self._stats_body(totals, today_stats, recent))
+
+    async def _astats(self, request, today):
+        totals, today_stats = await summary.aget_summary(today)
+        recent = {}
+        for name, (serializer, queryset) in self._recent_activity().items():
+            recent[name] = serializer([obj async for obj in queryset], many=True).data
+        return Response(self._stats_body(totals, today_stats, recent))
+
+    def _stats_body(self, totals, today_stats, recent_activity):
+        today_schedules = today_stats.total if today_stats else 0
+        completed_today = today_stats.completed if today_stats else 0
+        return {
             'members': {
-                'total': total_members,
-                'active': active_members,
-                'inactive': total_members - active_members,
+                'total': totals.total_members,
+                'active': totals.active_members,
+                'inactive': totals.total_members - totals.active_members,
             },
             'payments': {
-                'pending_count': pending_payments,
-                'pending_amount': float(total_pending_amount),
+                'pending_count': totals.pending_payments,
+                'pending_amount': float(totals.pending_payment_amount),
             },
             'repairs': {
-                'pending': pending_repairs,
+                'pending': totals.pending_repairs,
             },
             'schedules': {
                 'today': today_schedules,
                 'completed_today': completed_today,
             },
             'bills': {
-                'unpaid_count': unpaid_bills,
-                'unpaid_amount': float(total_unpaid_bills_amount),
+                'unpaid_count': totals.unpaid_bills,
+                'unpaid_amount': float(totals.unpaid_bill_amount),
             },
-            'recent_activity': {
-                'payments': recent_payments,
-                'repairs': recent_repairs,
-                'schedules': recent_schedules,
-            }
-        })
+            'recent_activity': recent_activity,
+        }
+
+
+class MeterViewSet(viewsets.ViewSet):
+    """Sub-meter reading ingestion and usage rollups (see core/meters.py)"""
+    permission_classes = [IsAuthenticated]
+    max_usage_rows = 5000
+
+    @action(detail=False, methods=['post'], permission_classes=[IsStaff])
+    def readings(self, request):
+        """Append a batch of readings: a JSON list of {room, meter, taken_at, value}"""
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({'non_field_errors': ['Expected a list of readings.']})
+        if len(items) > meters.MAX_READINGS:
+            raise ValidationError({'non_field_errors': [f'At most {meters.MAX_READINGS} readings per request.']})
+        readings, errors = meters.parse_readings(items)
+        if any(errors):
+            raise ValidationError(errors)
+        return Response(meters.ingest(readings), status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'])
+    def usage(self, request):
+        """
+        Rolled-up usage, filtered by ?room=, ?meter=water|electricity,
+        ?period=hour|day|month (default month), ?from= and ?to= (dates).
+        Members only see their own room.
+        """
+        params = request.query_params
+        period = meters.PERIODS.get(params.get('period', 'month'))
+        if period is None:
+            raise ValidationError({'period': [f'Must be one of: {", ".join(meters.PERIODS)}.']})
+        queryset = MeterUsage.objects.filter(period=period)
+
+        room = params.get('room')
+        if roles.is_member(request):
+            own_room = Member.objects.filter(pk=roles.get_member_id(request)).values_list(
+                'room_number', flat=True,
+            ).first()
+            if not own_room or (room and room != own_room):
+                return Response([])
+            room = own_room
+        if room:
+            queryset = queryset.filter(room_number=room)
+        if params.get('meter'):
+            meter = meters.METERS.get(params['meter'])
+            if meter is None:
+                raise ValidationError({'meter': [f'Must be one of: {", ".join(meters.METERS)}.']})
+            queryset = queryset.filter(meter=meter)
+        for param, lookup in (('from', 'start__gte'), ('to', 'start__lt')):
+            if params.get(param):
+                day = parse_date(params[param])
+                if day is None:
+                    raise ValidationError({param: ['Expected a date (YYYY-MM-DD).']})
+                queryset = queryset.filter(**{lookup: timezone.make_aware(datetime.combine(day, datetime.min.time()))})
+
+        queryset = queryset.order_by('room_number', 'meter', 'start')[:self.max_usage_rows]
+        return Response(MeterUsageSerializer(queryset, many=True).data)
+
+
+class LedgerViewSet(viewsets.ViewSet):
+    """Member portal: the signed-in member's own statement"""
+    permission_classes = [IsMember]
+
+    def list(self, request):
+        member_id = roles.get_member_id(request)
+        if member_id is None:
+            raise NotFound('No member is linked to this account.')
+        return ledger_response(request, member_id)
+
+
+class MetricsViewSet(viewsets.ViewSet):
+    """Prometheus scrape target for this process (core/metrics.py)"""
+    permission_classes = [IsStaff]
+
+    def list(self, request):
+        return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 class UserViewSet(viewsets.ReadOnlyModelViewSet):